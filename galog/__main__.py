@@ -1,4 +1,13 @@
-from galog.app import runApp
+import multiprocessing
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
+
+    #
+    # Imported here, so the spawned log reader
+    # process, which re-imports this module, skips the GUI
+    #
+
+    from galog.app import runApp
+
     runApp()
@@ -1,4 +1,17 @@
-from .main import runApp
+#
+# The app is imported on first use. The log reader process
+# imports modules of this package too, but it doesn't need the GUI
+#
+
+
+def __getattr__(name: str):
+    if name == "runApp":
+        from .main import runApp
+
+        return runApp
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     "runApp",
@@ -1,3 +1,4 @@
+from .async_client import AsyncAdbClient, adbEventLoop
 from .device import (
     AdbClient,
     AdbDevice,
@@ -6,8 +7,12 @@ from .device import (
     adbClient,
     deviceList,
     deviceListWithInfo,
+    deviceListWithInfoAsync,
     deviceRestricted,
+    deviceRestrictedAsync,
 )
+from .device_tracker import DeviceTracker, deviceTracker
+from .state_cache import deviceStateCache
 
 __all__ = [
     "AdbClient",
@@ -18,4 +23,11 @@ __all__ = [
     "DeviceInfo",
     "DeviceDetails",
     "adbClient",
+    "AsyncAdbClient",
+    "adbEventLoop",
+    "deviceListWithInfoAsync",
+    "deviceRestrictedAsync",
+    "deviceStateCache",
+    "DeviceTracker",
+    "deviceTracker",
 ]
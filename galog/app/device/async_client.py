@@ -0,0 +1,309 @@
+import asyncio
+import atexit
+import re
+import threading
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple, TypeVar
+
+from ppadb.client import Client
+
+#
+# asyncio implementation of the adb host protocol. All the requests
+# are served by a single event loop thread, so any number of devices
+# and concurrent operations don't need a thread each.
+#
+# A request is a 4-digit hex length followed by the payload.
+# The server replies 'OKAY' or 'FAIL', followed by a length-prefixed
+# message on failure. 'host:transport:<serial>' switches the connection
+# to the device, after which a service (for example, 'shell:<cmd>')
+# streams its output until the connection is closed
+#
+
+ADB_TIMEOUT_SEC = 5.0
+ADB_READ_CHUNK_SIZE = 64 * 1024
+OKAY = b"OKAY"
+FAIL = b"FAIL"
+
+PROP_LINE = re.compile(r"^\[([\s\S]*?)\]: \[([\s\S]*?)\]\r?$", re.MULTILINE)
+PACKAGE_LINE = re.compile(r"^package:(.*?)\r?$", re.MULTILINE)
+
+T = TypeVar("T")
+DeviceListCallback = Callable[[List[Tuple[str, str]]], None]
+
+
+def parseDeviceList(text: str):
+    devices: List[Tuple[str, str]] = []
+    for line in filter(None, text.split("\n")):
+        try:
+            serial, state = line.split()
+        except ValueError:
+            raise RuntimeError("Adb response parse error")
+
+        devices.append((serial, state))
+
+    return devices
+
+
+class _AsyncAdbConnection:
+    def __init__(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        timeout: Optional[float],
+    ) -> None:
+        self._reader = reader
+        self._writer = writer
+        self._timeout = timeout
+
+    async def _readExactly(self, size: int):
+        try:
+            return await asyncio.wait_for(
+                self._reader.readexactly(size),
+                self._timeout,
+            )
+        except asyncio.IncompleteReadError:
+            raise ConnectionError("Connection closed by adb server")
+        except asyncio.TimeoutError:
+            raise ConnectionError("Timed out waiting for adb server")
+        except OSError as e:
+            raise ConnectionError(f"Failed to read from adb server: {e}")
+
+    async def _checkStatus(self):
+        status = await self._readExactly(4)
+        if status == OKAY:
+            return
+
+        if status == FAIL:
+            raise RuntimeError(f"ERROR: {await self.receive()}")
+
+        raise RuntimeError(f"Unexpected adb server response: {status!r}")
+
+    async def send(self, request: str):
+        data = request.encode("utf-8")
+        try:
+            self._writer.write(b"%04x" % len(data) + data)
+            await self._writer.drain()
+        except OSError as e:
+            raise ConnectionError(f"Failed to write to adb server: {e}")
+
+        await self._checkStatus()
+
+    async def receive(self):
+        try:
+            length = int(await self._readExactly(4), 16)
+        except ValueError:
+            raise RuntimeError("Adb response parse error")
+
+        data = await self._readExactly(length)
+        return data.decode("utf-8", errors="replace")
+
+    async def readAll(self):
+        #
+        # Services stream their output until they finish.
+        # The timeout applies to each read, not to the whole output
+        #
+
+        chunks = []
+        while True:
+            try:
+                chunk = await asyncio.wait_for(
+                    self._reader.read(ADB_READ_CHUNK_SIZE),
+                    self._timeout,
+                )
+            except asyncio.TimeoutError:
+                raise ConnectionError("Timed out waiting for adb server")
+            except OSError as e:
+                raise ConnectionError(f"Failed to read from adb server: {e}")
+
+            if not chunk:
+                break
+
+            chunks.append(chunk)
+
+        return b"".join(chunks)
+
+    async def close(self):
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except OSError:
+            pass
+
+
+class AsyncAdbClient:
+    #
+    # Errors are reported the same way, as ppadb does:
+    # RuntimeError for failed requests and ConnectionError
+    # for the adb server being unreachable. Any socket error
+    # (like unknown host or no route) is a ConnectionError
+    #
+
+    def __init__(self, host: str, port: int, timeout: float = ADB_TIMEOUT_SEC):
+        self._host = host
+        self._port = port
+        self._timeout = timeout
+
+    @classmethod
+    def fromClient(cls, client: Client):
+        return cls(client.host, client.port)
+
+    def host(self):
+        return self._host
+
+    def port(self):
+        return self._port
+
+    async def _connect(self, readTimeout: bool = True):
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(self._host, self._port),
+                self._timeout,
+            )
+        except asyncio.TimeoutError:
+            raise ConnectionError("Timed out connecting to adb server")
+        except OSError as e:
+            raise ConnectionError(f"Failed to connect to adb server: {e}")
+
+        timeout = self._timeout if readTimeout else None
+        return _AsyncAdbConnection(reader, writer, timeout)
+
+    async def _hostRequest(self, request: str):
+        conn = await self._connect()
+        try:
+            await conn.send(request)
+            return await conn.receive()
+        finally:
+            await conn.close()
+
+    async def version(self):
+        return int(await self._hostRequest("host:version"), 16)
+
+    async def devicesWithStates(self) -> List[Tuple[str, str]]:
+        return parseDeviceList(await self._hostRequest("host:devices"))
+
+    async def trackDevices(self, callback: DeviceListCallback):
+        #
+        # The server sends the whole device list at once
+        # and then again each time any device changes. The connection
+        # stays silent in between, so there's no read timeout.
+        # Returns only on error
+        #
+
+        conn = await self._connect(readTimeout=False)
+        try:
+            await conn.send("host:track-devices")
+            while True:
+                callback(parseDeviceList(await conn.receive()))
+        finally:
+            await conn.close()
+
+    async def deviceState(self, serial: str) -> Optional[str]:
+        for serial_, state in await self.devicesWithStates():
+            if serial_ == serial:
+                return state
+
+        return None
+
+    async def _serviceOutput(self, serial: str, service: str):
+        conn = await self._connect()
+        try:
+            await conn.send(f"host:transport:{serial}")
+            await conn.send(service)
+            return await conn.readAll()
+        finally:
+            await conn.close()
+
+    async def shell(self, serial: str, command: str):
+        output = await self._serviceOutput(serial, f"shell:{command}")
+        return output.decode("utf-8", errors="replace")
+
+    async def properties(self, serial: str) -> Dict[str, str]:
+        output = await self.shell(serial, "getprop")
+        return {m.group(1): m.group(2) for m in PROP_LINE.finditer(output)}
+
+    async def listPackages(self, serial: str) -> List[str]:
+        output = await self.shell(serial, "pm list packages 2>/dev/null")
+        return [m.group(1) for m in PACKAGE_LINE.finditer(output)]
+
+
+class AdbEventLoop:
+    #
+    # Event loop, running in its own daemon thread. Coroutines
+    # are submitted from any thread and their results are delivered
+    # via concurrent.futures.Future. Qt code connects to task signals,
+    # which are emitted from the loop thread and queued to the receivers
+    #
+
+    _futures: Set[Future]
+
+    def __init__(self) -> None:
+        self._futures = set()
+        self._futuresLock = threading.Lock()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._run,
+            name="AdbEventLoop",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    def _futureDone(self, future: Future):
+        with self._futuresLock:
+            self._futures.discard(future)
+
+    def submit(self, coro: Awaitable[T]) -> "Future[T]":
+        #
+        # The loop references its tasks weakly. A task, waiting
+        # for a socket, would be garbage collected, if nobody kept
+        # its future, so the futures are kept until done
+        #
+
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        with self._futuresLock:
+            self._futures.add(future)
+
+        future.add_done_callback(self._futureDone)
+        return future
+
+    async def _shutdown(self):
+        #
+        # Long-lived tasks (like device tracking) never finish
+        # by themselves, so they are cancelled before the loop stops
+        #
+
+        tasks = asyncio.all_tasks() - {asyncio.current_task()}
+        for task in tasks:
+            task.cancel()
+
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._loop.stop()
+
+    def callSoon(self, callback: Callable[..., None], *args):
+        self._loop.call_soon_threadsafe(callback, *args)
+
+    def stop(self):
+        if not self._thread.is_alive():
+            return
+
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop)
+        self._thread.join()
+        self._loop.close()
+
+
+_eventLoop: Optional[AdbEventLoop] = None
+_eventLoopLock = threading.Lock()
+
+
+def adbEventLoop():
+    global _eventLoop
+
+    with _eventLoopLock:
+        if _eventLoop is None:
+            _eventLoop = AdbEventLoop()
+            atexit.register(_eventLoop.stop)
+
+        return _eventLoop
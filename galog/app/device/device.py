@@ -1,4 +1,5 @@
-from contextlib import contextmanager
+import asyncio
+from contextlib import asynccontextmanager, contextmanager
 from dataclasses import dataclass
 from typing import Dict, List, Optional, Tuple
 
@@ -7,6 +8,7 @@ from ppadb.device import Device
 
 from galog.app.settings.settings import readSettings
 
+from .async_client import AsyncAdbClient
 from .errors import (
     AdbConnectionError,
     DeviceNotFound,
@@ -15,6 +17,7 @@ from .errors import (
     DeviceStateUnauthorized,
     NoDevicesFound,
 )
+from .state_cache import deviceStateCache
 
 DEVICE_STATE_OK = "device"
 DEVICE_STATE_UNAUTHORIZED = "unauthorized"
@@ -46,37 +49,42 @@ class DeviceInfo:
     details: Optional[DeviceDetails] = None
 
 
-class AdbDevice(Device):
-    def _device_display_name(self, props: Dict[str, str]):
-        try:
-            mf = props[_PROP_MANUFACTURER].capitalize()
-            codename = props[_PROP_CODENAME1] or props[_PROP_CODENAME2]
-            model = props[_PROP_MODEL]
-        except KeyError:
-            return _NOT_AVAIL
-
-        if model.lower().startswith(mf.lower()):
-            return f"{model} ({codename})"
-        else:
-            return f"{mf} {model} ({codename})"
+def _deviceDisplayName(props: Dict[str, str]):
+    try:
+        mf = props[_PROP_MANUFACTURER].capitalize()
+        codename = props[_PROP_CODENAME1] or props[_PROP_CODENAME2]
+        model = props[_PROP_MODEL]
+    except KeyError:
+        return _NOT_AVAIL
+
+    if model.lower().startswith(mf.lower()):
+        return f"{model} ({codename})"
+    else:
+        return f"{mf} {model} ({codename})"
+
+
+def _deviceOsInfo(props: Dict[str, str]):
+    try:
+        osVer = props[_PROP_RELEASE]
+    except KeyError:
+        return _NOT_AVAIL
+
+    return f"Android {osVer}"
 
-    def _device_os_info(self, props: Dict[str, str]):
-        try:
-            osVer = props[_PROP_RELEASE]
-        except KeyError:
-            return _NOT_AVAIL
 
-        return f"Android {osVer}"
+def deviceDetails(props: Dict[str, str]):
+    return DeviceDetails(
+        displayName=_deviceDisplayName(props),
+        cpuArch=props.get(_PROP_CPU_ARCH, _NOT_AVAIL),
+        sdkVerMin=props.get(_PROP_SDK_MIN, _NOT_AVAIL),
+        sdkVerMax=props.get(_PROP_SDK_MAX, _NOT_AVAIL),
+        osInfo=_deviceOsInfo(props),
+    )
 
+
+class AdbDevice(Device):
     def details(self):
-        props = self.get_properties()
-        return DeviceDetails(
-            displayName=self._device_display_name(props),
-            cpuArch=props.get(_PROP_CPU_ARCH, _NOT_AVAIL),
-            sdkVerMin=props.get(_PROP_SDK_MIN, _NOT_AVAIL),
-            sdkVerMax=props.get(_PROP_SDK_MAX, _NOT_AVAIL),
-            osInfo=self._device_os_info(props),
-        )
+        return deviceDetails(self.get_properties())
 
 
 class AdbClient(Client):
@@ -115,25 +123,50 @@ class AdbClient(Client):
         return None, None
 
 
+def checkDeviceState(state: str):
+    if state != DEVICE_STATE_OK:
+        if state == DEVICE_STATE_UNAUTHORIZED:
+            raise DeviceStateUnauthorized()
+        else:
+            raise DeviceStateInvalid(state)
+
+
+def _deviceState(deviceSerial: str, client: AdbClient, cached: bool):
+    #
+    # The state is taken from the cache, fed by 'host:track-devices'.
+    # The device list is requested only if the cache is not ready yet
+    # or not wanted, for example in a process, which checks the state once
+    #
+
+    live, state = False, None
+    if cached:
+        cache = deviceStateCache(client.host, client.port)
+        live, state = cache.lookup(deviceSerial)
+
+    if not live:
+        _, state = client.device_with_state(deviceSerial)
+
+    return state
+
+
 @contextmanager
-def deviceRestricted(deviceSerial: str, client: AdbClient):
+def deviceRestricted(deviceSerial: str, client: AdbClient, cached: bool = True):
     try:
-        device, state = client.device_with_state(deviceSerial)
+        state = _deviceState(deviceSerial, client, cached)
     except (RuntimeError, ConnectionError):
         raise AdbConnectionError()
 
-    if device is None:
+    if state is None:
         raise DeviceNotFound()
 
-    assert state is not None
-    if state != DEVICE_STATE_OK:
-        if state == DEVICE_STATE_UNAUTHORIZED:
-            raise DeviceStateUnauthorized()
-        else:
-            raise DeviceStateInvalid(state)
+    checkDeviceState(state)
+
+    #
+    # Device services go to 'host:transport:<serial>' directly
+    #
 
     try:
-        yield device
+        yield AdbDevice(client, deviceSerial)
     except (RuntimeError, ConnectionError) as e:
         raise DeviceRuntimeError(str(e))
 
@@ -169,8 +202,69 @@ def deviceListWithInfo(client: AdbClient) -> List[DeviceInfo]:
     return result
 
 
+@asynccontextmanager
+async def deviceRestrictedAsync(deviceSerial: str, client: AsyncAdbClient):
+    #
+    # Same as deviceRestricted(), but for the asyncio client
+    #
+
+    try:
+        cache = deviceStateCache(client.host(), client.port())
+        live, state = cache.lookup(deviceSerial)
+        if not live:
+            state = await client.deviceState(deviceSerial)
+    except (RuntimeError, ConnectionError):
+        raise AdbConnectionError()
+
+    if state is None:
+        raise DeviceNotFound()
+
+    checkDeviceState(state)
+
+    try:
+        yield deviceSerial
+    except (RuntimeError, ConnectionError) as e:
+        raise DeviceRuntimeError(str(e))
+
+
+async def _deviceInfo(client: AsyncAdbClient, serial: str, state: str):
+    #
+    # A device may go away while the list is being fetched.
+    # It's listed without details then
+    #
+
+    if state != DEVICE_STATE_OK:
+        return DeviceInfo(serial, state)
+
+    try:
+        props = await client.properties(serial)
+    except (RuntimeError, ConnectionError):
+        return DeviceInfo(serial, state)
+
+    return DeviceInfo(serial, state, deviceDetails(props))
+
+
+async def deviceListWithInfoAsync(client: AsyncAdbClient) -> List[DeviceInfo]:
+    #
+    # Properties of all the devices are fetched concurrently
+    #
+
+    try:
+        devices = await client.devicesWithStates()
+        if len(devices) == 0:
+            raise NoDevicesFound()
+
+        return await asyncio.gather(
+            *[_deviceInfo(client, serial, state) for serial, state in devices]
+        )
+
+    except (RuntimeError, ConnectionError):
+        raise AdbConnectionError()
+
+
 def adbClient():
     settings = readSettings()
     ipAddr = str(settings.adbServer.ipAddr)
     port = int(settings.adbServer.port)
+    deviceStateCache(ipAddr, port)
     return AdbClient(ipAddr, port)
@@ -0,0 +1,156 @@
+import logging
+import threading
+from typing import Dict, List, Set, Tuple
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from .async_client import AsyncAdbClient, adbEventLoop
+from .device import DEVICE_STATE_OK, DeviceInfo, deviceDetails
+from .state_cache import DeviceStateCache, deviceStateCache
+
+#
+# Live view of the devices, connected to the adb server.
+# Built on top of the device state cache, so it costs no requests
+# until something changes. Properties of a device are requested once,
+# when it becomes available. The device is announced after that,
+# so the receivers always get the details of available devices.
+#
+# Signals are emitted from the adb event loop thread
+# and queued to the receivers
+#
+
+
+class DeviceTracker(QObject):
+    deviceAdded = pyqtSignal(DeviceInfo)
+    deviceRemoved = pyqtSignal(str)
+    deviceStateChanged = pyqtSignal(DeviceInfo)
+
+    _devices: Dict[str, DeviceInfo]
+    _pending: Dict[str, str]
+    _fetching: Set[str]
+
+    def __init__(self, client: AsyncAdbClient, cache: DeviceStateCache) -> None:
+        super().__init__()
+        self._client = client
+        self._devices = {}
+        self._pending = {}
+        self._fetching = set()
+        self._live = False
+        self._lock = threading.Lock()
+        self._logger = logging.getLogger(self.__class__.__name__)
+        cache.addListener(self._statesChanged)
+
+    def isLive(self):
+        with self._lock:
+            return self._live
+
+    def isReady(self):
+        #
+        # Tracking is established and all the available
+        # devices are announced with their details
+        #
+
+        with self._lock:
+            return self._live and not self._pending
+
+    def devices(self) -> List[DeviceInfo]:
+        with self._lock:
+            return list(self._devices.values())
+
+    def _announce(self, device: DeviceInfo):
+        with self._lock:
+            known = device.serial in self._devices
+            self._devices[device.serial] = device
+
+        if known:
+            self.deviceStateChanged.emit(device)
+        else:
+            self.deviceAdded.emit(device)
+
+    def _removeGoneDevices(self, states: Dict[str, str]):
+        with self._lock:
+            gone = [serial for serial in self._devices if serial not in states]
+            for serial in gone:
+                del self._devices[serial]
+
+            for serial in list(self._pending):
+                if serial not in states:
+                    del self._pending[serial]
+
+        for serial in gone:
+            self.deviceRemoved.emit(serial)
+
+    def _changedStates(self, states: Dict[str, str]):
+        changed: List[Tuple[str, str]] = []
+        with self._lock:
+            for serial, state in states.items():
+                if self._pending.get(serial) == state:
+                    continue
+
+                device = self._devices.get(serial)
+                if device is None or device.state != state:
+                    changed.append((serial, state))
+
+        return changed
+
+    def _statesChanged(self, states: Dict[str, str], live: bool):
+        with self._lock:
+            self._live = live
+
+        self._removeGoneDevices(states)
+        for serial, state in self._changedStates(states):
+            if state != DEVICE_STATE_OK:
+                with self._lock:
+                    self._pending.pop(serial, None)
+
+                self._announce(DeviceInfo(serial, state))
+                continue
+
+            with self._lock:
+                self._pending[serial] = state
+                if serial in self._fetching:
+                    continue
+
+                self._fetching.add(serial)
+
+            adbEventLoop().submit(self._fetchDetails(serial))
+
+    async def _fetchDetails(self, serial: str):
+        #
+        # If properties are unavailable, the device
+        # is still usable, but shown without the details.
+        # The device is no longer pending, whatever happens,
+        # so a failure can't keep the tracker from being ready
+        #
+
+        props = {}
+        try:
+            props = await self._client.properties(serial)
+        except (RuntimeError, OSError) as e:
+            self._logger.warning("Failed to get properties of %s: %s", serial, e)
+        finally:
+            with self._lock:
+                self._fetching.discard(serial)
+                announce = self._pending.pop(serial, None) == DEVICE_STATE_OK
+
+        if announce:
+            self._announce(DeviceInfo(serial, DEVICE_STATE_OK, deviceDetails(props)))
+
+
+_trackers: Dict[Tuple[str, int], DeviceTracker] = {}
+_trackersLock = threading.Lock()
+
+
+def deviceTracker(host: str, port: int) -> DeviceTracker:
+    #
+    # One tracker per adb server address, started on first use
+    #
+
+    with _trackersLock:
+        tracker = _trackers.get((host, port))
+        if tracker is None:
+            client = AsyncAdbClient(host, port)
+            tracker = DeviceTracker(client, deviceStateCache(host, port))
+            _trackers[(host, port)] = tracker
+
+        return tracker
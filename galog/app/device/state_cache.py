@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .async_client import AsyncAdbClient, adbEventLoop
+
+#
+# States of the devices, as reported by 'host:track-devices'.
+# The adb server pushes the device list whenever anything changes,
+# so device operations can check the state without asking
+# for the whole list before each of them.
+#
+# The cache is valid only while the tracking connection is alive.
+# Until it's established (and after it's lost) the callers
+# fall back to 'host:devices'. The connection is retried,
+# as the adb server may be (re)started at any moment.
+#
+# Listeners are called from the event loop thread with the states
+# of all the devices, whenever anything changes
+#
+
+TRACK_RETRY_SEC = 1.0
+
+DeviceStatesListener = Callable[[Dict[str, str], bool], None]
+
+
+class DeviceStateCache:
+    _states: Dict[str, str]
+    _listeners: List[DeviceStatesListener]
+
+    def __init__(self, client: AsyncAdbClient) -> None:
+        self._client = client
+        self._states = {}
+        self._live = False
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._logger = logging.getLogger(self.__class__.__name__)
+
+    def _setStates(self, states: Dict[str, str], live: bool):
+        with self._lock:
+            if states == self._states and live == self._live:
+                return
+
+            self._states = states
+            self._live = live
+            listeners = list(self._listeners)
+
+        for listener in listeners:
+            listener(dict(states), live)
+
+    def _deviceListChanged(self, devices: List[Tuple[str, str]]):
+        if not self._live:
+            self._logger.info("Tracking devices")
+
+        self._setStates(dict(devices), True)
+
+    async def _trackOnce(self):
+        #
+        # Besides adb errors, the connection may fail with any OSError
+        # (for example, unresolvable host) and a malformed frame
+        # may fail to parse. Tracking is retried in any case
+        #
+
+        try:
+            await self._client.trackDevices(self._deviceListChanged)
+        except (RuntimeError, OSError, ValueError, IndexError) as e:
+            if self._live:
+                self._logger.warning("Device tracking lost: %s", str(e))
+
+        finally:
+            self._setStates({}, False)
+
+    async def _track(self):
+        while True:
+            try:
+                await self._trackOnce()
+            except Exception:
+                self._logger.exception("Device tracking failed")
+
+            await asyncio.sleep(TRACK_RETRY_SEC)
+
+    def start(self):
+        adbEventLoop().submit(self._track())
+
+    def _notifyListener(self, listener: DeviceStatesListener):
+        with self._lock:
+            states = dict(self._states)
+            live = self._live
+
+        listener(states, live)
+
+    def addListener(self, listener: DeviceStatesListener):
+        #
+        # The listener gets the current states first.
+        # It's called from the loop thread, like for any update
+        #
+
+        with self._lock:
+            self._listeners.append(listener)
+
+        adbEventLoop().callSoon(self._notifyListener, listener)
+
+    def isLive(self):
+        with self._lock:
+            return self._live
+
+    def lookup(self, serial: str) -> Tuple[bool, Optional[str]]:
+        #
+        # Returns whether the cache is valid and the state of the device.
+        # The state is None if the device is not connected
+        #
+
+        with self._lock:
+            return self._live, self._states.get(serial)
+
+
+_caches: Dict[Tuple[str, int], DeviceStateCache] = {}
+_cachesLock = threading.Lock()
+
+
+def deviceStateCache(host: str, port: int):
+    #
+    # One cache per adb server address, started on first use
+    #
+
+    with _cachesLock:
+        cache = _caches.get((host, port))
+        if cache is None:
+            cache = DeviceStateCache(AsyncAdbClient(host, port))
+            _caches[(host, port)] = cache
+            cache.start()
+
+        return cache
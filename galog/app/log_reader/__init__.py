@@ -1,6 +1,7 @@
 from .log_reader import (
     AndroidAppLogReader,
     LogLine,
+    LogReaderStats,
     ProcessEndedEvent,
     ProcessStartedEvent,
 )
@@ -8,6 +9,7 @@ from .log_reader import (
 __all__ = [
     "AndroidAppLogReader",
     "LogLine",
+    "LogReaderStats",
     "ProcessEndedEvent",
     "ProcessStartedEvent",
 ]
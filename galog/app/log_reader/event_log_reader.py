@@ -0,0 +1,268 @@
+import re
+import struct
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Tuple, Union
+
+from .log_entry_reader import LOG_ID_EVENTS, LogEntryBuffer
+from .models import ProcessEndedEvent, ProcessStartedEvent
+
+#
+# Entries of the events buffer ('logcat -b events -B') carry
+# a binary payload instead of the priority, tag and message:
+#
+#   int32_t tag    event tag number
+#   value          type byte, followed by the data:
+#                    0  int32
+#                    1  int64
+#                    2  string (int32 length, bytes)
+#                    3  list (uint8 count, values)
+#                    4  float32
+#
+# Names of the tags and of the list items come from the event-log tag map.
+# Its lines look like this:
+#
+#   30014 am_proc_start (User|1|5),(PID|1|5),(UID|1|5),(Process Name|3),...
+#
+
+EVENT_LOG_TAGS_PATH = "/system/etc/event-log-tags"
+EVENT_LOG_TAG_LINE = re.compile(r"^(\d+)\s+(\w+)(?:\s+(.*?))?\s*$", re.MULTILINE)
+EVENT_LOG_TAG_FIELD = re.compile(r"\(([^|)]+)")
+
+EVENT_TAG = struct.Struct("<i")
+EVENT_INT = struct.Struct("<i")
+EVENT_LONG = struct.Struct("<q")
+EVENT_FLOAT = struct.Struct("<f")
+
+EVENT_TYPE_INT = 0
+EVENT_TYPE_LONG = 1
+EVENT_TYPE_STRING = 2
+EVENT_TYPE_LIST = 3
+EVENT_TYPE_FLOAT = 4
+
+#
+# Process lifecycle events of ActivityManager. The tag numbers
+# have been the same since Android 4.2. If the device has no tag map,
+# or the map lacks these tags, they are used as is
+#
+
+AM_PROC_START = "am_proc_start"
+AM_PROC_DIED = "am_proc_died"
+AM_KILL = "am_kill"
+
+DEFAULT_EVENT_LOG_TAGS = """
+30011 am_proc_died (User|1|5),(PID|1|5),(Process Name|3)
+30014 am_proc_start (User|1|5),(PID|1|5),(UID|1|5),(Process Name|3),(Type|3),(Component|3)
+30023 am_kill (User|1|5),(PID|1|5),(Process Name|3),(OomAdj|1|5),(Reason|3)
+"""
+
+FIELD_PID = "PID"
+FIELD_PROCESS_NAME = "Process Name"
+FIELD_TYPE = "Type"
+FIELD_COMPONENT = "Component"
+
+EventValue = Union[int, float, str, list]
+ProcessEvent = Union[ProcessStartedEvent, ProcessEndedEvent]
+
+
+class EventFormatError(Exception):
+    pass
+
+
+@dataclass
+class EventLogTag:
+    name: str
+    fields: Dict[str, int]  # Field name -> index in the value list
+
+
+@dataclass
+class ProcessLogEvent:
+    #
+    # Decoded process start/end event. Has the fields StreamResumeState
+    # looks at, so the stream can be resumed like a stream of log lines
+    #
+
+    __slots__ = ("tag", "msg", "pid", "tid", "timestamp", "event")
+
+    tag: str
+    msg: str
+    pid: str
+    tid: int
+    timestamp: int
+    event: ProcessEvent
+
+
+def parseEventLogTags(text: str):
+    tags: Dict[int, EventLogTag] = {}
+    for match in EVENT_LOG_TAG_LINE.finditer(text):
+        fields = EVENT_LOG_TAG_FIELD.findall(match.group(3) or "")
+        tags[int(match.group(1))] = EventLogTag(
+            name=match.group(2),
+            fields={name: i for i, name in enumerate(fields)},
+        )
+
+    return tags
+
+
+def _decodeValue(buf: bytes, pos: int) -> Tuple[EventValue, int]:
+    valueType = buf[pos]
+    pos += 1
+
+    if valueType == EVENT_TYPE_INT:
+        return EVENT_INT.unpack_from(buf, pos)[0], pos + EVENT_INT.size
+
+    if valueType == EVENT_TYPE_LONG:
+        return EVENT_LONG.unpack_from(buf, pos)[0], pos + EVENT_LONG.size
+
+    if valueType == EVENT_TYPE_STRING:
+        (length,) = EVENT_INT.unpack_from(buf, pos)
+        pos += EVENT_INT.size
+        value = buf[pos : pos + length].decode("utf-8", errors="replace")
+        return value, pos + length
+
+    if valueType == EVENT_TYPE_LIST:
+        count = buf[pos]
+        pos += 1
+        values = []
+        for _ in range(count):
+            value, pos = _decodeValue(buf, pos)
+            values.append(value)
+
+        return values, pos
+
+    if valueType == EVENT_TYPE_FLOAT:
+        return EVENT_FLOAT.unpack_from(buf, pos)[0], pos + EVENT_FLOAT.size
+
+    raise EventFormatError(f"Unknown value type: {valueType}")
+
+
+def _field(tag: EventLogTag, values: List[EventValue], name: str):
+    index = tag.fields.get(name)
+    if index is None or index >= len(values):
+        raise EventFormatError(f"No '{name}' in '{tag.name}' event")
+
+    return values[index]
+
+
+def _processStarted(tag: EventLogTag, values: List[EventValue]):
+    target = None
+    if FIELD_TYPE in tag.fields and FIELD_COMPONENT in tag.fields:
+        target = "{} {}".format(
+            _field(tag, values, FIELD_TYPE),
+            _field(tag, values, FIELD_COMPONENT),
+        )
+
+    return ProcessStartedEvent(
+        processId=str(_field(tag, values, FIELD_PID)),
+        packageName=str(_field(tag, values, FIELD_PROCESS_NAME)),
+        target=target,
+    )
+
+
+def _processEnded(tag: EventLogTag, values: List[EventValue]):
+    return ProcessEndedEvent(
+        processId=str(_field(tag, values, FIELD_PID)),
+        packageName=str(_field(tag, values, FIELD_PROCESS_NAME)),
+    )
+
+
+EventDecoder = Callable[[EventLogTag, List[EventValue]], ProcessEvent]
+
+# fmt: off
+PROCESS_EVENT_DECODERS: Dict[str, EventDecoder] = {
+    AM_PROC_START: _processStarted,
+    AM_PROC_DIED: _processEnded,
+    AM_KILL: _processEnded,
+}
+# fmt: on
+
+
+def processEventLogTags(deviceTagMap: str):
+    #
+    # Tags of the device take precedence over the defaults
+    #
+
+    tags = parseEventLogTags(DEFAULT_EVENT_LOG_TAGS)
+    for number, tag in parseEventLogTags(deviceTagMap).items():
+        if tag.name in PROCESS_EVENT_DECODERS:
+            tags = {n: t for n, t in tags.items() if t.name != tag.name}
+            tags[number] = tag
+
+    return tags
+
+
+class EventLogReader:
+    #
+    # Reads process start/end events from the binary events buffer.
+    # Entries of the other tags are skipped by their tag number,
+    # without decoding the payload. Unlike LogEntryReader,
+    # parsed items are ProcessLogEvent, not LogLine
+    #
+
+    _entries: LogEntryBuffer
+    _eventTags: Dict[int, EventLogTag]
+
+    def __init__(self, tags: Dict[int, EventLogTag]) -> None:
+        self._entries = LogEntryBuffer()
+        self._eventTags = {
+            number: tag
+            for number, tag in tags.items()
+            if tag.name in PROCESS_EVENT_DECODERS
+        }
+
+    def addDataChunk(self, chunk: bytes):
+        self._entries.addDataChunk(chunk)
+
+    def _decodeEvent(self, tag: EventLogTag, payload: bytes):
+        #
+        # Malformed events are skipped. They don't mean
+        # the stream is broken, as the entry headers are fine
+        #
+
+        try:
+            values, _ = _decodeValue(payload, EVENT_TAG.size)
+            if not isinstance(values, list):
+                values = [values]
+
+            event = PROCESS_EVENT_DECODERS[tag.name](tag, values)
+        except (EventFormatError, IndexError, struct.error):
+            return None, None
+
+        return values, event
+
+    def readParsedLines(self) -> Iterator[ProcessLogEvent]:
+        #
+        # Entries with v1 header have no log id. They are
+        # read from the events buffer only, so they are kept
+        #
+
+        buf = self._entries.data()
+        entries = self._entries.readEntries()
+        for logId, pid, tid, timestamp, payloadBegin, payloadEnd in entries:
+            if logId is not None and logId != LOG_ID_EVENTS:
+                continue
+
+            #
+            # Entries are only checked to be at least 3 bytes
+            # long, which is too short for the tag number
+            #
+
+            if payloadEnd - payloadBegin < EVENT_TAG.size:
+                continue
+
+            (number,) = EVENT_TAG.unpack_from(buf, payloadBegin)
+            tag = self._eventTags.get(number)
+            if tag is None:
+                continue
+
+            values, event = self._decodeEvent(tag, bytes(buf[payloadBegin:payloadEnd]))
+            if event is None:
+                continue
+
+            yield ProcessLogEvent(
+                tag=tag.name,
+                msg="[{}]".format(",".join(str(value) for value in values)),
+                pid=str(pid),
+                tid=tid,
+                timestamp=timestamp,
+                event=event,
+            )
@@ -0,0 +1,188 @@
+from collections import deque
+from typing import Any, Deque, List
+
+from PyQt5.QtCore import QMutex, QMutexLocker, QWaitCondition
+
+from galog.app.settings.models import QueuePolicy
+
+from .models import LogLine
+
+#
+# Levels ordered from the least to the most important.
+# Lines of unknown level are dropped first
+#
+
+LEVEL_ORDER = {level: i for i, level in enumerate("?VDIWEFS")}
+LEVEL_UNKNOWN = 0
+
+#
+# When lines have to be dropped by level, drop a bit more than needed,
+# so the queue is not rebuilt again on every subsequent put
+#
+
+DROP_SLACK_DIVISOR = 8
+
+
+class IngestionQueue:
+    #
+    # Bounded queue between the log reader thread and the GUI thread.
+    # Holds log lines and process events in the order they were read.
+    # Only lines count towards the limit, events are never dropped
+    #
+
+    _items: Deque[Any]
+    _lineCount: int
+
+    def __init__(self, maxLines: int, policy: QueuePolicy) -> None:
+        assert maxLines > 0, "Queue size must be positive"
+        self._maxLines = maxLines
+        self._policy = policy
+        self._items = deque()
+        self._lineCount = 0
+        self._closed = False
+        self._droppedLines = 0
+        self._delayedLines = 0
+        self._mutex = QMutex()
+        self._spaceAvailable = QWaitCondition()
+
+    def _hasSpace(self, lineCount: int):
+        #
+        # A batch larger than the queue itself is accepted
+        # by an empty queue, otherwise the producer would wait forever
+        #
+
+        if self._lineCount == 0:
+            return True
+
+        return self._lineCount + lineCount <= self._maxLines
+
+    def _waitForSpace(self, lineCount: int):
+        if self._hasSpace(lineCount):
+            return True
+
+        self._delayedLines += lineCount
+        while not self._closed and not self._hasSpace(lineCount):
+            self._spaceAvailable.wait(self._mutex)
+
+        return not self._closed
+
+    def _dropOldest(self):
+        excess = self._lineCount - self._maxLines
+        events = []
+        while excess > 0:
+            item = self._items.popleft()
+            if isinstance(item, LogLine):
+                excess -= 1
+                self._droppedLines += 1
+                self._lineCount -= 1
+            else:
+                events.append(item)
+
+        self._items.extendleft(reversed(events))
+
+    def _dropLowestLevel(self):
+        excess = self._lineCount - self._maxLines
+        if excess <= 0:
+            return
+
+        excess += self._maxLines // DROP_SLACK_DIVISOR
+        levelCounts = [0] * len(LEVEL_ORDER)
+        for item in self._items:
+            if isinstance(item, LogLine):
+                levelCounts[LEVEL_ORDER.get(item.level, LEVEL_UNKNOWN)] += 1
+
+        #
+        # Find the level, below which all lines are dropped,
+        # and how many of the oldest lines of that level go too
+        #
+
+        threshold, partial = 0, excess
+        for threshold, count in enumerate(levelCounts):
+            if partial <= count:
+                break
+
+            partial -= count
+
+        kept: Deque[Any] = deque()
+        for item in self._items:
+            if isinstance(item, LogLine):
+                order = LEVEL_ORDER.get(item.level, LEVEL_UNKNOWN)
+                if order < threshold:
+                    continue
+
+                if order == threshold and partial > 0:
+                    partial -= 1
+                    continue
+
+            kept.append(item)
+
+        dropped = len(self._items) - len(kept)
+        self._droppedLines += dropped
+        self._lineCount -= dropped
+        self._items = kept
+
+    def putLines(self, lines: List[LogLine]):
+        #
+        # Returns True if the queue was empty, so the consumer
+        # must be notified. Returns False if the queue is closed
+        #
+
+        with QMutexLocker(self._mutex):
+            if self._policy == QueuePolicy.Block:
+                if not self._waitForSpace(len(lines)):
+                    return False
+
+            wasEmpty = not self._items
+            self._items.extend(lines)
+            self._lineCount += len(lines)
+
+            if self._policy == QueuePolicy.DropOldest:
+                self._dropOldest()
+            elif self._policy == QueuePolicy.DropLowestLevel:
+                self._dropLowestLevel()
+
+            return wasEmpty
+
+    def putEvent(self, event: Any):
+        with QMutexLocker(self._mutex):
+            wasEmpty = not self._items
+            self._items.append(event)
+            return wasEmpty
+
+    def take(self, maxLines: int):
+        #
+        # Take up to 'maxLines' lines (and events between them)
+        # from the head of the queue. The consumer keeps taking
+        # until the queue is empty, only then it waits for a notification
+        #
+
+        with QMutexLocker(self._mutex):
+            result = []
+            taken = 0
+            while self._items and taken < maxLines:
+                item = self._items.popleft()
+                if isinstance(item, LogLine):
+                    taken += 1
+
+                result.append(item)
+
+            self._lineCount -= taken
+            self._spaceAvailable.wakeAll()
+            return result, bool(self._items)
+
+    def close(self):
+        with QMutexLocker(self._mutex):
+            self._closed = True
+            self._spaceAvailable.wakeAll()
+
+    def size(self):
+        with QMutexLocker(self._mutex):
+            return self._lineCount
+
+    def droppedLines(self):
+        with QMutexLocker(self._mutex):
+            return self._droppedLines
+
+    def delayedLines(self):
+        with QMutexLocker(self._mutex):
+            return self._delayedLines
@@ -0,0 +1,214 @@
+import struct
+from typing import FrozenSet, Optional, Set
+
+from .models import LogLine
+
+#
+# Binary logcat output ('logcat -B') is a stream of 'logger_entry' records.
+# All header versions start with the same fields:
+#
+#   uint16_t len       length of the payload
+#   uint16_t hdr_size  header size, 0 in v1 (header size is 20 in this case)
+#   int32_t  pid       process id
+#   uint32_t tid       thread id
+#   uint32_t sec       seconds since epoch
+#   uint32_t nsec      nanoseconds
+#   uint32_t lid       log buffer id (v3 and later, euid in rare v2)
+#   uint32_t uid       user id (v4 and later)
+#
+# The payload of text buffers is: priority byte, tag, '\0', message, '\0'
+#
+
+ENTRY_HEADER = struct.Struct("<HHiIII")
+ENTRY_LOG_ID = struct.Struct("<I")
+ENTRY_HEADER_SIZE_V1 = 20
+ENTRY_HEADER_SIZES = frozenset([20, 24, 28])
+ENTRY_PAYLOAD_MAX_LEN = 5 * 1024
+ENTRY_PAYLOAD_MIN_LEN = 3
+
+LOG_ID_EVENTS = 2
+LOG_ID_STATS = 5
+LOG_ID_SECURITY = 6
+BINARY_LOG_IDS = frozenset([LOG_ID_EVENTS, LOG_ID_STATS, LOG_ID_SECURITY])
+
+# fmt: off
+PRIORITY_LEVELS = {
+    2: "V",
+    3: "D",
+    4: "I",
+    5: "W",
+    6: "E",
+    7: "F",
+    8: "S",
+}
+# fmt: on
+
+
+class LogEntryFormatError(Exception):
+    pass
+
+
+class LogEntryBuffer:
+    #
+    # Splits the binary stream into complete entries. Shared by the readers
+    # of text and event buffers, which only differ in the payload format.
+    # An entry is yielded once its payload has been fully received
+    #
+
+    _buf: bytearray
+    _pos: int
+
+    def __init__(self) -> None:
+        self._buf = bytearray()
+        self._pos = 0
+
+    def data(self):
+        return self._buf
+
+    def _compact(self):
+        if self._pos > 0:
+            del self._buf[: self._pos]
+            self._pos = 0
+
+    def addDataChunk(self, chunk: bytes):
+        self._compact()
+        self._buf += chunk
+
+    def _headerSize(self, hdrSize: int, length: int):
+        #
+        # There is no magic number or checksum in the stream. Sanity check
+        # each header, so garbage (for example, a stream corrupted by
+        # line ending translation) is detected early instead of being
+        # silently turned into bogus log lines
+        #
+
+        if hdrSize == 0:
+            hdrSize = ENTRY_HEADER_SIZE_V1
+
+        if hdrSize not in ENTRY_HEADER_SIZES:
+            raise LogEntryFormatError(f"Invalid header size: {hdrSize}")
+
+        if not ENTRY_PAYLOAD_MIN_LEN <= length <= ENTRY_PAYLOAD_MAX_LEN:
+            raise LogEntryFormatError(f"Invalid payload length: {length}")
+
+        return hdrSize
+
+    def _logId(self, pos: int, hdrSize: int):
+        #
+        # v1 header has no log buffer id
+        #
+
+        if hdrSize == ENTRY_HEADER_SIZE_V1:
+            return None
+
+        (logId,) = ENTRY_LOG_ID.unpack_from(self._buf, pos + ENTRY_HEADER.size)
+        return logId
+
+    def readEntries(self):
+        #
+        # Yields (logId, pid, tid, timestamp, payloadBegin, payloadEnd).
+        # Payload offsets point into data(), which must not be
+        # modified until the generator is exhausted
+        #
+
+        buf = self._buf
+        size = len(buf)
+
+        while size - self._pos >= ENTRY_HEADER.size:
+            pos = self._pos
+            length, hdrSize, pid, tid, sec, nsec = ENTRY_HEADER.unpack_from(buf, pos)
+            hdrSize = self._headerSize(hdrSize, length)
+
+            payloadBegin = pos + hdrSize
+            payloadEnd = payloadBegin + length
+            if payloadEnd > size:
+                break
+
+            self._pos = payloadEnd
+            yield (
+                self._logId(pos, hdrSize),
+                pid,
+                tid,
+                sec * 1_000_000_000 + nsec,
+                payloadBegin,
+                payloadEnd,
+            )
+
+
+class LogEntryReader:
+    _entries: LogEntryBuffer
+    _pids: Optional[Set[bytes]]
+    _tags: FrozenSet[bytes]
+
+    def __init__(self) -> None:
+        self._entries = LogEntryBuffer()
+        self._pids = None
+        self._tags = frozenset()
+
+    def setLineFilter(self, pids: Optional[Set[bytes]], tags: FrozenSet[bytes]):
+        #
+        # Same semantics as LogLineReader.setLineFilter()
+        #
+
+        self._pids = pids
+        self._tags = tags
+
+    def addDataChunk(self, chunk: bytes):
+        self._entries.addDataChunk(chunk)
+
+    def _acceptEntry(self, tag: bytes, pid: int):
+        if self._pids is None:
+            return True
+
+        return b"%d" % pid in self._pids or tag in self._tags
+
+    def _parseEntries(self, view: memoryview):
+        buf = self._entries.data()
+        entries = self._entries.readEntries()
+        for logId, pid, tid, timestamp, payloadBegin, payloadEnd in entries:
+            if logId in BINARY_LOG_IDS:
+                continue
+
+            tagEnd = buf.find(b"\0", payloadBegin + 1, payloadEnd)
+            if tagEnd == -1:
+                raise LogEntryFormatError("Tag is not null-terminated")
+
+            tag = bytes(view[payloadBegin + 1 : tagEnd])
+            if not self._acceptEntry(tag, pid):
+                continue
+
+            msgEnd = payloadEnd
+            while msgEnd > tagEnd + 1 and buf[msgEnd - 1] in b"\0\n":
+                msgEnd -= 1
+
+            level = PRIORITY_LEVELS.get(buf[payloadBegin], "?")
+            yield (
+                level,
+                tag.decode("utf-8", errors="replace"),
+                str(view[tagEnd + 1 : msgEnd], "utf-8", errors="replace"),
+                str(pid),
+                tid,
+                timestamp,
+            )
+
+    def readParsedLines(self):
+        view = memoryview(self._entries.data())
+        try:
+            for level, tag, msg, pid, tid, timestamp in self._parseEntries(view):
+                #
+                # Unlike text output, a single entry may hold a multi-line
+                # message. Split it the same way logcat does when printing
+                #
+
+                for msgLine in msg.split("\n"):
+                    yield LogLine(
+                        level=level,
+                        tag=tag,
+                        msg=msgLine,
+                        pid=pid,
+                        tid=tid,
+                        timestamp=timestamp,
+                    )
+
+        finally:
+            view.release()
@@ -0,0 +1,214 @@
+import re
+from datetime import datetime
+from enum import Enum
+from typing import AnyStr, Dict, FrozenSet, Optional, Set
+
+from .models import LogLine
+
+
+class LogFormat(str, Enum):
+    Brief = "brief"
+    ThreadTime = "threadtime"
+    Epoch = "epoch"
+
+
+#
+# The empty 'msg' group marks where the message begins. The message itself
+# is consumed, but not captured, so it's never copied for filtered out lines.
+#
+# In 'threadtime' layout the tag is padded with spaces to 8 characters.
+# With the 'epoch' modifier the date is replaced by seconds since epoch
+#
+
+# fmt: off
+LOG_LINE_BRIEF = re.compile(
+    rb"^(?P<level>[A-Z])/(?P<tag>.+?)\( *(?P<pid>\d+)\): (?P<msg>).*",
+    re.MULTILINE,
+)
+LOG_LINE_THREADTIME = re.compile(
+    rb"^(?P<time>\d\d-\d\d \d\d:\d\d:\d\d)\.(?P<frac>\d+) +(?P<pid>\d+) +(?P<tid>\d+) "
+    rb"(?P<level>[A-Z]) (?P<tag>.*?) *: (?P<msg>).*",
+    re.MULTILINE,
+)
+LOG_LINE_EPOCH = re.compile(
+    rb"^ *(?P<time>\d+)\.(?P<frac>\d+) +(?P<pid>\d+) +(?P<tid>\d+) "
+    rb"(?P<level>[A-Z]) (?P<tag>.*?) *: (?P<msg>).*",
+    re.MULTILINE,
+)
+# fmt: on
+
+LOG_LINE_PATTERNS = {
+    LogFormat.Brief: LOG_LINE_BRIEF,
+    LogFormat.ThreadTime: LOG_LINE_THREADTIME,
+    LogFormat.Epoch: LOG_LINE_EPOCH,
+}
+
+CR = ord("\r")
+NSEC_DIGITS = 9
+SECONDS_CACHE_MAX = 4096
+SECONDS_PER_DAY = 24 * 60 * 60
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def localTimeToEpoch(monthDayTime: str, now: datetime):
+    #
+    # Threadtime timestamps have no year and are in device local time.
+    # Assume the device shares the timezone with the host and the log line
+    # is not from the future, so the year is the current one or the previous
+    #
+
+    try:
+        result = datetime.strptime(f"{now.year}-{monthDayTime}", TIME_FORMAT)
+        if result.timestamp() > now.timestamp() + SECONDS_PER_DAY:
+            result = result.replace(year=now.year - 1)
+    except ValueError:
+        return 0
+
+    return int(result.timestamp())
+
+
+def fractionToNanoseconds(fraction: AnyStr):
+    fraction = fraction[:NSEC_DIGITS]
+    return int(fraction) * 10 ** (NSEC_DIGITS - len(fraction))
+
+
+class LogLineReader:
+    _buf: bytearray
+    _pos: int
+    _scanPos: int
+    _pids: Optional[Set[bytes]]
+    _tags: FrozenSet[bytes]
+    _logFormat: LogFormat
+    _secondsCache: Dict[bytes, int]
+    _stripCarriageReturns: bool
+
+    def __init__(
+        self,
+        logFormat: LogFormat = LogFormat.Brief,
+        stripCarriageReturns: bool = False,
+    ) -> None:
+        self._buf = bytearray()
+        self._pos = 0
+        self._scanPos = 0
+        self._pids = None
+        self._tags = frozenset()
+        self._logFormat = logFormat
+        self._pattern = LOG_LINE_PATTERNS[logFormat]
+        self._secondsCache = {}
+        self._stripCarriageReturns = stripCarriageReturns
+
+    def setLineFilter(self, pids: Optional[Set[bytes]], tags: FrozenSet[bytes]):
+        #
+        # Lines are kept if their pid is in 'pids' or their tag is in 'tags'.
+        # 'pids' is not copied, so the caller may update it in place.
+        # Setting 'pids' to None disables filtering
+        #
+
+        self._pids = pids
+        self._tags = tags
+
+    def _compact(self):
+        #
+        # Drop bytes of already consumed lines. Deleting a prefix
+        # of a bytearray is cheap, it only moves the start pointer
+        #
+
+        if self._pos > 0:
+            del self._buf[: self._pos]
+            self._scanPos -= self._pos
+            self._pos = 0
+
+    def addDataChunk(self, chunk: bytes):
+        self._compact()
+        self._buf += chunk
+
+    def _completeLinesEnd(self):
+        #
+        # Find the end of the last complete line in the buffer, scanning
+        # only the bytes that arrived since the previous call, so a long
+        # partial line is never scanned twice
+        #
+
+        end = self._buf.rfind(b"\n", self._scanPos)
+        if end == -1:
+            self._scanPos = len(self._buf)
+
+        return end
+
+    def _acceptLine(self, tag: bytes, pid: bytes):
+        if self._pids is None:
+            return True
+
+        return pid in self._pids or tag in self._tags
+
+    def _seconds(self, time: bytes):
+        if self._logFormat == LogFormat.Epoch:
+            return int(time)
+
+        #
+        # Many consecutive lines share the same second,
+        # so date parsing is done once per distinct value
+        #
+
+        seconds = self._secondsCache.get(time)
+        if seconds is None:
+            if len(self._secondsCache) >= SECONDS_CACHE_MAX:
+                self._secondsCache.clear()
+
+            seconds = localTimeToEpoch(time.decode(), datetime.now())
+            self._secondsCache[time] = seconds
+
+        return seconds
+
+    def _threadIdAndTimestamp(self, match: re.Match):
+        time, fraction, tid = match.group("time", "frac", "tid")
+        seconds = self._seconds(time)
+        if seconds == 0:
+            return int(tid), 0
+
+        return int(tid), seconds * 1_000_000_000 + fractionToNanoseconds(fraction)
+
+    def readParsedLines(self):
+        end = self._completeLinesEnd()
+        if end == -1:
+            return
+
+        #
+        # Match the whole block of complete lines in place, right over
+        # a memoryview of the buffer. Only the matched groups are copied.
+        # Lines are filtered by pid and tag before anything gets decoded,
+        # so the message text is decoded only for the lines we keep
+        #
+
+        hasTime = self._logFormat != LogFormat.Brief
+        stripCarriageReturns = self._stripCarriageReturns
+        tid, timestamp = -1, 0
+
+        view = memoryview(self._buf)
+        try:
+            for match in self._pattern.finditer(view, self._pos, end):
+                level, tag, pid = match.group("level", "tag", "pid")
+                tag = tag.strip()
+                if not self._acceptLine(tag, pid):
+                    continue
+
+                if hasTime:
+                    tid, timestamp = self._threadIdAndTimestamp(match)
+
+                msgBegin, msgEnd = match.start("msg"), match.end()
+                if stripCarriageReturns and view[msgEnd - 1] == CR:
+                    msgEnd -= 1
+
+                yield LogLine(
+                    level=level.decode(),
+                    tag=tag.decode("utf-8", errors="replace"),
+                    pid=pid.decode(),
+                    tid=tid,
+                    timestamp=timestamp,
+                    msg=str(view[msgBegin:msgEnd], "utf-8", errors="replace"),
+                )
+
+        finally:
+            view.release()
+            self._pos = end + 1
+            self._scanPos = self._pos
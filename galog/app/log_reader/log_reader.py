@@ -1,36 +1,80 @@
-from typing import List
+from typing import List, Optional
 
-from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
 
 from galog.app.device import AdbClient
-
-from .log_reader_thread import LogcatReaderThread
-from .models import LogLine, ProcessEndedEvent, ProcessStartedEvent
+from galog.app.settings.models import LogBuffer, QueuePolicy
+
+from .log_reader_process import LogReaderProcess
+from .log_reader_thread import QUEUE_MAX_LINES, LogcatReaderThread
+from .models import (
+    AppEndedEvent,
+    AppStartedEvent,
+    ConnectionLostEvent,
+    ConnectionRestoredEvent,
+    LogLine,
+    LogReaderStats,
+    ProcessEndedEvent,
+    ProcessStartedEvent,
+    QueueEvent,
+)
+
+#
+# Lines are taken from the reader's queue in chunks. The event loop
+# gets control between the chunks, so a large backlog doesn't freeze the UI
+#
+
+TAKE_MAX_LINES = 8192
 
 
 class LogReaderSignals(QObject):
     failed = pyqtSignal(str, str)
-    lineRead = pyqtSignal(LogLine)
+    linesRead = pyqtSignal(list)
     processStarted = pyqtSignal(ProcessStartedEvent)
     processEnded = pyqtSignal(ProcessEndedEvent)
     appStarted = pyqtSignal(str)
     appEnded = pyqtSignal(str)
+    linesDropped = pyqtSignal(int)
+    connectionLost = pyqtSignal()
+    connectionRestored = pyqtSignal(float)
 
 
 class AndroidAppLogReader:
-    def __init__(self, client: AdbClient, device: str, package: str, pids: List[str]):
+    def __init__(
+        self,
+        client: AdbClient,
+        device: str,
+        package: str,
+        pids: List[str],
+        binaryFormat: bool = False,
+        deviceFiltering: bool = False,
+        queueMaxLines: int = QUEUE_MAX_LINES,
+        queuePolicy: QueuePolicy = QueuePolicy.Block,
+        buffers: Optional[List[LogBuffer]] = None,
+        readerProcess: bool = False,
+    ):
         super().__init__()
         self._client = client
         self._deviceName = device
         self._packageName = package
-        self._readerThread = LogcatReaderThread(client, device)
-        self._pids = set(pids)
+        readerClass = LogReaderProcess if readerProcess else LogcatReaderThread
+        self._reader = readerClass(
+            client,
+            device,
+            pids,
+            binaryFormat=binaryFormat,
+            package=package,
+            deviceFiltering=deviceFiltering,
+            queueMaxLines=queueMaxLines,
+            queuePolicy=queuePolicy,
+            buffers=buffers,
+        )
+        self._droppedLines = 0
+        self._takeScheduled = False
 
         self.signals = LogReaderSignals()
-        self._readerThread.lineRead.connect(self.onLineRead)
-        self._readerThread.processStarted.connect(self.onProcessStarted)
-        self._readerThread.processEnded.connect(self.onProcessEnded)
-        self._readerThread.failed.connect(self.onFailed)
+        self._reader.dataAvailable.connect(self.onDataAvailable)
+        self._reader.failed.connect(self.onFailed)
 
     @property
     def device(self):
@@ -40,34 +84,85 @@ class AndroidAppLogReader:
     def package(self):
         return self._packageName
 
-    def onLineRead(self, line: LogLine):
-        if line.pid in self._pids:
-            self.signals.lineRead.emit(line)
+    def pids(self) -> List[str]:
+        return self._reader.pids()
 
-    def onProcessStarted(self, event: ProcessStartedEvent):
-        if event.packageName == self._packageName:
-            if not self._pids:
-                self.signals.appStarted.emit(event.packageName)
-            self._pids.add(event.processId)
+    def _emitEvent(self, event: QueueEvent):
+        if isinstance(event, ProcessStartedEvent):
             self.signals.processStarted.emit(event)
-
-    def onProcessEnded(self, event: ProcessEndedEvent):
-        if event.packageName == self._packageName:
-            self._pids.discard(event.processId)
+        elif isinstance(event, ProcessEndedEvent):
             self.signals.processEnded.emit(event)
-            if not self._pids:
-                self.signals.appEnded.emit(event.packageName)
+        elif isinstance(event, AppStartedEvent):
+            self.signals.appStarted.emit(event.packageName)
+        elif isinstance(event, AppEndedEvent):
+            self.signals.appEnded.emit(event.packageName)
+        elif isinstance(event, ConnectionLostEvent):
+            self.signals.connectionLost.emit()
+        elif isinstance(event, ConnectionRestoredEvent):
+            self.signals.connectionRestored.emit(event.latency)
+
+    def _reportDroppedLines(self):
+        droppedLines = self._reader.stats().droppedLines
+        if droppedLines > self._droppedLines:
+            self.signals.linesDropped.emit(droppedLines - self._droppedLines)
+            self._droppedLines = droppedLines
+
+    def _deliverQueued(self):
+        #
+        # Take a chunk from the reader's queue and emit it. Consecutive
+        # lines go in one batch, events keep their position between them.
+        # Returns True if the queue still has something
+        #
+
+        items, hasMore = self._reader.takeQueued(TAKE_MAX_LINES)
+        self._reportDroppedLines()
+
+        lines: List[LogLine] = []
+        for item in items:
+            if isinstance(item, LogLine):
+                lines.append(item)
+                continue
+
+            if lines:
+                self.signals.linesRead.emit(lines)
+                lines = []
+
+            self._emitEvent(item)
+
+        if lines:
+            self.signals.linesRead.emit(lines)
+
+        return hasMore
+
+    def _takeQueued(self):
+        self._takeScheduled = False
+        if self._deliverQueued():
+            self._scheduleTakeQueued()
+
+    def _scheduleTakeQueued(self):
+        if not self._takeScheduled:
+            self._takeScheduled = True
+            QTimer.singleShot(0, self._takeQueued)
+
+    def onDataAvailable(self):
+        self._scheduleTakeQueued()
 
     def onFailed(self, msgBrief: str, msgVerbose: str):
+        while self._deliverQueued():
+            pass
+
         self.signals.failed.emit(msgBrief, msgVerbose)
 
     def start(self):
-        self._readerThread.start()
+        self._reader.start()
 
     def stop(self):
-        if self._readerThread.isRunning():
-            self._readerThread.stop()
-            self._readerThread.wait()
+        if self._reader.isRunning():
+            self._reader.stop()
+            self._reader.wait()
+
+    def stats(self) -> LogReaderStats:
+        return self._reader.stats()
 
     def isRunning(self):
-        return self._readerThread.isRunning()
+        return self._reader.isRunning()
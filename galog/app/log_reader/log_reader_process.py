@@ -0,0 +1,431 @@
+import logging
+import multiprocessing
+import pickle
+import threading
+import time
+from contextlib import suppress
+from dataclasses import dataclass
+from logging.handlers import QueueHandler
+from multiprocessing.connection import Connection
+from multiprocessing.synchronize import Lock
+from typing import List, Optional, Tuple
+
+from PyQt5.QtCore import QObject, Qt, QThread, pyqtSignal
+
+from galog.app.device import AdbClient
+from galog.app.settings.models import LogBuffer, QueuePolicy
+
+from .log_reader_thread import QUEUE_MAX_LINES, LogcatReaderThread
+from .models import LogLine, LogReaderStats
+from .shm_ring import SharedMemoryRing
+
+#
+# The log reader may run in a separate process, so socket reading
+# and parsing don't compete with the GUI for the interpreter lock.
+# Parsed lines go through a ring in shared memory. Everything else
+# (notifications, stats, errors, log records) goes through a pipe.
+#
+# The ring is large enough to hold a few seconds of heavy logging.
+# When it's full, the reader process waits, so the queue policy
+# of the reader thread applies as usual
+#
+
+READER_RING_SIZE = 32 * 1024 * 1024
+TRANSFER_MAX_LINES = 4096
+RING_FULL_WAIT_SEC = 0.002
+CONTROL_POLL_SEC = 0.1
+PROCESS_EXIT_WAIT_SEC = 1.0
+
+MSG_READY = "ready"
+MSG_DATA = "data"
+MSG_FAILED = "failed"
+MSG_LOG = "log"
+MSG_STOP = "stop"
+
+
+@dataclass
+class ReaderProcessConfig:
+    host: str
+    port: int
+    device: str
+    pids: Optional[List[str]]
+    binaryFormat: bool
+    package: Optional[str]
+    deviceFiltering: bool
+    queueMaxLines: int
+    queuePolicy: QueuePolicy
+    buffers: Optional[List[LogBuffer]]
+
+
+def _encodeItems(items: list):
+    #
+    # Lines are sent as plain tuples, which pickle much faster
+    # than slotted dataclasses. Events are rare and sent as is
+    #
+
+    encoded = [
+        (i.tag, i.level, i.msg, i.pid, i.tid, i.timestamp) if type(i) is LogLine else i
+        for i in items
+    ]
+
+    return pickle.dumps(encoded, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _decodeItems(frame: bytes):
+    return [LogLine(*i) if type(i) is tuple else i for i in pickle.loads(frame)]
+
+
+class _PipeSender:
+    #
+    # Connection.send() is not thread safe, but both the reader thread
+    # (log records) and the main thread of the reader process use the pipe
+    #
+
+    def __init__(self, conn: Connection) -> None:
+        self._conn = conn
+        self._lock = threading.Lock()
+
+    def send(self, message: tuple):
+        with self._lock, suppress(OSError):
+            self._conn.send(message)
+
+    def put_nowait(self, record: logging.LogRecord):
+        self.send((MSG_LOG, record))
+
+
+class _ReaderProcess:
+    #
+    # Runs in the reader process. Moves lines from the queue
+    # of the reader thread to the ring and notifies the GUI process
+    #
+
+    def __init__(
+        self,
+        config: ReaderProcessConfig,
+        ring: SharedMemoryRing,
+        sender: _PipeSender,
+        control: Connection,
+    ) -> None:
+        self._ring = ring
+        self._sender = sender
+        self._control = control
+        self._dataAvailable = threading.Event()
+        self._stopped = False
+        self._failure: Optional[Tuple[str, str]] = None
+        self._readerThread = LogcatReaderThread(
+            AdbClient(config.host, config.port),
+            config.device,
+            config.pids,
+            binaryFormat=config.binaryFormat,
+            package=config.package,
+            deviceFiltering=config.deviceFiltering,
+            queueMaxLines=config.queueMaxLines,
+            queuePolicy=config.queuePolicy,
+            buffers=config.buffers,
+            cachedDeviceState=False,
+        )
+
+        #
+        # There's no event loop in this process,
+        # so the slots are called from the reader thread
+        #
+
+        self._readerThread.dataAvailable.connect(
+            self._dataAvailable.set,
+            Qt.DirectConnection,
+        )
+        self._readerThread.failed.connect(
+            self._readerFailed,
+            Qt.DirectConnection,
+        )
+
+    def _readerFailed(self, msgBrief: str, msgVerbose: str):
+        self._failure = (msgBrief, msgVerbose)
+
+    def _checkControl(self):
+        with suppress(EOFError, OSError):
+            if not self._control.poll():
+                return
+
+            if self._control.recv() != MSG_STOP:
+                return
+
+        self._stopped = True
+        self._readerThread.stop()
+
+    def _putFrame(self, frame: bytes):
+        while not self._ring.put(frame):
+            self._checkControl()
+            if self._stopped:
+                return False
+
+            time.sleep(RING_FULL_WAIT_SEC)
+
+        return True
+
+    def _transferQueued(self):
+        transferred = False
+        while not self._stopped:
+            items, hasMore = self._readerThread.takeQueued(TRANSFER_MAX_LINES)
+            if items:
+                if not self._putFrame(_encodeItems(items)):
+                    break
+
+                transferred = True
+
+            if not hasMore:
+                break
+
+        if transferred:
+            stats = self._readerThread.stats()
+            self._sender.send((MSG_DATA, stats, self._readerThread.pids()))
+
+    def run(self):
+        self._readerThread.start()
+        self._sender.send((MSG_READY,))
+
+        while not self._stopped and not self._readerThread.isFinished():
+            self._dataAvailable.wait(CONTROL_POLL_SEC)
+            self._dataAvailable.clear()
+            self._transferQueued()
+            self._checkControl()
+
+        self._readerThread.stop()
+        self._readerThread.wait()
+        self._transferQueued()
+
+        if self._failure is not None and not self._stopped:
+            self._sender.send((MSG_FAILED, *self._failure))
+
+
+def readerProcessMain(
+    config: ReaderProcessConfig,
+    ringName: str,
+    ringLock: Lock,
+    notifications: Connection,
+    control: Connection,
+):
+    #
+    # Entry point of the reader process. Only the reader is imported,
+    # the GUI isn't. The device state is checked without the device
+    # state cache, so no adb event loop is started in this process
+    #
+
+    sender = _PipeSender(notifications)
+    rootLogger = logging.getLogger()
+    rootLogger.handlers = [QueueHandler(sender)]
+    rootLogger.setLevel(logging.DEBUG)
+
+    ring = SharedMemoryRing.attach(ringName, ringLock)
+    try:
+        _ReaderProcess(config, ring, sender, control).run()
+    finally:
+        ring.close()
+        notifications.close()
+
+
+class _NotificationListener(QThread):
+    #
+    # Waits for notifications of the reader process in the GUI process.
+    # Finishes when the reader process exits
+    #
+
+    received = pyqtSignal(tuple)
+
+    def __init__(self, conn: Connection) -> None:
+        super().__init__()
+        self._conn = conn
+
+    def run(self):
+        while True:
+            try:
+                message = self._conn.recv()
+            except (EOFError, OSError):
+                break
+
+            if message[0] == MSG_LOG:
+                self._handleLogRecord(message[1])
+            else:
+                self.received.emit(message)
+
+        self._conn.close()
+
+    def _handleLogRecord(self, record: logging.LogRecord):
+        logger = logging.getLogger(record.name)
+        if logger.isEnabledFor(record.levelno):
+            logger.handle(record)
+
+
+class LogReaderProcess(QObject):
+    #
+    # Same interface, as LogcatReaderThread has,
+    # but the reading is done by a child process
+    #
+
+    failed = pyqtSignal(str, str)
+    dataAvailable = pyqtSignal()
+
+    _ring: Optional[SharedMemoryRing]
+    _process: Optional[multiprocessing.Process]
+
+    def __init__(
+        self,
+        client: AdbClient,
+        device: str,
+        pids: Optional[List[str]] = None,
+        binaryFormat: bool = False,
+        package: Optional[str] = None,
+        deviceFiltering: bool = False,
+        queueMaxLines: int = QUEUE_MAX_LINES,
+        queuePolicy: QueuePolicy = QueuePolicy.Block,
+        buffers: Optional[List[LogBuffer]] = None,
+        ringSize: int = READER_RING_SIZE,
+    ) -> None:
+        super().__init__()
+        self._config = ReaderProcessConfig(
+            host=client.host,
+            port=client.port,
+            device=device,
+            pids=pids,
+            binaryFormat=binaryFormat,
+            package=package,
+            deviceFiltering=deviceFiltering,
+            queueMaxLines=queueMaxLines,
+            queuePolicy=queuePolicy,
+            buffers=buffers,
+        )
+        self._ringSize = ringSize
+        self._ring = None
+        self._ringUnlinked = False
+        self._process = None
+        self._stopRequested = False
+        self._failureReported = False
+        self._listener: Optional[_NotificationListener] = None
+        self._control: Optional[Connection] = None
+        self._pids = list(pids) if pids is not None else []
+        self._stats = LogReaderStats(0, 0.0, 0, 0, 0, 0, 0, 0, 0.0, 0.0, 0)
+        self._logger = logging.getLogger(self.__class__.__name__)
+
+    def _unlinkRing(self):
+        if self._ring is not None and not self._ringUnlinked:
+            with suppress(FileNotFoundError):
+                self._ring.unlink()
+
+            self._ringUnlinked = True
+
+    def _messageReceived(self, message: tuple):
+        kind = message[0]
+        if kind == MSG_READY:
+            #
+            # Both processes have the memory mapped now. Unlinking it
+            # early guarantees nothing is left behind, however they exit
+            #
+
+            self._unlinkRing()
+        elif kind == MSG_DATA:
+            _, self._stats, self._pids = message
+            self.dataAvailable.emit()
+        elif kind == MSG_FAILED:
+            _, msgBrief, msgVerbose = message
+            self._failureReported = True
+            self.failed.emit(msgBrief, msgVerbose)
+
+    def _readerProcessExited(self):
+        self._unlinkRing()
+        if self._stopRequested or self._failureReported:
+            return
+
+        self._process.join(PROCESS_EXIT_WAIT_SEC)
+        exitCode = self._process.exitcode
+        self._logger.error("Reader process exited unexpectedly, code %s", exitCode)
+        self.failed.emit(
+            "Log reader error",
+            f"Reader process exited unexpectedly (exit code {exitCode})",
+        )
+
+    def start(self):
+        #
+        # 'spawn' is used on every platform. A forked copy
+        # of the GUI process would inherit its threads and display connection
+        #
+
+        context = multiprocessing.get_context("spawn")
+        ringLock = context.Lock()
+        self._ring = SharedMemoryRing.create(self._ringSize, ringLock)
+        notifyReader, notifyWriter = context.Pipe(duplex=False)
+        controlReader, controlWriter = context.Pipe(duplex=False)
+
+        self._process = context.Process(
+            target=readerProcessMain,
+            args=(
+                self._config,
+                self._ring.name(),
+                ringLock,
+                notifyWriter,
+                controlReader,
+            ),
+            name="LogReaderProcess",
+            daemon=True,
+        )
+
+        self._process.start()
+        notifyWriter.close()
+        controlReader.close()
+        self._control = controlWriter
+        self._logger.info("Reader process started, pid %d", self._process.pid)
+
+        self._listener = _NotificationListener(notifyReader)
+        self._listener.received.connect(
+            self._messageReceived,
+            Qt.DirectConnection,
+        )
+        self._listener.finished.connect(
+            self._readerProcessExited,
+            Qt.DirectConnection,
+        )
+        self._listener.start()
+
+    def stop(self):
+        self._stopRequested = True
+        if self._control is not None:
+            with suppress(OSError):
+                self._control.send(MSG_STOP)
+
+    def wait(self):
+        if self._process is not None:
+            self._process.join()
+
+        if self._listener is not None:
+            self._listener.wait()
+
+        if self._control is not None:
+            self._control.close()
+            self._control = None
+
+        if self._ring is not None:
+            self._unlinkRing()
+            self._ring.close()
+            self._ring = None
+
+    def isRunning(self):
+        return self._process is not None and self._process.is_alive()
+
+    def pids(self):
+        return list(self._pids)
+
+    def stats(self):
+        return self._stats
+
+    def takeQueued(self, maxLines: int):
+        if self._ring is None:
+            return [], False
+
+        items = []
+        while len(items) < maxLines:
+            frame = self._ring.take()
+            if frame is None:
+                break
+
+            items.extend(_decodeItems(frame))
+
+        return items, not self._ring.isEmpty()
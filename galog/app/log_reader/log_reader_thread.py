@@ -1,71 +1,216 @@
+import logging
 import re
+import select
+import socket
+import time
 from contextlib import suppress
-from typing import Tuple
+from enum import Enum, auto
+from typing import Dict, List, Optional, Set, Tuple
 
-from ppadb.connection import Connection
-from PyQt5.QtCore import QThread, pyqtSignal
+from PyQt5.QtCore import QMutex, QMutexLocker, QThread, pyqtSignal
 
 from galog.app.device import AdbClient, deviceRestricted
 from galog.app.device.device import AdbDevice
 from galog.app.device.errors import DeviceError
+from galog.app.settings.models import LogBuffer, QueuePolicy, defaultLogBuffers
 
 from .event import Event
-from .models import LogLine, ProcessEndedEvent, ProcessStartedEvent
-
-IDLE_INTERVAL_MS = 100
-RECV_CHUNK_SIZE = 4096
-LOGCAT_CMD = "logcat -v brief -T 1"
+from .event_log_reader import (
+    EVENT_LOG_TAGS_PATH,
+    EventLogReader,
+    EventLogTag,
+    ProcessLogEvent,
+    processEventLogTags,
+)
+from .ingestion_queue import IngestionQueue
+from .log_entry_reader import LogEntryFormatError, LogEntryReader
+from .log_line_reader import LogFormat, LogLineReader
+from .logcat_stream import LogcatStream, LogcatStreamClosed, LogReader
+from .models import (
+    AppEndedEvent,
+    AppStartedEvent,
+    ConnectionLostEvent,
+    ConnectionRestoredEvent,
+    LogLine,
+    LogReaderStats,
+    ProcessEndedEvent,
+    ProcessStartedEvent,
+    QueueEvent,
+)
+from .recv_buffer import AdaptiveRecvBuffer
+from .stream_merger import StreamMerger
+from .stream_resume import StreamResumeState
+
+#
+# Every selected log buffer is read through its own stream,
+# so a chatty buffer doesn't delay the lines of the others.
+# Lines of all the streams are merged by timestamp
+#
+
+LOGCAT_CMD = "logcat -b {} {} -T {}"
+LOGCAT_FORMAT_BINARY = "-B"
+LOGCAT_FORMAT_TEXT = {
+    LogFormat.ThreadTime: "-v threadtime",
+    LogFormat.Epoch: "-v threadtime -v epoch",
+}
+
+#
+# Process start/end messages of ActivityManager go to the system buffer.
+# While the main streams are filtered on the device side, or the system
+# buffer is not read, they come through this side channel.
+#
+# It uses the same text format as the main streams, since older devices
+# don't know the 'epoch' modifier and logcat exits on it.
+#
+# With the binary format the side channel reads the events buffer instead.
+# Its am_proc_start, am_proc_died and am_kill events are decoded
+# without any regexes, and lines of the main streams are not checked at all
+#
+
+LOGCAT_CMD_PROCESS_EVENTS = "logcat -b system {} -T {} -s ActivityManager"
+LOGCAT_CMD_EVENT_LOG = "logcat -b events -B -T {}"
+
+#
+# 'shell:' service may run logcat on a PTY, which turns '\n' into '\r\n'
+# and breaks binary output. 'exec:' service (Android 5.0+) runs it
+# without PTY, giving a clean byte stream
+#
+
+SERVICE_SHELL = "shell"
+SERVICE_EXEC = "exec"
+
+#
+# Format modifiers, like 'epoch', and '--pid' appeared in Android 7.0,
+# '--uid' appeared in Android 10. Older devices get 'threadtime',
+# which has no year in timestamps, and are filtered on our side
+#
+
+PROP_SDK_VERSION = "ro.build.version.sdk"
+EXEC_SERVICE_MIN_SDK = 21
+EPOCH_FORMAT_MIN_SDK = 24
+PID_FILTER_MIN_SDK = 24
+UID_FILTER_MIN_SDK = 29
+
+PACKAGE_UID = re.compile(r"^package:(\S+) uid:([\d,]+)\r?$", re.MULTILINE)
+
+
+class DeviceFilter(int, Enum):
+    Disabled = 0
+    ByPid = auto()
+    ByUid = auto()
+
+
+#
+# Parsed lines are delivered to the consumer in batches.
+# A batch is sent when it's full, or when its oldest line
+# has been waiting for longer than the batch window
+#
+
+BATCH_MAX_LINES = 4096
+BATCH_WINDOW_SEC = 0.016
+QUEUE_MAX_LINES = 200000
+
+#
+# A readable stream is read for at most this many chunks in a row,
+# then the other streams get their turn
+#
+
+DRAIN_MAX_CHUNKS = 8
+
+#
+# If the connection breaks after the capture has started, the reader
+# reconnects with exponential backoff. Overall it waits for about 30 sec
+# before giving up, which covers typical USB replugs and adb restarts
+#
+
+RECONNECT_DELAY_MIN_SEC = 0.25
+RECONNECT_DELAY_MAX_SEC = 8.0
+RECONNECT_MAX_ATTEMPTS = 8
+
+#
+# Lines with these tags are never filtered out by pid,
+# because process start/end events are parsed from them
+#
+
+PROCESS_EVENT_TAGS = frozenset([b"ActivityManager", b"dalvikvm"])
+PROCESS_EVENT_TAG_NAMES = frozenset(tag.decode() for tag in PROCESS_EVENT_TAGS)
+
+#
+# Cheap gate for process start/end detection. The regexes below run
+# only for lines having one of the tags above and one of these prefixes
+#
+
+PROCESS_START_PREFIXES = ("Start proc ", ">>>>> ")
+PROCESS_END_PREFIXES = ("Killing ", "No longer want ", "Process ")
 
 # fmt: off
-LOG_LINE = re.compile(r"^([A-Z])/(.+)\( *(\d+)\): (.*)$")
 PID_START = re.compile(r"^Start proc ([a-zA-Z0-9._:]+) for ([a-z]+ [^:]+): pid=(\d+) uid=\d+ gids=.*$")
 PID_START_5_1 = re.compile(r"^Start proc (\d+):([a-zA-Z0-9._:]+)/[a-z0-9]+ for (.*)$")
-PID_START_DALVIK = re.compile(r"^E/dalvikvm\(\s*(\d+)\): >>>>> ([a-zA-Z0-9._:]+) \[ userId:0 \| appId:\d+ \]$")
+PID_START_DALVIK = re.compile(r"^>>>>> ([a-zA-Z0-9._:]+) \[ userId:0 \| appId:\d+ \]$")
 PID_KILL = re.compile(r"^Killing (\d+):([a-zA-Z0-9._:]+)/[^:]+: (.*)$")
 PID_LEAVE = re.compile(r"^No longer want ([a-zA-Z0-9._:]+) \(pid (\d+)\): .*$")
 PID_DEATH = re.compile(r"^Process ([a-zA-Z0-9._:]+) \(pid (\d+)\) has died.?$")
 # fmt: on
 
 
-class LogLineReader:
-    _buf: bytes
-
-    def __init__(self) -> None:
-        self._buf = bytes()
-
-    def addDataChunk(self, chunk: bytes):
-        self._buf += chunk
-
-    def readParsedLines(self):
-        lines = self._buf.split(b"\n")
-        self._buf = lines.pop()
-
-        for line in lines:
-            decodedLine = line.decode("utf-8", errors="replace")
-            match: re.Match = LOG_LINE.match(decodedLine)
-            if not match:
-                continue
-
-            groups: Tuple[str] = match.groups()
-            yield LogLine(
-                level=groups[0],
-                tag=groups[1].strip(),
-                pid=groups[2].strip(),
-                msg=groups[3],
-            )
-
-
 class LogcatReaderThread(QThread):
     failed = pyqtSignal(str, str)
-    lineRead = pyqtSignal(LogLine)
-    processStarted = pyqtSignal(ProcessStartedEvent)
-    processEnded = pyqtSignal(ProcessEndedEvent)
-
-    def __init__(self, client: AdbClient, device: str) -> None:
+    dataAvailable = pyqtSignal()
+
+    def __init__(
+        self,
+        client: AdbClient,
+        device: str,
+        pids: Optional[List[str]] = None,
+        binaryFormat: bool = False,
+        package: Optional[str] = None,
+        deviceFiltering: bool = False,
+        queueMaxLines: int = QUEUE_MAX_LINES,
+        queuePolicy: QueuePolicy = QueuePolicy.Block,
+        buffers: Optional[List[LogBuffer]] = None,
+        cachedDeviceState: bool = True,
+    ) -> None:
         super().__init__()
         self._client = client
+        self._cachedDeviceState = cachedDeviceState
         self._deviceName = device
+        self._packageName = package
+        self._binaryFormat = binaryFormat
+        self._deviceFiltering = deviceFiltering
+        self._deviceFilter = DeviceFilter.Disabled
+        self._logFormat = LogFormat.ThreadTime
+        self._service = SERVICE_SHELL
+        self._sdkVersion = 0
+        self._uids = ""
+        self._pids = None if pids is None else {pid.encode() for pid in pids}
+        self._pidsMutex = QMutex()
+        self._streamPids: Set[bytes] = set()
+        self._buffers = buffers or defaultLogBuffers()
+        self._mainStreams: Dict[LogBuffer, LogcatStream] = {}
+        self._eventStream: Optional[LogcatStream] = None
+        self._mainStreamSince: Optional[int] = None
+        self._mainStreamFilterArgs = ""
+        self._pidResumeStates: Dict[Tuple[LogBuffer, str], StreamResumeState] = {}
+        self._mainResumeStates = {b: StreamResumeState() for b in self._buffers}
+        self._eventResumeState = StreamResumeState()
+        self._eventLogTags: Dict[int, EventLogTag] = {}
+        self._merger = StreamMerger()
+        self._connected = False
+        self._reconnectAttempt = 0
+        self._disconnectedAt = 0.0
+        self._reconnectCount = 0
+        self._reconnectLatency = 0.0
+        self._resumeGap = 0.0
         self._stopEvent = Event()
+        self._wakeupReader: Optional[socket.socket] = None
+        self._wakeupWriter: Optional[socket.socket] = None
+        self._recvBuffer = AdaptiveRecvBuffer()
+        self._queue = IngestionQueue(queueMaxLines, queuePolicy)
+        self._pendingLines: List[LogLine] = []
+        self._batchDeadline = 0.0
+        self._linesChecked = 0
+        self._slowPathLines = 0
+        self._logger = logging.getLogger(self.__class__.__name__)
 
     def _parseProcessStart(self, line: LogLine):
         match: re.Match = PID_START_5_1.match(line.msg)
@@ -84,11 +229,14 @@ class LogcatReaderThread(QThread):
                 target=match.group(2),
             )
 
+        if line.tag != "dalvikvm":
+            return None
+
         match: re.Match = PID_START_DALVIK.match(line.msg)
         if match is not None:
             return ProcessStartedEvent(
-                processId=match.group(1),
-                packageName=match.group(2),
+                processId=line.pid,
+                packageName=match.group(1),
                 target=None,
             )
 
@@ -121,49 +269,729 @@ class LogcatReaderThread(QThread):
 
         return None
 
-    def _processLine(self, line: LogLine):
-        processStart = self._parseProcessStart(line)
-        if processStart is not None:
-            self.processStarted.emit(processStart)
+    def _isTargetProcess(self, packageName: str):
+        return self._packageName is None or packageName == self._packageName
+
+    def _isTargetLine(self, line: LogLine):
+        #
+        # Lines with process event tags get through the reader's pid filter.
+        # Only those logged by the app itself are delivered to the consumer
+        #
+
+        if self._pids is None or line.tag not in PROCESS_EVENT_TAG_NAMES:
+            return True
+
+        return line.pid.encode() in self._pids
+
+    def _trackProcessStart(self, event: ProcessStartedEvent):
+        #
+        # The pid set is updated in place, since the log reader filters
+        # lines by it. The mutex guards it against concurrent pids() calls
+        #
+
+        if self._pids is None:
             return
 
+        with QMutexLocker(self._pidsMutex):
+            appStarted = not self._pids
+            self._pids.add(event.processId.encode())
+
+        self._streamPids.add(event.processId.encode())
+
+        if appStarted and self._packageName is not None:
+            self._putEvent(AppStartedEvent(event.packageName))
+
+    def _trackProcessEnd(self, event: ProcessEndedEvent):
+        if self._pids is None:
+            return
+
+        with QMutexLocker(self._pidsMutex):
+            pid = event.processId.encode()
+            appEnded = pid in self._pids and len(self._pids) == 1
+            self._pids.discard(pid)
+
+        if appEnded and self._packageName is not None:
+            self._putEvent(AppEndedEvent(event.packageName))
+
+    def _flushPendingLines(self):
+        #
+        # With the blocking queue policy this call waits until
+        # the consumer catches up, so the socket is not read meanwhile
+        #
+
+        if self._pendingLines:
+            if self._queue.putLines(self._pendingLines):
+                self.dataAvailable.emit()
+
+            self._pendingLines = []
+
+    def _putEvent(self, event: QueueEvent):
+        #
+        # Pending lines are flushed before events
+        # to deliver everything in the order it was logged
+        #
+
+        self._flushPendingLines()
+        if self._queue.putEvent(event):
+            self.dataAvailable.emit()
+
+    def _flushPendingLinesIfDue(self):
+        if self._pendingLines and time.monotonic() >= self._batchDeadline:
+            self._flushPendingLines()
+
+    def _addPendingLine(self, line: LogLine):
+        if not self._pendingLines:
+            self._batchDeadline = time.monotonic() + BATCH_WINDOW_SEC
+
+        self._pendingLines.append(line)
+        if len(self._pendingLines) >= BATCH_MAX_LINES:
+            self._flushPendingLines()
+
+    def _processEventLine(self, line: LogLine):
+        #
+        # Returns False if the line is not a process event
+        #
+
+        self._linesChecked += 1
+        if line.tag not in PROCESS_EVENT_TAG_NAMES:
+            return False
+
+        if line.msg.startswith(PROCESS_START_PREFIXES):
+            return self._processStartLine(line)
+
+        if line.msg.startswith(PROCESS_END_PREFIXES):
+            return self._processEndLine(line)
+
+        return False
+
+    def _processStarted(self, event: ProcessStartedEvent, timestamp: int):
+        if self._isTargetProcess(event.packageName):
+            self._trackProcessStart(event)
+            self._putEvent(event)
+            self._scheduleMainStreamRestart(timestamp)
+
+    def _processEnded(self, event: ProcessEndedEvent, timestamp: int):
+        if self._isTargetProcess(event.packageName):
+            self._putEvent(event)
+            self._trackProcessEnd(event)
+            self._scheduleMainStreamRestart(timestamp)
+
+    def _processStartLine(self, line: LogLine):
+        self._slowPathLines += 1
+        processStart = self._parseProcessStart(line)
+        if processStart is None:
+            return False
+
+        self._processStarted(processStart, line.timestamp)
+        return True
+
+    def _processEndLine(self, line: LogLine):
+        self._slowPathLines += 1
         processEnd = self._parseProcessEnd(line)
-        if processEnd is not None:
-            self.processEnded.emit(processEnd)
+        if processEnd is None:
+            return False
+
+        self._processEnded(processEnd, line.timestamp)
+        return True
+
+    def _processLogEvents(self, stream: LogcatStream, events: List[ProcessLogEvent]):
+        for logEvent in events:
+            self._linesChecked += 1
+            if isinstance(logEvent.event, ProcessStartedEvent):
+                self._processStarted(logEvent.event, logEvent.timestamp)
+            else:
+                self._processEnded(logEvent.event, logEvent.timestamp)
+
+    def _processLine(self, line: LogLine):
+        if self._processEventLine(line):
             return
 
-        self.lineRead.emit(line)
+        if self._isTargetLine(line):
+            self._addPendingLine(line)
 
-    def _liveLogRead(self, device: AdbDevice):
-        reader = LogLineReader()
-        conn: Connection = device.create_connection()
-        conn.send("shell:{}".format(LOGCAT_CMD))
-        conn.socket.setblocking(False)
-
-        while True:
-            with suppress(BlockingIOError):
-                data = conn.read(RECV_CHUNK_SIZE)
-                if not data:
-                    msgBrief = "Connection error"
-                    msgVerbose = "Failed to read data"
-                    self.failed.emit(msgBrief, msgVerbose)
-                    break
+    def _pidResumeState(self, buffer: LogBuffer, pid: str):
+        key = (buffer, pid)
+        resumeState = self._pidResumeStates.get(key)
+        if resumeState is None:
+            resumeState = self._pidResumeStates[key] = StreamResumeState()
+
+        return resumeState
+
+    def _isNewLine(self, buffer: LogBuffer, line: LogLine):
+        #
+        # After the '--pid' streams are restarted, lines of the already
+        # known processes are repeated since the time of the process event.
+        # They are skipped like the lines, repeated after a reconnect,
+        # but per process, as the lines of each one are requested again
+        #
+
+        return self._pidResumeState(buffer, line.pid).accept(line)
 
-                reader.addDataChunk(data)
-                for line in reader.readParsedLines():
-                    self._processLine(line)
+    def _mergeLines(self, stream: LogcatStream, lines: List[LogLine]):
+        buffer = stream.buffer()
+        if self._deviceFilter == DeviceFilter.ByPid:
+            lines = [line for line in lines if self._isNewLine(buffer, line)]
 
-            self._stopEvent.wait(IDLE_INTERVAL_MS)
+        self._merger.push(buffer, lines, time.monotonic())
+
+    def _processEventLines(self, stream: LogcatStream, lines: List[LogLine]):
+        for line in lines:
+            self._processEventLine(line)
+
+    def _checksMainLines(self):
+        #
+        # While process events come through the side channel,
+        # lines of the main streams need no checks. The text one
+        # may miss 'dalvikvm' lines of old devices, which go to the main buffer
+        #
+
+        return self._deviceFilter == DeviceFilter.Disabled and not self._binaryFormat
+
+    def _processMergedLines(self, lines: List[LogLine]):
+        if not self._checksMainLines():
+            for line in lines:
+                self._addPendingLine(line)
+        else:
+            for line in lines:
+                self._processLine(line)
+
+    def _releaseMergedLines(self):
+        self._processMergedLines(self._merger.release(time.monotonic()))
+
+    def _releaseAllMergedLines(self):
+        self._processMergedLines(self._merger.releaseAll())
+
+    def _linesSink(self, stream: LogcatStream):
+        if stream is not self._eventStream:
+            return self._mergeLines
+        elif self._binaryFormat:
+            return self._processLogEvents
+        else:
+            return self._processEventLines
+
+    def _activeStreams(self):
+        streams = list(self._mainStreams.values())
+        if self._eventStream is not None:
+            streams.insert(0, self._eventStream)
+
+        return streams
+
+    def _waitReadable(self) -> List[LogcatStream]:
+        #
+        # Block until either logcat data arrives or stop() is called.
+        # The wakeup socket lets stop() interrupt select() immediately.
+        # If some lines are pending or wait for merging, wake up in time
+        # to process them. The side channel goes first, so a process
+        # is usually known by the time its lines are read from the main streams
+        #
+
+        now = time.monotonic()
+        deadlines = [self._merger.nextDeadline(now)]
+        if self._pendingLines:
+            deadlines.append(self._batchDeadline)
+
+        timeout = None
+        deadlines = [d for d in deadlines if d is not None]
+        if deadlines:
+            timeout = max(0.0, min(deadlines) - now)
+
+        streams = self._activeStreams()
+        rlist = [stream.socket() for stream in streams]
+        rlist.append(self._wakeupReader)
+        try:
+            readable, _, _ = select.select(rlist, [], [], timeout)
+        except OSError as e:
+            raise LogcatStreamClosed(str(e))
+
+        result = []
+        for stream in streams:
+            if stream.socket() in readable:
+                result.append(stream)
+            else:
+                self._streamCaughtUp(stream)
+
+        return result
+
+    def _streamCaughtUp(self, stream: LogcatStream):
+        if stream.buffer() is not None:
+            self._merger.setCaughtUp(stream.buffer(), time.monotonic())
+
+    def _recvChunk(self, stream: LogcatStream):
+        sizeBefore = self._recvBuffer.size()
+        data = stream.recv(self._recvBuffer)
+        sizeAfter = self._recvBuffer.size()
+        if sizeBefore != sizeAfter:
+            self._logger.debug(
+                "Receive buffer resized: %d -> %d", sizeBefore, sizeAfter
+            )
+
+        return data
+
+    def _drainStream(self, stream: LogcatStream):
+        #
+        # Read what the socket has queued, until it would block
+        # or the chunk limit is reached. Returns False
+        # if the connection was closed by the peer
+        #
+
+        sink = self._linesSink(stream)
+        accept = stream.resumeState().accept
+        for _ in range(DRAIN_MAX_CHUNKS):
             if self._stopEvent.isSet():
                 break
 
-    def run(self):
+            try:
+                data = self._recvChunk(stream)
+            except BlockingIOError:
+                self._streamCaughtUp(stream)
+                break
+
+            if not data:
+                return False
+
+            stream.addDataChunk(data)
+            sink(stream, [line for line in stream.readParsedLines() if accept(line)])
+            self._flushPendingLinesIfDue()
+
+        return True
+
+    def _detectSdkVersion(self, device: AdbDevice):
         try:
-            with deviceRestricted(self._deviceName, self._client) as device:
-                self._liveLogRead(device)
+            output = device.shell(f"getprop {PROP_SDK_VERSION}")
+            self._sdkVersion = int(output)
+        except ValueError:
+            self._sdkVersion = 0
+
+    def _detectService(self):
+        if self._sdkVersion >= EXEC_SERVICE_MIN_SDK:
+            self._service = SERVICE_EXEC
+        else:
+            self._service = SERVICE_SHELL
+
+        if self._binaryFormat and self._service == SERVICE_SHELL:
+            self._logger.info("Binary format needs 'exec:' service, using text")
+            self._binaryFormat = False
+
+        self._logger.info("Logcat service: %s", self._service)
+
+    def _detectLogFormat(self):
+        if self._sdkVersion >= EPOCH_FORMAT_MIN_SDK:
+            self._logFormat = LogFormat.Epoch
+        else:
+            self._logFormat = LogFormat.ThreadTime
+
+        self._logger.info("Text log format: %s", self._logFormat.value)
+
+    def _packageUids(self, device: AdbDevice):
+        output = device.shell(f"pm list packages -U {self._packageName}")
+        for match in PACKAGE_UID.finditer(output):
+            if match.group(1) == self._packageName:
+                return match.group(2)
+
+        return ""
+
+    def _readEventLogTags(self, device: AdbDevice):
+        #
+        # The tag map gives the numbers of process events. It's read
+        # once per capture, since it doesn't change until the device reboots
+        #
+
+        if not self._binaryFormat or self._eventLogTags:
+            return
 
-        except DeviceError as e:
-            self.failed.emit(e.msgBrief, e.msgVerbose)
+        output = device.shell(f"cat {EVENT_LOG_TAGS_PATH}")
+        self._eventLogTags = processEventLogTags(output)
+        self._logger.info("Event log tags: %d known", len(self._eventLogTags))
+
+    def _detectDeviceFilter(self, device: AdbDevice):
+        self._deviceFilter = DeviceFilter.Disabled
+        if not self._deviceFiltering or self._packageName is None:
+            return
+
+        if self._pids is None:
+            return
+
+        if self._sdkVersion >= UID_FILTER_MIN_SDK:
+            self._uids = self._packageUids(device)
+            if self._uids:
+                self._deviceFilter = DeviceFilter.ByUid
+
+        if self._deviceFilter == DeviceFilter.Disabled:
+            if self._sdkVersion >= PID_FILTER_MIN_SDK:
+                self._deviceFilter = DeviceFilter.ByPid
+
+        self._logger.info("Device side filter: %s", self._deviceFilter.name)
+
+    def _mainStreamFilter(self):
+        if self._deviceFilter == DeviceFilter.ByUid:
+            return f"--uid={self._uids}"
+
+        if self._deviceFilter == DeviceFilter.ByPid:
+            #
+            # Only a single pid may be passed to logcat.
+            # Other processes of the app are filtered on our side
+            #
+
+            assert self._pids is not None
+            if len(self._pids) == 1:
+                return "--pid={}".format(next(iter(self._pids)).decode())
+
+        return ""
+
+    def _isBinaryBuffer(self, buffer: LogBuffer):
+        #
+        # Entries of the events buffer are binary encoded.
+        # The binary reader skips them, so they are read as text
+        #
+
+        return self._binaryFormat and buffer != LogBuffer.Events
+
+    def _mainStreamCommand(self, buffer: LogBuffer, since: str):
+        if self._deviceFilter == DeviceFilter.ByPid and not self._pids:
+            return None
+
+        if self._isBinaryBuffer(buffer):
+            formatArgs = LOGCAT_FORMAT_BINARY
+        else:
+            formatArgs = LOGCAT_FORMAT_TEXT[self._logFormat]
+
+        command = LOGCAT_CMD.format(buffer.value, formatArgs, since)
+        filterArgs = self._mainStreamFilter()
+        if filterArgs:
+            command = f"{command} {filterArgs}"
+
+        return command
+
+    def _logReader(self, buffer: LogBuffer) -> LogReader:
+        if self._isBinaryBuffer(buffer):
+            reader = LogEntryReader()
+        else:
+            stripCarriageReturns = self._service == SERVICE_SHELL
+            reader = LogLineReader(self._logFormat, stripCarriageReturns)
+
+        if self._deviceFilter == DeviceFilter.Disabled:
+            tags = PROCESS_EVENT_TAGS if self._checksMainLines() else frozenset()
+            reader.setLineFilter(self._pids, tags)
+        elif self._deviceFilter == DeviceFilter.ByPid:
+            reader.setLineFilter(self._streamPids, frozenset())
+
+        return reader
+
+    def _openMainStream(self, device: AdbDevice, buffer: LogBuffer, since: str):
+        command = self._mainStreamCommand(buffer, since)
+        if command is None:
+            return
+
+        reader = self._logReader(buffer)
+        resumeState = self._mainResumeStates[buffer]
+        stream = LogcatStream(self._service, command, reader, resumeState, buffer)
+        stream.open(device)
+        self._mainStreams[buffer] = stream
+        self._merger.addStream(buffer)
+
+    def _openMainStreams(self, device: AdbDevice, since: Dict[LogBuffer, str]):
+        #
+        # '--pid' streams keep the lines of the ended processes
+        # until they are restarted, so their last lines are not lost
+        #
+
+        self._streamPids = set(self._pids or ())
+        for buffer in self._buffers:
+            self._openMainStream(device, buffer, since[buffer])
+
+        self._mainStreamFilterArgs = self._mainStreamFilter()
+
+    def _closeMainStreams(self):
+        for buffer, stream in self._mainStreams.items():
+            self._merger.removeStream(buffer)
+            stream.close()
+
+        self._mainStreams = {}
+
+    def _needsEventStream(self):
+        if self._deviceFilter != DeviceFilter.Disabled or self._binaryFormat:
+            return True
+
+        return LogBuffer.System not in self._buffers
+
+    def _openEventStream(self, device: AdbDevice, since: str):
+        if self._binaryFormat:
+            reader = EventLogReader(self._eventLogTags)
+            command = LOGCAT_CMD_EVENT_LOG.format(since)
+        else:
+            stripCarriageReturns = self._service == SERVICE_SHELL
+            reader = LogLineReader(self._logFormat, stripCarriageReturns)
+            formatArgs = LOGCAT_FORMAT_TEXT[self._logFormat]
+            command = LOGCAT_CMD_PROCESS_EVENTS.format(formatArgs, since)
+
+        resumeState = self._eventResumeState
+        self._eventStream = LogcatStream(self._service, command, reader, resumeState)
+        self._eventStream.open(device)
+
+    def _closeStreams(self):
+        self._closeMainStreams()
+        if self._eventStream is not None:
+            self._eventStream.close()
+            self._eventStream = None
+
+    def _scheduleMainStreamRestart(self, timestamp: int):
+        #
+        # '--pid' streams have to be restarted when the set of app
+        # processes changes. Logs are requested since the time of the event,
+        # so the lines logged while restarting are not lost
+        #
+
+        if self._deviceFilter != DeviceFilter.ByPid:
+            return
+
+        if self._mainStreamSince is None or timestamp < self._mainStreamSince:
+            self._mainStreamSince = timestamp
+
+    def _mainStreamRestartSince(self, buffer: LogBuffer, timestamp: int):
+        #
+        # The old stream may lag behind the event. Its unread lines are
+        # requested again, the repeated ones are skipped by pid resume states
+        #
+
+        lastTimestamp = self._mainResumeStates[buffer].timestamp()
+        if buffer in self._mainStreams and lastTimestamp != 0:
+            timestamp = min(timestamp, lastTimestamp)
+
+        seconds, nanoseconds = divmod(timestamp, 1_000_000_000)
+        return "{}.{:03d}".format(seconds, nanoseconds // 1_000_000)
+
+    def _drainMainStreams(self):
+        #
+        # Keep the lines already received by the old streams. If a stream
+        # is closed by the peer, it's replaced anyway
+        #
+
+        for stream in self._mainStreams.values():
+            self._drainStream(stream)
+
+    def _restartMainStreamsIfScheduled(self, device: AdbDevice):
+        if self._mainStreamSince is None:
+            return
+
+        timestamp = self._mainStreamSince
+        self._mainStreamSince = None
+        if self._mainStreams:
+            #
+            # When the last process ends, the old streams are kept.
+            # They still have to deliver its last lines, like a crash trace
+            #
+
+            if not self._pids:
+                return
+
+            if self._mainStreamFilterArgs == self._mainStreamFilter():
+                return
+
+        self._drainMainStreams()
+        since = {b: self._mainStreamRestartSince(b, timestamp) for b in self._buffers}
+        self._closeMainStreams()
+
+        for resumeState in self._pidResumeStates.values():
+            resumeState.startOverlap()
+
+        self._logger.info("Restarting main streams since %s", min(since.values()))
+        self._openMainStreams(device, since)
+
+    def _openStreams(self, device: AdbDevice):
+        #
+        # After a reconnect, streams are resumed from the last line read.
+        # The repeated lines are skipped by their resume states
+        #
+
+        mainSince = dict.fromkeys(self._buffers, "1")
+        eventSince = "1"
+        if self._connected:
+            for buffer, resumeState in self._mainResumeStates.items():
+                resumeState.startOverlap()
+                mainSince[buffer] = resumeState.since(self._logFormat)
+
+            self._eventResumeState.startOverlap()
+            eventSince = self._eventResumeState.since(self._logFormat)
+
+        if self._needsEventStream():
+            self._openEventStream(device, eventSince)
+
+        self._openMainStreams(device, mainSince)
+
+    def _liveLogReadImpl(self, device: AdbDevice):
+        try:
+            self._openStreams(device)
+            self._connectionEstablished()
+
+            while not self._stopEvent.isSet():
+                for stream in self._waitReadable():
+                    if not self._drainStream(stream):
+                        raise LogcatStreamClosed()
+
+                self._releaseMergedLines()
+                self._flushPendingLinesIfDue()
+                self._restartMainStreamsIfScheduled(device)
+
+        finally:
+            self._closeStreams()
+            self._releaseAllMergedLines()
+            self._flushPendingLines()
+
+    def _liveLogRead(self, device: AdbDevice):
+        #
+        # Binary output may be unusable on some devices (for example,
+        # if it's mangled by line ending translation). In this case
+        # start over, using the text format
+        #
+
+        self._detectSdkVersion(device)
+        self._detectService()
+        self._detectLogFormat()
+        self._detectDeviceFilter(device)
+        self._readEventLogTags(device)
+
+        try:
+            self._liveLogReadImpl(device)
+        except LogEntryFormatError as e:
+            if not self._binaryFormat:
+                raise
+
+            self._logger.warning("Bad binary logcat output: %s", str(e))
+            self._logger.warning("Falling back to the text format")
+            self._binaryFormat = False
+            self._liveLogReadImpl(device)
+
+    def _connectionEstablished(self):
+        if not self._connected:
+            self._connected = True
+            return
+
+        if self._reconnectAttempt == 0:
+            return
+
+        now = time.time()
+        self._reconnectAttempt = 0
+        self._reconnectCount += 1
+        self._reconnectLatency = now - self._disconnectedAt
+        lastTimestamp = max(s.timestamp() for s in self._mainResumeStates.values())
+        if lastTimestamp != 0:
+            self._resumeGap = now - lastTimestamp / 1_000_000_000
+
+        self._logger.info(
+            "Reconnected in %.2f sec, resuming %.2f sec of logs",
+            self._reconnectLatency,
+            self._resumeGap,
+        )
+
+        self._putEvent(ConnectionRestoredEvent(self._reconnectLatency))
+
+    def _connectionLost(self, error: DeviceError):
+        #
+        # Returns True if it's worth to reconnect
+        #
+
+        if not self._connected:
+            return False
+
+        if self._reconnectAttempt >= RECONNECT_MAX_ATTEMPTS:
+            return False
+
+        if self._reconnectAttempt == 0:
+            self._disconnectedAt = time.time()
+            self._putEvent(ConnectionLostEvent())
+
+        self._logger.warning("Connection lost: %s", str(error))
+        return True
+
+    def _waitBeforeReconnect(self):
+        delay = RECONNECT_DELAY_MIN_SEC * 2**self._reconnectAttempt
+        delay = min(delay, RECONNECT_DELAY_MAX_SEC)
+        self._reconnectAttempt += 1
+
+        self._logger.info(
+            "Reconnect attempt %d in %.2f sec", self._reconnectAttempt, delay
+        )
+
+        self._stopEvent.wait(int(delay * 1000))
+
+    def _capture(self):
+        with deviceRestricted(
+            self._deviceName,
+            self._client,
+            self._cachedDeviceState,
+        ) as device:
+            self._liveLogRead(device)
+
+    def _openWakeupSockets(self):
+        #
+        # The sockets live as long as run() does,
+        # so a thread which is never started doesn't leak them
+        #
+
+        self._wakeupReader, self._wakeupWriter = socket.socketpair()
+
+    def _closeWakeupSockets(self):
+        self._wakeupReader.close()
+        self._wakeupWriter.close()
+
+    def run(self):
+        self._openWakeupSockets()
+        try:
+            while not self._stopEvent.isSet():
+                try:
+                    self._capture()
+                    break
+                except DeviceError as e:
+                    if self._stopEvent.isSet():
+                        break
+
+                    if not self._connectionLost(e):
+                        self.failed.emit(e.msgBrief, e.msgVerbose)
+                        break
+
+                self._waitBeforeReconnect()
+
+        finally:
+            self._logger.debug("Capture stats: %s", self.stats())
+            self._closeWakeupSockets()
+
+    def pids(self):
+        if self._pids is None:
+            return []
+
+        with QMutexLocker(self._pidsMutex):
+            return [pid.decode() for pid in self._pids]
+
+    def stats(self):
+        return LogReaderStats(
+            recvBufferSize=self._recvBuffer.size(),
+            bytesPerSecond=self._recvBuffer.bytesPerSecond(),
+            linesChecked=self._linesChecked,
+            slowPathLines=self._slowPathLines,
+            queuedLines=self._queue.size(),
+            droppedLines=self._queue.droppedLines(),
+            delayedLines=self._queue.delayedLines(),
+            reconnectCount=self._reconnectCount,
+            reconnectLatency=self._reconnectLatency,
+            resumeGap=self._resumeGap,
+            duplicateLines=sum(
+                s.duplicateLines() for s in self._mainResumeStates.values()
+            ),
+        )
+
+    def takeQueued(self, maxLines: int):
+        return self._queue.take(maxLines)
 
     def stop(self):
         self._stopEvent.set()
+        self._queue.close()
+
+        #
+        # If run() has not created the sockets yet, it sees the stop event
+        # before waiting on them. If they are already closed, send() fails
+        #
+
+        wakeupWriter = self._wakeupWriter
+        if wakeupWriter is not None:
+            with suppress(OSError):
+                wakeupWriter.send(b"\0")
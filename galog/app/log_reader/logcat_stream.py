@@ -0,0 +1,109 @@
+from typing import Optional, Union
+
+from ppadb.connection import Connection
+
+from galog.app.device.device import AdbDevice
+from galog.app.device.errors import DeviceError
+from galog.app.settings.models import LogBuffer
+
+from .event_log_reader import EventLogReader
+from .log_entry_reader import LogEntryReader
+from .log_line_reader import LogLineReader
+from .recv_buffer import AdaptiveRecvBuffer
+from .stream_resume import StreamResumeState
+
+#
+# All readers parse whole lines out of the received chunks.
+# EventLogReader yields ProcessLogEvent instead of LogLine,
+# which has the same fields used to resume the stream
+#
+
+LogReader = Union[LogLineReader, LogEntryReader, EventLogReader]
+
+
+class LogcatStreamClosed(DeviceError):
+    @property
+    def msgBrief(self):
+        return "Connection error"
+
+    @property
+    def msgVerbose(self):
+        if self.args:
+            return f"Failed to read data ({self.args[0]})"
+
+        return "Failed to read data"
+
+
+class LogcatStream:
+    _service: str
+    _command: str
+    _reader: LogReader
+    _conn: Optional[Connection]
+    _resumeState: StreamResumeState
+    _buffer: Optional[LogBuffer]
+
+    def __init__(
+        self,
+        service: str,
+        command: str,
+        reader: LogReader,
+        resumeState: StreamResumeState,
+        buffer: Optional[LogBuffer] = None,
+    ) -> None:
+        self._service = service
+        self._command = command
+        self._reader = reader
+        self._resumeState = resumeState
+        self._buffer = buffer
+        self._conn = None
+
+    def command(self):
+        return self._command
+
+    def resumeState(self):
+        return self._resumeState
+
+    def buffer(self):
+        return self._buffer
+
+    def socket(self):
+        assert self._conn is not None, "Stream is not open"
+        return self._conn.socket
+
+    def open(self, device: AdbDevice):
+        conn = device.create_connection()
+        try:
+            conn.send(f"{self._service}:{self._command}")
+            conn.socket.setblocking(False)
+        except OSError as e:
+            conn.close()
+            raise LogcatStreamClosed(str(e))
+        except BaseException:
+            conn.close()
+            raise
+
+        self._conn = conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def recv(self, recvBuffer: AdaptiveRecvBuffer):
+        #
+        # BlockingIOError means there's no data yet.
+        # Any other socket error means the connection is lost
+        #
+
+        try:
+            return recvBuffer.recv(self.socket())
+        except BlockingIOError:
+            raise
+        except OSError as e:
+            raise LogcatStreamClosed(str(e))
+
+    def addDataChunk(self, chunk: bytes):
+        self._reader.addDataChunk(chunk)
+
+    def readParsedLines(self):
+        return self._reader.readParsedLines()
@@ -1,13 +1,22 @@
 from dataclasses import dataclass
-from typing import Optional
+from typing import Optional, Union
 
 
 @dataclass
 class LogLine:
+    #
+    # Captures may hold millions of lines, so instances have no __dict__.
+    # Thread id is -1 and timestamp (nanoseconds since epoch) is 0 if unknown
+    #
+
+    __slots__ = ("tag", "level", "msg", "pid", "tid", "timestamp")
+
     tag: str
     level: str
     msg: str
     pid: str
+    tid: int
+    timestamp: int
 
 
 @dataclass
@@ -21,3 +30,48 @@ class ProcessStartedEvent:
 class ProcessEndedEvent:
     processId: str
     packageName: str
+
+
+@dataclass
+class AppStartedEvent:
+    packageName: str
+
+
+@dataclass
+class AppEndedEvent:
+    packageName: str
+
+
+@dataclass
+class ConnectionLostEvent:
+    pass
+
+
+@dataclass
+class ConnectionRestoredEvent:
+    latency: float  # Seconds since the connection was lost
+
+
+QueueEvent = Union[
+    ProcessStartedEvent,
+    ProcessEndedEvent,
+    AppStartedEvent,
+    AppEndedEvent,
+    ConnectionLostEvent,
+    ConnectionRestoredEvent,
+]
+
+
+@dataclass
+class LogReaderStats:
+    recvBufferSize: int
+    bytesPerSecond: float
+    linesChecked: int  # Lines checked for process start/end
+    slowPathLines: int  # Lines the process start/end regexes ran on
+    queuedLines: int  # Lines waiting to be taken by the consumer
+    droppedLines: int  # Lines dropped due to queue overflow
+    delayedLines: int  # Lines which waited for space in the queue
+    reconnectCount: int  # Successful reconnects after connection loss
+    reconnectLatency: float  # Seconds the last reconnect took
+    resumeGap: float  # Seconds of logs re-requested by the last reconnect
+    duplicateLines: int  # Repeated lines skipped after reconnects
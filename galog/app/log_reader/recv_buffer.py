@@ -0,0 +1,74 @@
+import time
+from socket import socket
+
+RECV_SIZE_MIN = 4096
+RECV_SIZE_MAX = 512 * 1024
+RATE_WINDOW_SEC = 1.0
+
+
+class ThroughputMeter:
+    def __init__(self, window: float = RATE_WINDOW_SEC):
+        self._window = window
+        self._windowStart = time.monotonic()
+        self._windowBytes = 0
+        self._rate = 0.0
+
+    def update(self, numBytes: int):
+        self._windowBytes += numBytes
+        now = time.monotonic()
+        elapsed = now - self._windowStart
+        if elapsed >= self._window:
+            self._rate = self._windowBytes / elapsed
+            self._windowStart = now
+            self._windowBytes = 0
+
+    def bytesPerSecond(self):
+        #
+        # If nothing has been received for a couple of windows,
+        # the last computed rate is stale. Report zero instead
+        #
+
+        elapsed = time.monotonic() - self._windowStart
+        if elapsed >= 2 * self._window:
+            return 0.0
+
+        return self._rate
+
+
+class AdaptiveRecvBuffer:
+    def __init__(self, minSize: int = RECV_SIZE_MIN, maxSize: int = RECV_SIZE_MAX):
+        assert 0 < minSize <= maxSize, "Invalid buffer size limits"
+        self._minSize = minSize
+        self._maxSize = maxSize
+        self._size = minSize
+        self._buf = bytearray(maxSize)
+        self._view = memoryview(self._buf)
+        self._meter = ThroughputMeter()
+
+    def size(self):
+        return self._size
+
+    def bytesPerSecond(self):
+        return self._meter.bytesPerSecond()
+
+    def _adjustSize(self, received: int):
+        #
+        # A full read means the stream has more data queued than we asked for,
+        # so double the request size. A read much smaller than requested means
+        # the stream calmed down, so shrink it back towards the minimum
+        #
+
+        if received == self._size:
+            self._size = min(self._size * 2, self._maxSize)
+            return
+
+        while self._size > self._minSize and received < self._size // 4:
+            self._size = max(self._size // 2, self._minSize)
+
+    def recv(self, sock: socket):
+        received = sock.recv_into(self._view, self._size)
+        self._meter.update(received)
+        if received > 0:
+            self._adjustSize(received)
+
+        return self._view[:received]
@@ -0,0 +1,133 @@
+import struct
+from multiprocessing.shared_memory import SharedMemory
+from multiprocessing.synchronize import Lock
+from typing import Optional
+
+#
+# Byte ring in shared memory for one producer and one consumer process.
+# The header holds two counters, which only grow:
+#
+#   uint64_t written  bytes written by the producer
+#   uint64_t read     bytes read by the consumer
+#
+# Each side updates only its own counter, after the data is copied.
+# Plain stores to shared memory have no ordering guarantees: on ARM,
+# for example, the counter may become visible before the data it
+# publishes. So the counters are read and written under a lock shared
+# by both processes, which acts as a memory barrier. The lock is taken
+# a few times per frame and never held while the data is copied.
+# Frames are prefixed with uint32 length and wrap around the end of the ring
+#
+
+RING_HEADER_SIZE = 16
+RING_COUNTER = struct.Struct("<Q")
+RING_WRITTEN_OFFSET = 0
+RING_READ_OFFSET = 8
+FRAME_LENGTH = struct.Struct("<I")
+
+
+class SharedMemoryRing:
+    _shm: SharedMemory
+    _lock: Lock
+
+    def __init__(self, shm: SharedMemory, lock: Lock) -> None:
+        self._shm = shm
+        self._lock = lock
+        self._buf = shm.buf
+        self._capacity = shm.size - RING_HEADER_SIZE
+
+    @classmethod
+    def create(cls, capacity: int, lock: Lock):
+        shm = SharedMemory(create=True, size=RING_HEADER_SIZE + capacity)
+        shm.buf[:RING_HEADER_SIZE] = bytes(RING_HEADER_SIZE)
+        return cls(shm, lock)
+
+    @classmethod
+    def attach(cls, name: str, lock: Lock):
+        return cls(SharedMemory(name=name), lock)
+
+    def name(self):
+        return self._shm.name
+
+    def capacity(self):
+        return self._capacity
+
+    def _counters(self):
+        with self._lock:
+            (written,) = RING_COUNTER.unpack_from(self._buf, RING_WRITTEN_OFFSET)
+            (read,) = RING_COUNTER.unpack_from(self._buf, RING_READ_OFFSET)
+
+        return written, read
+
+    def _setCounter(self, offset: int, value: int):
+        with self._lock:
+            RING_COUNTER.pack_into(self._buf, offset, value)
+
+    def used(self):
+        written, read = self._counters()
+        return written - read
+
+    def isEmpty(self):
+        return self.used() == 0
+
+    def _copyIn(self, position: int, data: memoryview):
+        offset = position % self._capacity
+        first = min(len(data), self._capacity - offset)
+        begin = RING_HEADER_SIZE + offset
+        self._buf[begin : begin + first] = data[:first]
+        if first < len(data):
+            rest = len(data) - first
+            self._buf[RING_HEADER_SIZE : RING_HEADER_SIZE + rest] = data[first:]
+
+    def _copyOut(self, position: int, size: int):
+        offset = position % self._capacity
+        first = min(size, self._capacity - offset)
+        begin = RING_HEADER_SIZE + offset
+        data = bytes(self._buf[begin : begin + first])
+        if first < size:
+            rest = size - first
+            data += bytes(self._buf[RING_HEADER_SIZE : RING_HEADER_SIZE + rest])
+
+        return data
+
+    def put(self, frame: bytes):
+        #
+        # Producer side. Returns False if there's no space for the frame
+        #
+
+        size = FRAME_LENGTH.size + len(frame)
+        assert size <= self._capacity, "Frame is larger than the ring"
+
+        written, read = self._counters()
+        if written + size - read > self._capacity:
+            return False
+
+        self._copyIn(written, memoryview(FRAME_LENGTH.pack(len(frame))))
+        self._copyIn(written + FRAME_LENGTH.size, memoryview(frame))
+        self._setCounter(RING_WRITTEN_OFFSET, written + size)
+        return True
+
+    def take(self) -> Optional[bytes]:
+        #
+        # Consumer side. Returns None if the ring is empty
+        #
+
+        written, read = self._counters()
+        if read == written:
+            return None
+
+        (length,) = FRAME_LENGTH.unpack(self._copyOut(read, FRAME_LENGTH.size))
+        frame = self._copyOut(read + FRAME_LENGTH.size, length)
+        self._setCounter(RING_READ_OFFSET, read + FRAME_LENGTH.size + length)
+        return frame
+
+    def unlink(self):
+        #
+        # The memory stays mapped until both sides close it
+        #
+
+        self._shm.unlink()
+
+    def close(self):
+        self._buf = None
+        self._shm.close()
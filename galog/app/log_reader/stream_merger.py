@@ -0,0 +1,165 @@
+import heapq
+from collections import deque
+from operator import attrgetter
+from typing import Deque, Dict, Hashable, List, Optional, Tuple
+
+from .models import LogLine
+
+#
+# How long a line may wait for the lines of a stream, which is behind.
+# A stream, which has nothing to read, holds the others back only
+# for a short time. adb delivers the data of all the streams through
+# one connection, so a line of a quiet stream normally arrives
+# within this time after the lines logged around it
+#
+
+MERGE_DELAY_SEC = 0.05
+MERGE_SETTLE_SEC = 0.01
+
+TIMESTAMP_MAX = 2**63 - 1
+
+_timestamp = attrgetter("timestamp")
+
+
+class StreamMerger:
+    #
+    # Merges lines of several logcat streams in timestamp order.
+    # Every stream is ordered by itself, so a line can be released
+    # once all the streams have got past its timestamp. Streams, which
+    # have been caught up for a while, don't count. Lines are also released
+    # after waiting for 'delay' seconds, together with all the older ones
+    #
+
+    _pending: Dict[Hashable, List[LogLine]]
+    _watermarks: Dict[Hashable, int]
+    _caughtUpSince: Dict[Hashable, float]
+    _arrivals: Deque[Tuple[float, int]]
+
+    def __init__(
+        self,
+        delay: float = MERGE_DELAY_SEC,
+        settle: float = MERGE_SETTLE_SEC,
+    ) -> None:
+        self._delay = delay
+        self._settle = settle
+        self._pending = {}
+        self._watermarks = {}
+        self._caughtUpSince = {}
+        self._arrivals = deque()
+        self._expiredUpTo = 0
+        self._size = 0
+
+    def size(self):
+        return self._size
+
+    def addStream(self, key: Hashable):
+        self._pending.setdefault(key, [])
+        self._watermarks[key] = 0
+        self._caughtUpSince.pop(key, None)
+
+    def removeStream(self, key: Hashable):
+        #
+        # Pending lines of the stream stay,
+        # they are released when their time comes
+        #
+
+        self._watermarks.pop(key, None)
+        self._caughtUpSince.pop(key, None)
+
+    def setCaughtUp(self, key: Hashable, now: float):
+        #
+        # Everything the stream has sent so far has been read
+        #
+
+        if key in self._watermarks:
+            self._caughtUpSince.setdefault(key, now)
+
+    def push(self, key: Hashable, lines: List[LogLine], now: float):
+        assert key in self._pending, "Unknown stream"
+        if not lines:
+            return
+
+        latest = lines[-1].timestamp
+        if latest > self._watermarks.get(key, TIMESTAMP_MAX):
+            self._watermarks[key] = latest
+
+        self._pending[key].extend(lines)
+        self._caughtUpSince.pop(key, None)
+        self._arrivals.append((now, latest))
+        self._size += len(lines)
+
+    def nextDeadline(self, now: float) -> Optional[float]:
+        if not self._size:
+            return None
+
+        deadlines = [self._arrivals[0][0] + self._delay]
+        for since in self._caughtUpSince.values():
+            if since + self._settle > now:
+                deadlines.append(since + self._settle)
+
+        return min(deadlines)
+
+    def _watermark(self, now: float):
+        settledBefore = now - self._settle
+        watermark = TIMESTAMP_MAX
+        for key, timestamp in self._watermarks.items():
+            since = self._caughtUpSince.get(key)
+            if since is None or since > settledBefore:
+                watermark = min(watermark, timestamp)
+
+        return watermark
+
+    def _threshold(self, now: float):
+        deadline = now - self._delay
+        while self._arrivals and self._arrivals[0][0] <= deadline:
+            _, timestamp = self._arrivals.popleft()
+            self._expiredUpTo = max(self._expiredUpTo, timestamp)
+
+        return max(self._watermark(now), self._expiredUpTo)
+
+    def _releasedCount(self, lines: List[LogLine], threshold: int):
+        #
+        # Binary search, as the lines are ordered by timestamp
+        #
+
+        lo, hi = 0, len(lines)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if lines[mid].timestamp <= threshold:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        return lo
+
+    def _release(self, threshold: int):
+        released: List[List[LogLine]] = []
+        for key, lines in list(self._pending.items()):
+            count = self._releasedCount(lines, threshold)
+            if count > 0:
+                released.append(lines[:count])
+                del lines[:count]
+
+            if not lines and key not in self._watermarks:
+                del self._pending[key]
+
+        self._size -= sum(len(lines) for lines in released)
+        if not self._size:
+            self._arrivals.clear()
+
+        if len(released) == 1:
+            return released[0]
+
+        return list(heapq.merge(*released, key=_timestamp))
+
+    def release(self, now: float):
+        if not self._size:
+            return []
+
+        return self._release(self._threshold(now))
+
+    def releaseAll(self):
+        if not self._size:
+            return []
+
+        return self._release(TIMESTAMP_MAX)
@@ -0,0 +1,97 @@
+import time
+from collections import Counter
+from typing import Counter as CounterType
+from typing import Tuple
+
+from .log_line_reader import LogFormat
+from .models import LogLine
+
+LineKey = Tuple[str, int, str, str]
+
+
+def _lineKey(line: LogLine) -> LineKey:
+    return line.pid, line.tid, line.tag, line.msg
+
+
+class StreamResumeState:
+    #
+    # Remembers where a logcat stream stopped, so it can be resumed
+    # with 'logcat -T <time>' after a reconnect. The resumed stream
+    # repeats the lines logged at (or, due to rounding, a bit before)
+    # the last seen timestamp. These are told apart from new lines
+    # by remembering the lines seen at the last timestamp
+    #
+
+    _timestamp: int
+    _boundary: CounterType[LineKey]
+    _overlap: CounterType[LineKey]
+
+    def __init__(self) -> None:
+        self._timestamp = 0
+        self._boundary = Counter()
+        self._overlap = Counter()
+        self._overlapActive = False
+        self._duplicateLines = 0
+
+    def timestamp(self):
+        return self._timestamp
+
+    def duplicateLines(self):
+        return self._duplicateLines
+
+    def since(self, logFormat: LogFormat):
+        #
+        # Value for the '-T' option. Rounded down to milliseconds,
+        # which every logcat version understands
+        #
+
+        if self._timestamp == 0:
+            return "1"
+
+        seconds, nanoseconds = divmod(self._timestamp, 1_000_000_000)
+        milliseconds = nanoseconds // 1_000_000
+        if logFormat == LogFormat.Epoch:
+            return f"{seconds}.{milliseconds:03d}"
+
+        localTime = time.strftime("%m-%d %H:%M:%S", time.localtime(seconds))
+        return f"'{localTime}.{milliseconds:03d}'"
+
+    def startOverlap(self):
+        self._overlap = Counter(self._boundary)
+        self._overlapActive = self._timestamp != 0
+
+    def _isDuplicate(self, line: LogLine):
+        if line.timestamp > self._timestamp:
+            self._overlapActive = False
+            return False
+
+        if line.timestamp < self._timestamp:
+            return True
+
+        key = _lineKey(line)
+        if self._overlap[key] > 0:
+            self._overlap[key] -= 1
+            return True
+
+        return False
+
+    def accept(self, line: LogLine):
+        #
+        # Returns False for the lines already seen before the reconnect
+        #
+
+        if line.timestamp == 0:
+            return True
+
+        if self._overlapActive and self._isDuplicate(line):
+            self._duplicateLines += 1
+            return False
+
+        if line.timestamp > self._timestamp:
+            self._timestamp = line.timestamp
+            self._boundary.clear()
+            self._boundary[_lineKey(line)] += 1
+        elif line.timestamp == self._timestamp:
+            self._boundary[_lineKey(line)] += 1
+
+        return True
@@ -119,12 +119,42 @@ class LogViewerSettings(BaseModel):
     liveReload: bool
     textHighlighting: bool
     showLineNumbers: bool
+    maxLines: Annotated[int, Field(ge=0)] = 1000000
+    spillToDisk: bool = False
+    memoryMaxLines: Annotated[int, Field(gt=0)] = 200000
+
+
+class QueuePolicy(str, Enum):
+    Block = "block"
+    DropOldest = "dropOldest"
+    DropLowestLevel = "dropLowestLevel"
+
+
+class LogBuffer(str, Enum):
+    Main = "main"
+    System = "system"
+    Crash = "crash"
+    Events = "events"
+
+
+def defaultLogBuffers():
+    return [LogBuffer.Main, LogBuffer.System, LogBuffer.Crash]
+
+
+class CaptureSettings(BaseModel):
+    binaryFormat: bool = True
+    deviceFiltering: bool = True
+    buffers: List[LogBuffer] = Field(default_factory=defaultLogBuffers)
+    queueMaxLines: Annotated[int, Field(gt=0)] = 200000
+    queuePolicy: QueuePolicy = QueuePolicy.Block
+    readerProcess: bool = False
 
 
 class AppSettings(BaseModel):
     adbServer: AdbServerSettings
     fonts: AppFontsSettings
     logViewer: LogViewerSettings
+    capture: CaptureSettings = Field(default_factory=CaptureSettings)
 
 
 class AppSessionSettings(BaseModel):
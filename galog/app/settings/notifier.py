@@ -15,6 +15,11 @@ class ChangedEntry(int, Enum):
     LiveReload = auto()
     TextHighlighting = auto()
     ShowLineNumbers = auto()
+    BinaryLogFormat = auto()
+    DeviceFiltering = auto()
+    LogBuffers = auto()
+    ReaderProcess = auto()
+    SpillToDisk = auto()
 
 
 def singleton(class_):
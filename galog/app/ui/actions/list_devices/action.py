@@ -1,6 +1,5 @@
 from typing import Optional
 
-from PyQt5.QtCore import QThreadPool
 from PyQt5.QtWidgets import QWidget
 
 from galog.app.device import AdbClient, DeviceInfo
@@ -32,7 +31,7 @@ class ListDevicesAction(Action):
         task.signals.deviceFound.connect(self._deviceFound)
         task.signals.failed.connect(self._failed)
 
-        QThreadPool.globalInstance().start(task)
+        task.start()
         self._execLoadingDialog()
 
         if self.succeeded():
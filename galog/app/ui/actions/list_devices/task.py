@@ -1,8 +1,13 @@
 from PyQt5.QtCore import QObject, pyqtSignal
 
-from galog.app.device import AdbClient, DeviceInfo, deviceListWithInfo
+from galog.app.device import (
+    AdbClient,
+    AsyncAdbClient,
+    DeviceInfo,
+    deviceListWithInfoAsync,
+)
 from galog.app.device.errors import DeviceError
-from galog.app.ui.base.task import Task
+from galog.app.ui.base.async_task import AsyncTask
 
 
 class ListDevicesTaskSignals(QObject):
@@ -11,17 +16,17 @@ class ListDevicesTaskSignals(QObject):
     deviceFound = pyqtSignal(DeviceInfo)
 
 
-class ListDevicesTask(Task):
-    _adbClient: AdbClient
+class ListDevicesTask(AsyncTask):
+    _adbClient: AsyncAdbClient
 
     def __init__(self, adbClient: AdbClient):
         super().__init__()
         self.signals = ListDevicesTaskSignals()
-        self._adbClient = adbClient
+        self._adbClient = AsyncAdbClient.fromClient(adbClient)
 
-    def entrypoint(self):
+    async def entrypoint(self):
         try:
-            for device in deviceListWithInfo(self._adbClient):
+            for device in await deviceListWithInfoAsync(self._adbClient):
                 self.signals.deviceFound.emit(device)
 
         except DeviceError as e:
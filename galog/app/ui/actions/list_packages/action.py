@@ -1,6 +1,5 @@
 from typing import Optional
 
-from PyQt5.QtCore import QThreadPool
 from PyQt5.QtWidgets import QWidget
 
 from galog.app.device import AdbClient
@@ -42,7 +41,7 @@ class ListPackagesAction(Action):
         task.signals.packageFound.connect(self._packageFound)
         task.signals.failed.connect(self._failed)
 
-        QThreadPool.globalInstance().start(task)
+        task.start()
         self._execLoadingDialog()
 
         if self.succeeded():
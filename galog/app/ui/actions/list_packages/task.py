@@ -1,8 +1,8 @@
 from PyQt5.QtCore import QObject, pyqtSignal
 
-from galog.app.device import AdbClient, deviceRestricted
+from galog.app.device import AdbClient, AsyncAdbClient, deviceRestrictedAsync
 from galog.app.device.errors import DeviceError, DeviceRuntimeError
-from galog.app.ui.base.task import Task
+from galog.app.ui.base.async_task import AsyncTask
 
 
 class ListPackagesTaskSignals(QObject):
@@ -11,19 +11,20 @@ class ListPackagesTaskSignals(QObject):
     failed = pyqtSignal(DeviceError)
 
 
-class ListPackagesTask(Task):
-    _adbClient: AdbClient
+class ListPackagesTask(AsyncTask):
+    _adbClient: AsyncAdbClient
 
     def __init__(self, deviceName: str, adbClient: AdbClient):
         super().__init__()
         self.signals = ListPackagesTaskSignals()
         self._deviceName = deviceName
-        self._adbClient = adbClient
+        self._adbClient = AsyncAdbClient.fromClient(adbClient)
 
-    def entrypoint(self):
+    async def entrypoint(self):
+        client = self._adbClient
         try:
-            with deviceRestricted(self._deviceName, self._adbClient) as device:
-                for package in device.list_packages():
+            async with deviceRestrictedAsync(self._deviceName, client) as serial:
+                for package in await client.listPackages(serial):
                     self.signals.packageFound.emit(package)
 
         except DeviceError as e:
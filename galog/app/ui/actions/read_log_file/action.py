@@ -1,9 +1,11 @@
 import re
+from datetime import datetime
 from typing import IO, Optional
 
 from PyQt5.QtCore import QObject, QThread, pyqtSignal
 from PyQt5.QtWidgets import QWidget
 
+from galog.app.log_reader.log_line_reader import fractionToNanoseconds, localTimeToEpoch
 from galog.app.log_reader.log_reader import LogLine
 from galog.app.ui.actions.read_file import FileProcessError
 
@@ -11,6 +13,11 @@ from ..read_file import ReadFileAction
 
 REGEX_VTAG = r"^([A-Z])/(.+?): (.*)$"
 
+# fmt: off
+REGEX_THREADTIME = r"^(\d\d-\d\d \d\d:\d\d:\d\d)\.(\d+) +(\d+) +(\d+) ([A-Z]) (.*?) *: (.*)$"
+REGEX_EPOCH = r"^ *(\d+)\.(\d+) +(\d+) +(\d+) ([A-Z]) (.*?) *: (.*)$"
+# fmt: on
+
 
 class LogLineParseError(FileProcessError):
     def __init__(self, lineNum: int) -> None:
@@ -31,6 +38,9 @@ class ReadLogFileAction(ReadFileAction):
     def __init__(self, filePath: str, parentWidget: Optional[QWidget] = None):
         super().__init__(filePath, parentWidget)
         self._pattern = re.compile(REGEX_VTAG)
+        self._patternThreadTime = re.compile(REGEX_THREADTIME)
+        self._patternEpoch = re.compile(REGEX_EPOCH)
+        self._now = datetime.now()
         self._signals = SignalsInternal()
 
     @property
@@ -40,7 +50,36 @@ class ReadLogFileAction(ReadFileAction):
     def _lineRead(self, logLine: LogLine):
         self._signals.lineRead.emit(logLine)
 
+    def _timedLogLine(self, match: re.Match, seconds: int):
+        time, fraction, pid, tid, level, tag, msg = match.groups()
+        timestamp = 0
+        if seconds != 0:
+            timestamp = seconds * 1_000_000_000 + fractionToNanoseconds(fraction)
+
+        return LogLine(
+            level=level,
+            tag=tag,
+            msg=msg,
+            pid=pid,
+            tid=int(tid),
+            timestamp=timestamp,
+        )
+
     def _parseLogLine(self, lineNum: int, lineText: str):
+        #
+        # Besides our own format, accept files
+        # saved by 'logcat -v threadtime' and 'logcat -v epoch'
+        #
+
+        match = self._patternEpoch.match(lineText)
+        if match:
+            return self._timedLogLine(match, int(match.group(1)))
+
+        match = self._patternThreadTime.match(lineText)
+        if match:
+            seconds = localTimeToEpoch(match.group(1), self._now)
+            return self._timedLogLine(match, seconds)
+
         match = self._pattern.match(lineText)
         if not match:
             raise LogLineParseError(lineNum)
@@ -50,6 +89,8 @@ class ReadLogFileAction(ReadFileAction):
             tag=match.group(2).rstrip(),
             msg=match.group(3),
             pid=-1,
+            tid=-1,
+            timestamp=0,
         )
 
     def _readLogFileImpl(self, fd: IO[str]):
@@ -1,6 +1,5 @@
 from typing import List, Optional
 
-from PyQt5.QtCore import QThreadPool
 from PyQt5.QtWidgets import QWidget
 
 from galog.app.device.device import AdbClient
@@ -41,7 +40,7 @@ class ShellExecAction(Action):
         task.signals.failed.connect(self._failed)
         task.setStartDelay(delay)
 
-        QThreadPool.globalInstance().start(task)
+        task.start()
         self._execLoadingDialog()
 
     def executeManyCommands(
@@ -55,5 +54,5 @@ class ShellExecAction(Action):
         task.signals.failed.connect(self._failed)
         task.setStartDelay(delay)
 
-        QThreadPool.globalInstance().start(task)
+        task.start()
         self._execLoadingDialog()
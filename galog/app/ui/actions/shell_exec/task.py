@@ -1,11 +1,12 @@
+import asyncio
 from dataclasses import dataclass
 from typing import Callable, List
 
-from PyQt5.QtCore import QObject, QThread, pyqtSignal
+from PyQt5.QtCore import QObject, pyqtSignal
 
-from galog.app.device import AdbClient, AdbDevice, deviceRestricted
+from galog.app.device import AdbClient, AsyncAdbClient, deviceRestrictedAsync
 from galog.app.device.errors import DeviceError
-from galog.app.ui.base.task import Task
+from galog.app.ui.base.async_task import AsyncTask
 
 ShellExecVerifier = Callable[[str, str], bool]
 _DEFAULT_VERIFIER = lambda code, output: code == "0"
@@ -53,7 +54,7 @@ class ShellExecTaskSignals(QObject):
     cmdFailed = pyqtSignal(ShellExecResult)
 
 
-class ShellExecTask(Task):
+class ShellExecTask(AsyncTask):
     def __init__(
         self,
         deviceName: str,
@@ -63,27 +64,29 @@ class ShellExecTask(Task):
         super().__init__()
         self.signals = ShellExecTaskSignals()
         self._cmdList = cmdList
-        self._adbClient = adbClient
+        self._adbClient = AsyncAdbClient.fromClient(adbClient)
         self._deviceName = deviceName
 
-    def _execCommand(self, device: AdbDevice, command: ShellExecCommand):
-        combinedOutput: str = device.shell(command.cmdString + '; echo -e "\n$?"')
+    async def _execCommand(self, serial: str, command: ShellExecCommand):
+        cmdString = command.cmdString + '; echo -e "\n$?"'
+        combinedOutput = await self._adbClient.shell(serial, cmdString)
         output, exitCode = combinedOutput.rstrip().rsplit("\n", 1)
         self._logger.debug("Execute command: '%s'", str(command))
         self._logger.debug("Result: exitCode='%s' output='%s'", exitCode, output)
         succeeded = command.verifier(exitCode, output)
         return ShellExecResult(command, succeeded, exitCode, output)
 
-    def _execCommandList(self):
-        with deviceRestricted(self._deviceName, self._adbClient) as device:
+    async def _execCommandList(self):
+        client = self._adbClient
+        async with deviceRestrictedAsync(self._deviceName, client) as serial:
             for command in self._cmdList:
-                result = self._execCommand(device, command)
+                result = await self._execCommand(serial, command)
                 if not result.succeeded:
                     self.signals.cmdFailed.emit(result)
                     raise CommandFailed(result)
 
                 if command.waitTimeMs > 0:
-                    QThread.msleep(command.waitTimeMs)
+                    await asyncio.sleep(command.waitTimeMs / 1000)
 
                 self.signals.cmdSucceeded.emit(result)
 
@@ -93,9 +96,9 @@ class ShellExecTask(Task):
             f"Shell command '{execResult.command.name}' failed with exit code '{execResult.exitCode}'",
         )
 
-    def entrypoint(self):
+    async def entrypoint(self):
         try:
-            self._execCommandList()
+            await self._execCommandList()
         except CommandFailed as e:
             self._logger.error(str(e))
             msgBrief, msgVerbose = self._shellExecErrorString(e.shellExecResult())
@@ -0,0 +1,51 @@
+import asyncio
+import logging
+from abc import abstractmethod
+from concurrent.futures import Future
+
+from galog.app.device.async_client import adbEventLoop
+
+
+class AsyncTask:
+    #
+    # Same as Task, but runs as a coroutine on the adb event loop
+    # instead of occupying a thread of the pool. The signals
+    # are emitted from the loop thread and queued to the receivers
+    #
+
+    def __init__(self):
+        self._msDelay = -1
+        self._initLogger()
+
+    def _initLogger(self):
+        self._logger = logging.getLogger(self.__class__.__name__)
+
+    def setStartDelay(self, msDelay: int):
+        assert msDelay > 0, "Delay must be greater than 0"
+        self._msDelay = msDelay
+
+    async def delayIfNeeded(self):
+        if self._msDelay == -1:
+            return
+
+        self._logger.debug("Delay for %dms", self._msDelay)
+        await asyncio.sleep(self._msDelay / 1000)
+
+    @abstractmethod
+    async def entrypoint(self):
+        pass
+
+    async def run(self):
+        try:
+            self._logger.debug("Delay if needed")
+            await self.delayIfNeeded()
+
+            self._logger.debug("Call entrypoint")
+            await self.entrypoint()
+            self._logger.debug("Call entrypoint - OK")
+
+        except Exception:
+            self._logger.exception("Unhandled exception in task entrypoint:")
+
+    def start(self) -> Future:
+        return adbEventLoop().submit(self.run())
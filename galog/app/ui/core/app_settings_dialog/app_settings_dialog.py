@@ -5,7 +5,7 @@ from PyQt5.QtGui import QKeyEvent
 from PyQt5.QtWidgets import QScrollArea, QSizePolicy, QVBoxLayout, QWidget
 
 from galog.app.settings import AppSettings, readSettings, writeSettings
-from galog.app.settings.models import FontSettings
+from galog.app.settings.models import FontSettings, LogBuffer
 from galog.app.settings.notifier import ChangedEntry, SettingsChangeNotifier
 from galog.app.ui.base.dialog import Dialog
 from galog.app.ui.base.widget import Widget
@@ -13,6 +13,7 @@ from galog.app.ui.helpers.hotkeys import HotkeyHelper
 from galog.app.ui.reusable.search_input import SearchInput
 
 from .button_bar import BottomButtonBar
+from .capture_settings_pane import CaptureSettingsPane
 from .font_settings_pane import FontSettingsPane
 from .log_viewer_settings_pane import LogViewerSettingsPane
 from .section_search_adapter import SectionSearchAdapter
@@ -28,12 +29,14 @@ class SettingsWidget(Widget):
     def _initUserInterface(self):
         self.fontSettingsPane = FontSettingsPane(self._settings, self)
         self.logViewerSettingsPane = LogViewerSettingsPane(self._settings, self)
+        self.captureSettingsPane = CaptureSettingsPane(self._settings, self)
 
         layout = QVBoxLayout()
         layout.setAlignment(Qt.AlignTop)
         layout.setContentsMargins(0, 0, 0, 0)
         layout.addWidget(self.fontSettingsPane)
         layout.addWidget(self.logViewerSettingsPane)
+        layout.addWidget(self.captureSettingsPane)
         self.setLayout(layout)
 
     def _setFixedSizePolicy(self):
@@ -97,6 +100,26 @@ class AppSettingsDialog(Dialog):
         self._entriesChanged.add(ChangedEntry.ShowLineNumbers)
         self._settingsCopy.logViewer.showLineNumbers = value
 
+    def _spillToDiskChanged(self, value: bool):
+        self._entriesChanged.add(ChangedEntry.SpillToDisk)
+        self._settingsCopy.logViewer.spillToDisk = value
+
+    def _binaryFormatChanged(self, value: bool):
+        self._entriesChanged.add(ChangedEntry.BinaryLogFormat)
+        self._settingsCopy.capture.binaryFormat = value
+
+    def _deviceFilteringChanged(self, value: bool):
+        self._entriesChanged.add(ChangedEntry.DeviceFiltering)
+        self._settingsCopy.capture.deviceFiltering = value
+
+    def _logBuffersChanged(self, buffers: List[LogBuffer]):
+        self._entriesChanged.add(ChangedEntry.LogBuffers)
+        self._settingsCopy.capture.buffers = buffers
+
+    def _readerProcessChanged(self, value: bool):
+        self._entriesChanged.add(ChangedEntry.ReaderProcess)
+        self._settingsCopy.capture.readerProcess = value
+
     def _searchTextInSettings(
         self, text: str, searchAdapters: List[SectionSearchAdapter]
     ):
@@ -121,12 +144,19 @@ class AppSettingsDialog(Dialog):
         pane.setVisible(hasResults)
         return hasResults
 
+    def _searchInCaptureSettingsPane(self, text: str):
+        pane = self.settingsWidget.captureSettingsPane
+        hasResults = self._searchTextInSettings(text, pane.searchAdapters())
+        pane.setVisible(hasResults)
+        return hasResults
+
     def _applySectionFilter(self, text: str):
         hasResults = False
         text = text.lower()
 
         hasResults |= self._searchInFontSettingsPane(text)
         hasResults |= self._searchInLogViewerSettingsPane(text)
+        hasResults |= self._searchInCaptureSettingsPane(text)
 
         hasResultsVal = "true" if hasResults else "false"
         self.settingsWidget.setProperty("hasResults", hasResultsVal)
@@ -148,6 +178,13 @@ class AppSettingsDialog(Dialog):
         pane.liveReloadChanged.connect(self._liveReloadChanged)
         pane.textHighlightingChanged.connect(self._textHighlightingChanged)
         pane.showLineNumbersChanged.connect(self._showLineNumbersChanged)
+        pane.spillToDiskChanged.connect(self._spillToDiskChanged)
+
+        pane = self.settingsWidget.captureSettingsPane
+        pane.binaryFormatChanged.connect(self._binaryFormatChanged)
+        pane.deviceFilteringChanged.connect(self._deviceFilteringChanged)
+        pane.logBuffersChanged.connect(self._logBuffersChanged)
+        pane.readerProcessChanged.connect(self._readerProcessChanged)
 
     def _initUserInterface(self):
         self.setWindowTitle("App Settings")
@@ -0,0 +1,102 @@
+from PyQt5.QtCore import Qt, pyqtSignal
+from PyQt5.QtGui import QFont
+from PyQt5.QtWidgets import QFrame, QHBoxLayout, QLabel, QVBoxLayout, QWidget
+
+from galog.app.settings import AppSettings
+from galog.app.settings.models import LogBuffer
+from galog.app.ui.base.widget import Widget
+
+from .toggle_section import ToggleSection
+
+
+class CaptureSettingsPane(Widget):
+    binaryFormatChanged = pyqtSignal(bool)
+    deviceFilteringChanged = pyqtSignal(bool)
+    logBuffersChanged = pyqtSignal(list)
+    readerProcessChanged = pyqtSignal(bool)
+
+    def __init__(self, settings: AppSettings, parent: QWidget):
+        super().__init__(parent)
+        self._settings = settings
+        self._initUserInterface()
+        self._initUserInputHandlers()
+
+    def _initUserInputHandlers(self):
+        self.binaryFormatSection.valueChanged.connect(
+            self.binaryFormatChanged.emit,
+        )
+        self.deviceFilteringSection.valueChanged.connect(
+            self.deviceFilteringChanged.emit,
+        )
+        for section in self.logBufferSections.values():
+            section.valueChanged.connect(self._logBufferToggled)
+
+        self.readerProcessSection.valueChanged.connect(
+            self.readerProcessChanged.emit,
+        )
+
+    def _logBufferToggled(self):
+        buffers = []
+        for buffer, section in self.logBufferSections.items():
+            if section.value():
+                buffers.append(buffer)
+
+        self.logBuffersChanged.emit(buffers)
+
+    def _initUserInterface(self):
+        vBoxLayout = QVBoxLayout()
+        vBoxLayout.setAlignment(Qt.AlignTop)
+
+        hBoxLayout = QHBoxLayout()
+        self.titleLabel = QLabel(self)
+        self.titleLabel.setText("Capture settings")
+        fontFamily = self._settings.fonts.standard.family
+        fontSize = self._settings.fonts.standard.size - 1
+        self.titleLabel.setFont(QFont(fontFamily, fontSize, QFont.Bold))
+
+        self.lineFrame = QFrame(self)
+        self.lineFrame.setFrameShape(QFrame.HLine)
+        self.lineFrame.setFrameShadow(QFrame.Plain)
+        self.lineFrame.setLineWidth(2)
+        hBoxLayout.addWidget(self.titleLabel)
+        hBoxLayout.addWidget(self.lineFrame, stretch=1)
+        vBoxLayout.addLayout(hBoxLayout)
+
+        self.binaryFormatSection = ToggleSection(self._settings, self)
+        self.binaryFormatSection.setTitle("Binary log format")
+        binaryFormat = self._settings.capture.binaryFormat
+        self.binaryFormatSection.setValue(binaryFormat)
+
+        self.deviceFilteringSection = ToggleSection(self._settings, self)
+        self.deviceFilteringSection.setTitle("Device-side filtering")
+        deviceFiltering = self._settings.capture.deviceFiltering
+        self.deviceFilteringSection.setValue(deviceFiltering)
+
+        self.logBufferSections = {}
+        for buffer in LogBuffer:
+            section = ToggleSection(self._settings, self)
+            section.setTitle(f"Read '{buffer.value}' log buffer")
+            section.setValue(buffer in self._settings.capture.buffers)
+            self.logBufferSections[buffer] = section
+
+        self.readerProcessSection = ToggleSection(self._settings, self)
+        self.readerProcessSection.setTitle("Read logs in a separate process")
+        readerProcess = self._settings.capture.readerProcess
+        self.readerProcessSection.setValue(readerProcess)
+
+        vBoxLayout.addWidget(self.binaryFormatSection)
+        vBoxLayout.addWidget(self.deviceFilteringSection)
+        for section in self.logBufferSections.values():
+            vBoxLayout.addWidget(section)
+
+        vBoxLayout.addWidget(self.readerProcessSection)
+
+        self.setLayout(vBoxLayout)
+
+    def searchAdapters(self):
+        return [
+            self.binaryFormatSection.searchAdapter(),
+            self.deviceFilteringSection.searchAdapter(),
+            *[s.searchAdapter() for s in self.logBufferSections.values()],
+            self.readerProcessSection.searchAdapter(),
+        ]
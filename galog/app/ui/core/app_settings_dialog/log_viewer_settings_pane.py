@@ -12,6 +12,7 @@ class LogViewerSettingsPane(Widget):
     liveReloadChanged = pyqtSignal(bool)
     textHighlightingChanged = pyqtSignal(bool)
     showLineNumbersChanged = pyqtSignal(bool)
+    spillToDiskChanged = pyqtSignal(bool)
 
     def __init__(self, settings: AppSettings, parent: QWidget):
         super().__init__(parent)
@@ -29,6 +30,9 @@ class LogViewerSettingsPane(Widget):
         self.showLineNumbersSection.valueChanged.connect(
             self.showLineNumbersChanged.emit
         )
+        self.spillToDiskSection.valueChanged.connect(
+            self.spillToDiskChanged.emit,
+        )
 
     def _initUserInterface(self):
         vBoxLayout = QVBoxLayout()
@@ -64,9 +68,15 @@ class LogViewerSettingsPane(Widget):
         textHighlighting = self._settings.logViewer.textHighlighting
         self.showLineNumbersSection.setValue(textHighlighting)
 
+        self.spillToDiskSection = ToggleSection(self._settings, self)
+        self.spillToDiskSection.setTitle("Keep older lines on disk")
+        spillToDisk = self._settings.logViewer.spillToDisk
+        self.spillToDiskSection.setValue(spillToDisk)
+
         vBoxLayout.addWidget(self.liveReloadSection)
         vBoxLayout.addWidget(self.textHighlightingSection)
         vBoxLayout.addWidget(self.showLineNumbersSection)
+        vBoxLayout.addWidget(self.spillToDiskSection)
         self.setLayout(vBoxLayout)
 
     def searchAdapters(self):
@@ -74,4 +84,5 @@ class LogViewerSettingsPane(Widget):
             self.liveReloadSection.searchAdapter(),
             self.textHighlightingSection.searchAdapter(),
             self.showLineNumbersSection.searchAdapter(),
+            self.spillToDiskSection.searchAdapter(),
         ]
@@ -5,7 +5,7 @@ from PyQt5.QtCore import QModelIndex, Qt
 from PyQt5.QtGui import QKeyEvent
 from PyQt5.QtWidgets import QVBoxLayout, QWidget
 
-from galog.app.device import DeviceInfo
+from galog.app.device import DeviceInfo, DeviceTracker, deviceTracker
 from galog.app.device.device import AdbClient
 from galog.app.msgbox import msgBoxErr
 from galog.app.settings.models import LastSelectedDevice
@@ -26,6 +26,7 @@ class DeviceSelectDialog(Dialog):
         self._sessionSettings = readSessionSettings()
         self._autoSelect = False
         self._autoSelectDone = False
+        self._tracker: Optional[DeviceTracker] = None
         self.setWindowTitle("Select Device")
         self.setWindowFlag(Qt.WindowMaximizeButtonHint, False)
         self.setRelativeGeometry(0.8, 0.6, 900, 600)
@@ -126,13 +127,75 @@ class DeviceSelectDialog(Dialog):
         self._sessionSettings.lastSelectedDevice = selectedDevice
         self.accept()
 
+    def _trackDevices(self, ipAddr: str, port: int):
+        #
+        # The table follows the tracker, so devices appear
+        # and disappear without reloading the list
+        #
+
+        tracker = deviceTracker(ipAddr, port)
+        if tracker is self._tracker:
+            return tracker
+
+        self._stopTracking()
+        tracker.deviceAdded.connect(self._trackedDevicesChanged)
+        tracker.deviceRemoved.connect(self._trackedDevicesChanged)
+        tracker.deviceStateChanged.connect(self._trackedDevicesChanged)
+        self._tracker = tracker
+        return tracker
+
+    def _stopTracking(self):
+        if self._tracker is None:
+            return
+
+        self._tracker.deviceAdded.disconnect(self._trackedDevicesChanged)
+        self._tracker.deviceRemoved.disconnect(self._trackedDevicesChanged)
+        self._tracker.deviceStateChanged.disconnect(self._trackedDevicesChanged)
+        self._tracker = None
+
+    def done(self, result: int):
+        self._stopTracking()
+        super().done(result)
+
+    def _trackedDevicesChanged(self):
+        if self._tracker is None:
+            return
+
+        deviceList = self._tracker.devices()
+        if not deviceList:
+            self._setDevicesEmpty()
+            return
+
+        selectedSerial = None
+        if self.deviceTable.tableView.currentIndex().isValid():
+            selectedSerial, _, _ = self.deviceTable.selectedDevice()
+
+        self._setDevices(deviceList)
+        if selectedSerial and self.deviceTable.selectDeviceBySerial(selectedSerial):
+            return
+
+        self._selectDefaultDevice(deviceList)
+
+    def _listDevices(self, tracker: DeviceTracker, client: AdbClient):
+        #
+        # The device list is requested only if the tracker can't tell yet.
+        # For example, if the adb server is not running
+        #
+
+        if tracker.isReady():
+            deviceList = tracker.devices()
+            return deviceList or None
+
+        action = ListDevicesAction(client, self)
+        return action.listDevices()
+
     def _refreshDeviceList(self):
         ipAddr = self.devicesLoadOptions.adbIpAddr()
         port = int(self.devicesLoadOptions.adbPort())
         client = AdbClient(ipAddr, port)
+        tracker = self._trackDevices(ipAddr, port)
 
-        action = ListDevicesAction(client, self)
-        deviceList = action.listDevices()
+        deviceList = self._listDevices(tracker, client)
         if deviceList is None:
             self._setDevicesEmpty()
             return
@@ -1,3 +1,4 @@
+import time
 from typing import Callable, List, Optional
 
 from PyQt5.QtCore import QPoint, Qt, pyqtSignal
@@ -12,6 +13,7 @@ from galog.app.log_reader import (
     ProcessEndedEvent,
     ProcessStartedEvent,
 )
+from galog.app.settings import readSettings
 from galog.app.ui.actions.read_log_file import ReadLogFileAction
 from galog.app.ui.actions.write_log_file import WriteLogFileAction
 from galog.app.ui.base.item_view_proxy import ScrollHint
@@ -22,6 +24,11 @@ from .quick_filter_bar import FilterField, QuickFilterBar
 
 
 class RowBackup:
+    #
+    # Holds a row number of the log viewer data model,
+    # which is not affected by filtering
+    #
+
     INVALID_VALUE: int = -1
     _rowNum: int
 
@@ -42,6 +49,15 @@ class RowBackup:
     def delete(self):
         self._rowNum = RowBackup.INVALID_VALUE
 
+    def trim(self, evictedRows: int):
+        #
+        # Keep pointing at the same line after the oldest lines
+        # have been evicted. If the line itself is gone, point at the oldest one
+        #
+
+        if not self.empty():
+            self._rowNum = max(0, self._rowNum - evictedRows)
+
 
 class LogMessagesPanel(Widget):
     captureInterrupted = pyqtSignal(str, str)
@@ -71,6 +87,9 @@ class LogMessagesPanel(Widget):
         self._logMessagesTable.requestJumpBackToFilterView.connect(
             self._handleJumpBackToFilterView
         )
+        self._logMessagesTable.logLinesEvicted.connect(
+            self._logLinesEvicted,
+        )
 
         self._quickFilterBar.arrowUpPressed.connect(
             self._tryFocusLogMessagesTableAndGoUp,
@@ -106,14 +125,30 @@ class LogMessagesPanel(Widget):
             self._addOwnLogLine(msg)
 
     def startCapture(self, device: str, package: str, pids: List[str]):
+        self._applyMaxLogLines()
         self._addAppStateLogLine(package, pids)
-        self._logReader = AndroidAppLogReader(adbClient(), device, package, pids)
+        settings = readSettings().capture
+        self._logReader = AndroidAppLogReader(
+            adbClient(),
+            device,
+            package,
+            pids,
+            binaryFormat=settings.binaryFormat,
+            deviceFiltering=settings.deviceFiltering,
+            queueMaxLines=settings.queueMaxLines,
+            queuePolicy=settings.queuePolicy,
+            buffers=settings.buffers,
+            readerProcess=settings.readerProcess,
+        )
         self._logReader.signals.failed.connect(self._logReaderFailed)
         self._logReader.signals.appStarted.connect(self._appStarted)
         self._logReader.signals.appEnded.connect(self._appEnded)
         self._logReader.signals.processStarted.connect(self._processStarted)
         self._logReader.signals.processEnded.connect(self._processEnded)
-        self._logReader.signals.lineRead.connect(self._lineRead)
+        self._logReader.signals.linesRead.connect(self._linesRead)
+        self._logReader.signals.linesDropped.connect(self._linesDropped)
+        self._logReader.signals.connectionLost.connect(self._connectionLost)
+        self._logReader.signals.connectionRestored.connect(self._connectionRestored)
         self._logReader.start()
 
     def stopCapture(self):
@@ -127,11 +162,23 @@ class LogMessagesPanel(Widget):
     def setLiveReloadEnabled(self, enabled: bool):
         self._liveReload = enabled
 
-    def _lineRead(self, line: LogLine):
-        self._logMessagesTable.addLogLine(line)
+    def _linesRead(self, lines: List[LogLine]):
+        self._logMessagesTable.addLogLines(lines)
+
+    def _linesDropped(self, count: int):
+        msg = f"{count} line(s) dropped: log viewer can't keep up with the log rate"
+        self._addOwnLogLine(msg)
+
+    def _connectionLost(self):
+        self._addOwnLogLine("Connection to the device lost. Reconnecting...")
+
+    def _connectionRestored(self, latency: float):
+        msg = f"Connection to the device restored in {latency:.1f} sec"
+        self._addOwnLogLine(msg)
 
     def _addOwnLogLine(self, message: str):
-        logLine = LogLine("GALog", "S", message, -1)
+        timestamp = time.time_ns()
+        logLine = LogLine("GALog", "S", message, -1, -1, timestamp)
         self._logMessagesTable.addLogLine(logLine)
 
     def _appStarted(self, packageName: str):
@@ -160,6 +207,16 @@ class LogMessagesPanel(Widget):
     def clearLogLines(self):
         self._logMessagesTable.clearLogLines()
 
+    def _applyMaxLogLines(self):
+        settings = readSettings().logViewer
+        self._logMessagesTable.setMaxLogLines(settings.maxLines)
+        memoryMaxLines = settings.memoryMaxLines if settings.spillToDisk else 0
+        self._logMessagesTable.setMemoryMaxLogLines(memoryMaxLines)
+
+    def _logLinesEvicted(self, count: int):
+        self._filterRowBackup.trim(count)
+        self._originalRowBackup.trim(count)
+
     def setHighlightingEnabled(self, enabled: bool):
         self._logMessagesTable.setHighlightingEnabled(enabled)
 
@@ -196,7 +253,8 @@ class LogMessagesPanel(Widget):
         assert self.hasLogMessages(), "At least 1 row must be present"
         if self._logMessagesTable.hasSelectedItems():
             selectedRows = self._logMessagesTable.selectedRows()
-            self._originalRowBackup.setValue(selectedRows[0])
+            row = self._logMessagesTable.dataModelRow(selectedRows[0])
+            self._originalRowBackup.setValue(row)
         else:
             self._originalRowBackup.setValue(0)
 
@@ -295,6 +353,7 @@ class LogMessagesPanel(Widget):
         action = ReadLogFileAction(filePath, self)
         action.setLoadingDialogText("Reading log file")
         action.lineRead.connect(self._logLineRead)
+        self._applyMaxLogLines()
         with self._logMessagesTable.enterBatchMode():
             action.readLogFile()
 
@@ -319,7 +378,8 @@ class LogMessagesPanel(Widget):
         #
 
         selectedRow = self._firstSelectedRow()
-        self._filterRowBackup.setValue(selectedRow)
+        dataModelRow = self._logMessagesTable.dataModelRow(selectedRow)
+        self._filterRowBackup.setValue(dataModelRow)
 
         #
         # Resolve original row to jump, when quick filter will be disabled
@@ -337,9 +397,13 @@ class LogMessagesPanel(Widget):
         self._logMessagesTable.selectRow(originalRow, ScrollHint.PositionAtCenter)
         self._logMessagesTable.startRowBlinking(originalRow)
 
+    def _backupViewRow(self, backup: RowBackup):
+        row = self._logMessagesTable.viewRow(backup.getValue())
+        return max(row, 0)
+
     def _jumpBackToFilterView(self):
         self.enableQuickFilter(saveRow=False)
-        row = self._filterRowBackup.getValue()
+        row = self._backupViewRow(self._filterRowBackup)
         self._logMessagesTable.selectRow(row)
         self._logMessagesTable.startRowBlinking(row)
         self._logMessagesTable.setFocus()
@@ -350,7 +414,7 @@ class LogMessagesPanel(Widget):
             self.disableQuickFilter()
 
         if not self._originalRowBackup.empty():
-            row = self._originalRowBackup.getValue()
+            row = self._backupViewRow(self._originalRowBackup)
             self._logMessagesTable.selectRow(row, ScrollHint.PositionAtCenter)
             self._originalRowBackup.delete()
 
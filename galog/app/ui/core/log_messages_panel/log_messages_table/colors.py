@@ -1,5 +1,7 @@
 from PyQt5.QtGui import QColor
 
+from .log_store import LEVEL_NAMES
+
 
 def rowSelectedColor():
     return QColor("#EBF8FF")
@@ -37,3 +39,15 @@ def logLevelColorDarker(logLevel: str):
         return QColor("#66A262")
     else:  # logLevel == "S":
         return QColor("#838383")
+
+
+#
+# Colors of the rows by level code. Built once,
+# as rows are painted all the time
+#
+
+_LEVEL_CODE_COLORS = [logLevelColor(level) for level in LEVEL_NAMES]
+
+
+def logLevelCodeColor(levelCode: int):
+    return _LEVEL_CODE_COLORS[levelCode]
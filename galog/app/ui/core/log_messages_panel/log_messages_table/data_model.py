@@ -1,13 +1,13 @@
 from contextlib import contextmanager
 from dataclasses import dataclass
 from enum import Enum, auto
-from typing import List
+from typing import Callable, List
 
-from PyQt5.QtCore import QModelIndex, Qt
-from PyQt5.QtGui import QStandardItem, QStandardItemModel
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt, pyqtSignal
 
 from galog.app.log_reader import LogLine
 
+from .log_store import LogStore
 from .pattern_search_task import PatternSearchResult
 
 
@@ -29,73 +29,235 @@ class Column(int, Enum):
     logMessage = auto()
 
 
-class DataModel(QStandardItemModel):
+#
+# When the line limit is reached, the oldest rows are evicted
+# in chunks of 1/16 of the limit, so views and proxy models
+# are not updated on every added line
+#
+
+EVICT_CHUNK_DIVISOR = 16
+
+#
+# Tag and level cells also provide their codes.
+# Codes are compared much faster than the strings
+#
+
+CODE_ROLE = Qt.UserRole + 1
+
+
+class DataModel(QAbstractTableModel):
+    rowsAboutToBeEvicted = pyqtSignal(int)
+    rowsEvicted = pyqtSignal(int)
+
+    _store: LogStore
+
     def __init__(self):
-        super().__init__(0, len(Column))
-        labels = ["Tag", "Level", "Message"]
-        self.setHorizontalHeaderLabels(labels)
+        super().__init__()
+        self._headerLabels = ["Tag", "Level", "Message"]
+        self._store = LogStore()
+        self._batchMode = False
+        self._maxLines = 0
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()):
+        if parent.isValid():
+            return 0
+
+        return len(self._store)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()):
+        if parent.isValid():
+            return 0
+
+        return len(Column)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self._headerLabels[section]
+
+        return super().headerData(section, orientation, role)
 
     def flags(self, index: QModelIndex):
         default_flags = super().flags(index)
         return default_flags & ~Qt.ItemIsEditable
 
+    def _cellText(self, row: int, column: int):
+        if column == Column.tagName:
+            return self._store.tag(row)
+        elif column == Column.logLevel:
+            return self._store.level(row)
+        else:  # Column.logMessage
+            return self._store.msg(row)
+
+    def _cellCode(self, row: int, column: int):
+        if column == Column.tagName:
+            return self._store.tagCode(row)
+        elif column == Column.logLevel:
+            return self._store.levelCode(row)
+        else:  # Column.logMessage
+            return None
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        if role == Qt.DisplayRole or role == Qt.EditRole:
+            return self._cellText(index.row(), index.column())
+
+        if role == CODE_ROLE:
+            return self._cellCode(index.row(), index.column())
+
+        if role == Qt.UserRole and index.column() == Column.logMessage:
+            return self.highlightingData(index.row())
+
+        return None
+
+    def setData(self, index: QModelIndex, value, role: int = Qt.EditRole):
+        if not index.isValid():
+            return False
+
+        # Only highlighting data is writable
+        if role != Qt.UserRole or index.column() != Column.logMessage:
+            return False
+
+        self._store.setAnnotation(index.row(), value)
+        return True
+
     def addLogLine(self, logLine: LogLine):
-        itemTagName = QStandardItem(logLine.tag)
-        itemLogLevel = QStandardItem(logLine.level)
-        itemLogMessage = QStandardItem(logLine.msg)
-
-        data = HighlightingData(
-            state=LazyHighlightingState.pending,
-            items=[],
-        )
-
-        # Use this to store data for highlighting
-        itemLogMessage.setData(data, Qt.UserRole)
-
-        self.appendRow(
-            [
-                itemTagName,
-                itemLogLevel,
-                itemLogMessage,
-            ]
-        )
+        self.addLogLines([logLine])
+
+    def maxLines(self):
+        return self._maxLines
+
+    def setMaxLines(self, maxLines: int):
+        #
+        # Turns the model into a ring buffer of 'maxLines' rows.
+        # Zero means no limit
+        #
+
+        assert maxLines >= 0, "Line limit must not be negative"
+        self._maxLines = maxLines
+        self._evictRows(0)
+
+    def memoryMaxLines(self):
+        return self._store.memoryMaxRows()
+
+    def setMemoryMaxLines(self, maxLines: int):
+        #
+        # Older lines are kept on disk and paged back when viewed.
+        # Zero means all the lines are kept in memory
+        #
+
+        self._store.setMemoryMaxRows(maxLines)
+
+    def _evictCount(self, newLineCount: int):
+        if self._maxLines == 0:
+            return 0
+
+        excess = len(self._store) + newLineCount - self._maxLines
+        if excess <= 0:
+            return 0
+
+        excess += self._maxLines // EVICT_CHUNK_DIVISOR
+        return min(excess, len(self._store))
+
+    def _evictRows(self, newLineCount: int):
+        count = self._evictCount(newLineCount)
+        if count == 0:
+            return
+
+        #
+        # Proxy models drop their rows already on 'rowsAboutToBeRemoved',
+        # so the views get a chance to save their state before that
+        #
+
+        self.rowsAboutToBeEvicted.emit(count)
+        if self._batchMode:
+            self._removeFirstRows(count)
+        else:
+            self.beginRemoveRows(QModelIndex(), 0, count - 1)
+            self._removeFirstRows(count)
+            self.endRemoveRows()
+
+        self.rowsEvicted.emit(count)
+
+    def _removeFirstRows(self, count: int):
+        self._store.removeFirst(count)
+
+    def addLogLines(self, logLines: List[LogLine]):
+        if not logLines:
+            return
+
+        if self._maxLines > 0 and len(logLines) > self._maxLines:
+            logLines = logLines[-self._maxLines :]
+
+        self._evictRows(len(logLines))
+        if self._batchMode:
+            self._appendLogLines(logLines)
+            return
+
+        first = len(self._store)
+        last = first + len(logLines) - 1
+        self.beginInsertRows(QModelIndex(), first, last)
+        self._appendLogLines(logLines)
+        self.endInsertRows()
+
+    def _appendLogLines(self, logLines: List[LogLine]):
+        self._store.append(logLines)
 
     def highlightingData(self, row: int):
-        return self.item(row, Column.logMessage).data(Qt.UserRole)
+        #
+        # Highlighting data is created lazily,
+        # when a row is painted for the first time
+        #
+
+        data = self._store.annotation(row)
+        if data is None:
+            data = HighlightingData(
+                state=LazyHighlightingState.pending,
+                items=[],
+            )
+            self._store.setAnnotation(row, data)
+
+        return data
 
     @contextmanager
     def enterBatchMode(self):
         try:
             self.beginResetModel()
-            self.blockSignals(True)
+            self._batchMode = True
             yield
 
         finally:
-            self.blockSignals(False)
+            self._batchMode = False
             self.endResetModel()
 
     def clearLogLines(self):
-        self.removeRows(0, self.rowCount())
+        if self._batchMode:
+            self._clearLogLines()
+            return
+
+        if len(self._store) == 0:
+            return
+
+        self.beginRemoveRows(QModelIndex(), 0, len(self._store) - 1)
+        self._clearLogLines()
+        self.endRemoveRows()
+
+    def _clearLogLines(self):
+        self._store.clear()
 
     def logLines(self):
         for row in range(self.rowCount()):
             yield self.logLine(row)
 
     def logLine(self, row: int):
-        return LogLine(
-            level=self.item(row, Column.logLevel).text(),
-            msg=self.item(row, Column.logMessage).text(),
-            tag=self.item(row, Column.tagName).text(),
-            pid=-1,
-        )
+        return self._store.logLine(row)
 
     def logMessage(self, row: int):
-        return self.item(row, Column.logMessage).text()
+        return self._store.msg(row)
 
     def uniqueTagNames(self) -> List[str]:
-        result = set()
-        for i in range(self.rowCount()):
-            item = self.item(i, Column.tagName.value)
-            result.add(item.text())
+        return self._store.uniqueTags()
 
-        return list(result)
+    def tagCodePredicate(self, fn: Callable[[str], bool]):
+        return self._store.tagCodePredicate(fn)
@@ -1,11 +1,18 @@
 from typing import List, Optional
 
-from PyQt5.QtCore import QModelIndex, QObject, QRectF, Qt, QThreadPool
+from PyQt5.QtCore import (
+    QAbstractItemModel,
+    QModelIndex,
+    QObject,
+    QPersistentModelIndex,
+    QRectF,
+    Qt,
+    QThreadPool,
+)
 from PyQt5.QtGui import (
     QFont,
     QFontMetrics,
     QPainter,
-    QStandardItemModel,
     QTextCharFormat,
     QTextCursor,
     QTextDocument,
@@ -14,12 +21,12 @@ from PyQt5.QtWidgets import QStyle, QStyledItemDelegate, QStyleOptionViewItem
 
 from galog.app.hrules import HRulesStorage
 from galog.app.ui.core.log_messages_panel.log_messages_table.colors import (
-    logLevelColor,
+    logLevelCodeColor,
     rowSelectedColor,
 )
 from galog.app.ui.helpers.painter import painterSaveRestore
 
-from .data_model import Column, HighlightingData, LazyHighlightingState
+from .data_model import CODE_ROLE, Column, HighlightingData, LazyHighlightingState
 from .pattern_search_task import (
     PatternSearchItem,
     PatternSearchResult,
@@ -102,7 +109,7 @@ class LogLineDelegate(QStyledItemDelegate):
         index: QModelIndex,
     ):
         model = index.model()
-        logLevel = model.index(index.row(), Column.logLevel).data()
+        levelCode = model.index(index.row(), Column.logLevel).data(CODE_ROLE)
 
         inverted = False
         if self._rowBlinkingAnimation is not None:
@@ -112,14 +119,14 @@ class LogLineDelegate(QStyledItemDelegate):
 
         if inverted:
             if option.state & QStyle.State_Selected:
-                color = logLevelColor(logLevel)
+                color = logLevelCodeColor(levelCode)
             else:
                 color = rowSelectedColor()
         else:
             if option.state & QStyle.State_Selected:
                 color = rowSelectedColor()
             else:
-                color = logLevelColor(logLevel)
+                color = logLevelCodeColor(levelCode)
 
         painter.fillRect(option.rect, color)
 
@@ -211,13 +218,22 @@ class LogLineDelegate(QStyledItemDelegate):
         cursor.setCharFormat(charFormat)
 
     def _lazyHighlightingDataReady(
-        self, index: QModelIndex, results: List[PatternSearchResult]
+        self, persistentIndex: QPersistentModelIndex, results: List[PatternSearchResult]
     ):
+        #
+        # The row may have been evicted or cleared
+        # while the highlighting task was running
+        #
+
+        if not persistentIndex.isValid():
+            return
+
         data = HighlightingData(
             state=LazyHighlightingState.done,
             items=results,
         )
 
+        index = QModelIndex(persistentIndex)
         model = index.model()
         model.setData(index, data, Qt.UserRole)
         model.dataChanged.emit(index, index)
@@ -238,11 +254,14 @@ class LogLineDelegate(QStyledItemDelegate):
             items.append(item)
 
         task = PatternSearchTask(index.data(), items)
-        onFinished = lambda results: self._lazyHighlightingDataReady(index, results)
+        persistentIndex = QPersistentModelIndex(index)
+        onFinished = lambda results: self._lazyHighlightingDataReady(
+            persistentIndex, results
+        )
         task.signals.finished.connect(onFinished)
         QThreadPool.globalInstance().start(task)
 
-    def startRowBlinking(self, row: int, model: QStandardItemModel):
+    def startRowBlinking(self, row: int, model: QAbstractItemModel):
         self._rowBlinkingAnimation = RowBlinkingAnimation(row, model)
         self._rowBlinkingAnimation.finished.connect(self._deleteAnimation)
         self._rowBlinkingAnimation.startBlinking()
@@ -28,7 +28,7 @@ from galog.app.ui.helpers.painter import painterSaveRestore
 from galog.app.ui.reusable.fn_filter_model import FnFilterModel
 from galog.app.ui.reusable.regexp_filter_model import RegExpFilterModel
 
-from .data_model import Column, DataModel
+from .data_model import CODE_ROLE, Column, DataModel
 from .log_line_delegate import LogLineDelegate
 from .msg_view_dialog import LogMessageViewDialog
 from .navigation_frame import NavigationFrame
@@ -83,6 +83,7 @@ class LogMessagesTable(TableView):
     requestShowLineDetails = pyqtSignal(QModelIndex)
     requestCopyLogLines = pyqtSignal()
     requestCopyLogMessages = pyqtSignal()
+    logLinesEvicted = pyqtSignal(int)
 
     def mousePressEvent(self, event: QMouseEvent) -> None:
         if event.button() == Qt.XButton1:
@@ -122,6 +123,7 @@ class LogMessagesTable(TableView):
         self._initUserInterface()
         self._initUserInputHandlers()
         self._scrolling = True
+        self._topVisibleRow = -1
 
     def setLogViewerFont(self, font: QFont):
         boldFont = QFont(font)
@@ -172,6 +174,8 @@ class LogMessagesTable(TableView):
         self._topModel().rowsAboutToBeInserted.connect(self._beforeRowInserted)
         self._topModel().rowsInserted.connect(self._afterRowInserted)
         self._dataModel.rowsInserted.connect(self._rowsInserted)
+        self._dataModel.rowsAboutToBeEvicted.connect(self._beforeRowsEvicted)
+        self._dataModel.rowsEvicted.connect(self._afterRowsEvicted)
         self._navigationFrame.upArrowButton.clicked.connect(self._navScrollTop)  # fmt: skip
         self._navigationFrame.downArrowButton.clicked.connect(self._navScrollBottom)  # fmt: skip
         self.requestShowLineDetails.connect(self._rowActivated)
@@ -210,6 +214,7 @@ class LogMessagesTable(TableView):
         self._dataModel = DataModel()
         self._advancedFilterModel = FnFilterModel()
         self._advancedFilterModel.setFilteringColumn(Column.tagName.value)
+        self._advancedFilterModel.setFilteringRole(CODE_ROLE)
         self._advancedFilterModel.setSourceModel(self._dataModel)
         self._quickFilterModel = RegExpFilterModel()
         self._quickFilterModel.setFilteringColumn(Column.logMessage.value)
@@ -265,6 +270,31 @@ class LogMessagesTable(TableView):
         if self._scrolling:
             self.scrollToBottom()
 
+    def _beforeRowsEvicted(self):
+        #
+        # The oldest rows are removed from the top of the model.
+        # Remember the first visible row to keep it in place,
+        # unless the view follows the new lines at the bottom
+        #
+
+        self._topVisibleRow = -1
+        vbar = self.verticalScrollBar()
+        if vbar.value() == vbar.maximum():
+            return
+
+        topIndex = self.indexAt(QPoint(0, 0))
+        if topIndex.isValid():
+            self._topVisibleRow = self.dataModelRow(topIndex.row())
+
+    def _afterRowsEvicted(self, count: int):
+        if self._topVisibleRow >= count:
+            row = self.viewRow(self._topVisibleRow - count)
+            index = self._topModel().index(row, 0)
+            if index.isValid():
+                self.scrollTo(index, QTableView.PositionAtTop)
+
+        self.logLinesEvicted.emit(count)
+
     #####
 
     def resizeEvent(self, e: QResizeEvent):
@@ -295,6 +325,9 @@ class LogMessagesTable(TableView):
     def addLogLine(self, logLine: LogLine):
         self._dataModel.addLogLine(logLine)
 
+    def addLogLines(self, logLines: List[LogLine]):
+        self._dataModel.addLogLines(logLines)
+
     def clearLogLines(self):
         with self._dataModel.enterBatchMode():
             self._dataModel.clearLogLines()
@@ -302,10 +335,17 @@ class LogMessagesTable(TableView):
     def enterBatchMode(self):
         return self._dataModel.enterBatchMode()
 
+    def setMaxLogLines(self, maxLines: int):
+        self._dataModel.setMaxLines(maxLines)
+
+    def setMemoryMaxLogLines(self, maxLines: int):
+        self._dataModel.setMemoryMaxLines(maxLines)
+
     #####
 
     def advancedFilterApply(self, fn: Callable[[str], bool]):
-        self._advancedFilterModel.setFilteringFn(fn)
+        predicate = self._dataModel.tagCodePredicate(fn)
+        self._advancedFilterModel.setFilteringFn(predicate)
 
     def advancedFilterReset(self):
         self._advancedFilterModel.setFilteringEnabled(False)
@@ -346,16 +386,26 @@ class LogMessagesTable(TableView):
 
     #####
 
-    def _dataModelRow(self, row: int):
+    def dataModelRow(self, row: int):
         index2 = self._quickFilterModel.index(row, 0)
         index1 = self._quickFilterModel.mapToSource(index2)
         index0 = self._advancedFilterModel.mapToSource(index1)
         return index0.row()
 
+    def viewRow(self, dataModelRow: int):
+        #
+        # Returns -1, if the row is hidden by filters
+        #
+
+        index0 = self._dataModel.index(dataModelRow, 0)
+        index1 = self._advancedFilterModel.mapFromSource(index0)
+        index2 = self._quickFilterModel.mapFromSource(index1)
+        return index2.row()
+
     def selectedLogLines(self) -> List[LogLine]:
         result = []
         for row in self.selectedRows():
-            realRow = self._dataModelRow(row)
+            realRow = self.dataModelRow(row)
             result.append(self._dataModel.logLine(realRow))
 
         return result
@@ -363,7 +413,7 @@ class LogMessagesTable(TableView):
     def selectedLogMessages(self) -> List[str]:
         result = []
         for row in self.selectedRows():
-            realRow = self._dataModelRow(row)
+            realRow = self.dataModelRow(row)
             result.append(self._dataModel.logMessage(realRow))
 
         return result
@@ -395,5 +445,5 @@ class LogMessagesTable(TableView):
         dialog.exec_()
 
     def _rowActivated(self, index: QModelIndex):
-        dataModelRow = self._dataModelRow(index.row())
+        dataModelRow = self.dataModelRow(index.row())
         self._showLogLineDetails(dataModelRow)
@@ -0,0 +1,525 @@
+import struct
+from array import array
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from itertools import accumulate, chain
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple, Union
+
+from galog.app.log_reader import LogLine
+
+from .segment_file import SegmentFile
+
+#
+# Column store of the log lines. Instead of an object per line,
+# each field is kept in its own column: tags and levels as codes,
+# process/thread ids and timestamps as machine integers,
+# messages as a list of strings.
+#
+# A capture has a few hundred distinct tags at most, so each tag
+# is stored once in the tag dictionary and rows keep its code.
+# Levels are single-byte codes. Decoded strings are shared by all the rows.
+#
+# Columns are split into chunks of a fixed size, so the oldest lines
+# are evicted by dropping whole chunks, without moving the rest.
+# Rows, evicted from the first chunk, are skipped by an offset.
+#
+# Besides the fields, a row may have an annotation (any object),
+# which is created lazily and is kept in a dictionary of its chunk.
+#
+# Line counts of each tag and level are kept up to date on insert
+# and eviction, so the tag list and tag statistics don't need a pass
+# over all the rows.
+#
+# Optionally, only the most recent chunks are kept in memory. Older ones
+# are spilled to append-only segment files and replaced by a reference
+# to their location (offset index). Rows of spilled chunks are paged back
+# through an LRU cache, a chunk at a time. Annotations are not spilled,
+# so they are created again, when needed
+#
+
+CHUNK_SHIFT = 12
+CHUNK_ROWS = 1 << CHUNK_SHIFT
+CHUNK_MASK = CHUNK_ROWS - 1
+
+PAGE_CACHE_CHUNKS = 32
+SEGMENT_MAX_BYTES = 64 * 1024 * 1024
+
+#
+# Spilled chunk header: row count and size of the messages
+#
+
+_CHUNK_HEADER = struct.Struct("<II")
+_CHUNK_FIXED_ROW_BYTES = sum(array(t).itemsize for t in "IiiqI") + 1
+
+#
+# Level codes follow the importance of the levels,
+# the code of an unknown level is zero
+#
+
+LEVEL_NAMES = "?VDIWEFS"
+LEVEL_UNKNOWN = 0
+LEVEL_CODE_TABLE = bytes(
+    max(LEVEL_NAMES.find(chr(i)), LEVEL_UNKNOWN) for i in range(256)
+)
+
+
+@dataclass
+class TagStats:
+    tag: str
+    count: int
+    levelCounts: Dict[str, int]
+
+
+class _Chunk:
+    __slots__ = (
+        "tags",
+        "levels",
+        "msgs",
+        "pids",
+        "tids",
+        "timestamps",
+        "annotations",
+    )
+
+    tags: array
+    levels: bytearray
+    msgs: List[str]
+    pids: array
+    tids: array
+    timestamps: array
+    annotations: Dict[int, Any]
+
+    def __init__(self) -> None:
+        self.tags = array("I")
+        self.levels = bytearray()
+        self.msgs = []
+        self.pids = array("i")
+        self.tids = array("i")
+        self.timestamps = array("q")
+        self.annotations = {}
+
+    def __len__(self):
+        return len(self.levels)
+
+    def extend(
+        self,
+        logLines: List[LogLine],
+        tags: List[int],
+        levels: bytes,
+        pidCodes: "_PidCodes",
+    ):
+        #
+        # List comprehensions are the fastest way to read slots.
+        # Arrays take the lists at once. A process id
+        # is parsed only the first time it's seen
+        #
+
+        self.tags.fromlist(tags)
+        self.levels.extend(levels)
+        self.msgs.extend([line.msg for line in logLines])
+        self.pids.fromlist([pidCodes[line.pid] for line in logLines])
+        self.tids.fromlist([line.tid for line in logLines])
+        self.timestamps.fromlist([line.timestamp for line in logLines])
+
+    def toBytes(self):
+        #
+        # Layout: header, fixed-size columns (message end offsets
+        # among them), levels, messages. Fixed-size columns go first,
+        # so they can be read without the messages
+        #
+
+        msgs = [msg.encode("utf-8", "surrogatepass") for msg in self.msgs]
+        msgEnds = array("I", accumulate(map(len, msgs)))
+        msgBlob = b"".join(msgs)
+
+        return b"".join(
+            [
+                _CHUNK_HEADER.pack(len(msgs), len(msgBlob)),
+                self.tags.tobytes(),
+                self.pids.tobytes(),
+                self.tids.tobytes(),
+                self.timestamps.tobytes(),
+                msgEnds.tobytes(),
+                self.levels,
+                msgBlob,
+            ]
+        )
+
+    @staticmethod
+    def fromBytes(data: bytes, withMessages: bool = True):
+        chunk = _Chunk()
+        rows, _ = _CHUNK_HEADER.unpack_from(data)
+        view = memoryview(data)
+        pos = _CHUNK_HEADER.size
+
+        msgEnds = array("I")
+        columns = [chunk.tags, chunk.pids, chunk.tids, chunk.timestamps, msgEnds]
+        for column in columns:
+            end = pos + rows * column.itemsize
+            column.frombytes(view[pos:end])
+            pos = end
+
+        chunk.levels.extend(view[pos : pos + rows])
+        if not withMessages:
+            return chunk
+
+        msgBlob = view[pos + rows :]
+        msgStarts = chain((0,), msgEnds)
+        chunk.msgs = [
+            str(msgBlob[begin:end], "utf-8", "surrogatepass")
+            for begin, end in zip(msgStarts, msgEnds)
+        ]
+
+        return chunk
+
+
+class _SpilledChunk:
+    __slots__ = ("segment", "offset", "size", "rows")
+
+    def __init__(self, segment: SegmentFile, offset: int, size: int, rows: int):
+        self.segment = segment
+        self.offset = offset
+        self.size = size
+        self.rows = rows
+
+    def __len__(self):
+        return self.rows
+
+    def load(self, withMessages: bool = True):
+        size = self.size
+        if not withMessages:
+            size = _CHUNK_HEADER.size + self.rows * _CHUNK_FIXED_ROW_BYTES
+
+        data = self.segment.read(self.offset, size)
+        return _Chunk.fromBytes(data, withMessages)
+
+
+class _PageCache:
+    _pages: "OrderedDict[_SpilledChunk, _Chunk]"
+
+    def __init__(self, capacity: int) -> None:
+        self._pages = OrderedDict()
+        self._capacity = capacity
+
+    def load(self, spilled: _SpilledChunk):
+        chunk = self._pages.get(spilled)
+        if chunk is not None:
+            self._pages.move_to_end(spilled)
+            return chunk
+
+        chunk = spilled.load()
+        self._pages[spilled] = chunk
+        if len(self._pages) > self._capacity:
+            self._pages.popitem(last=False)
+
+        return chunk
+
+    def peek(self, spilled: _SpilledChunk):
+        #
+        # Columns of a chunk, which is not going to be viewed.
+        # Messages are not loaded and the cache is not affected
+        #
+
+        chunk = self._pages.get(spilled)
+        if chunk is not None:
+            return chunk
+
+        return spilled.load(withMessages=False)
+
+    def discard(self, spilled: _SpilledChunk):
+        self._pages.pop(spilled, None)
+
+    def clear(self):
+        self._pages.clear()
+
+
+class _TagCodes(Dict[str, int]):
+    _names: List[str]
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._names = []
+
+    def __missing__(self, tag: str):
+        code = self[tag] = len(self._names)
+        self._names.append(tag)
+        return code
+
+    def name(self, code: int):
+        return self._names[code]
+
+
+class _PidCodes(Dict[Union[str, int], int]):
+    def __missing__(self, pid: Union[str, int]):
+        code = self[pid] = int(pid)
+        return code
+
+
+class _TagIndex:
+    #
+    # Line counts by tag code and level code. Counting of the added lines
+    # is done by Counter in C. Pairs without lines are removed, so the index
+    # size is proportional to the number of tags in the store
+    #
+
+    _counts: "Counter[Tuple[int, int]]"
+
+    def __init__(self) -> None:
+        self._counts = Counter()
+
+    def add(self, tags: Sequence[int], levels: Sequence[int]):
+        self._counts.update(zip(tags, levels))
+
+    def remove(self, tags: Sequence[int], levels: Sequence[int]):
+        for key, count in Counter(zip(tags, levels)).items():
+            remaining = self._counts[key] - count
+            if remaining > 0:
+                self._counts[key] = remaining
+            else:
+                del self._counts[key]
+
+    def clear(self):
+        self._counts.clear()
+
+    def tagCodes(self):
+        return {tag for tag, _ in self._counts}
+
+    def levelCounts(self):
+        levelCounts: Dict[int, Dict[int, int]] = {}
+        for (tag, level), count in self._counts.items():
+            levelCounts.setdefault(tag, {})[level] = count
+
+        return levelCounts
+
+
+class LogStore:
+    _chunks: List[Union[_Chunk, _SpilledChunk]]
+    _segment: Optional[SegmentFile]
+
+    def __init__(self) -> None:
+        self._chunks = []
+        self._offset = 0
+        self._count = 0
+        self._tagCodes = _TagCodes()
+        self._pidCodes = _PidCodes()
+        self._tagIndex = _TagIndex()
+        self._memoryMaxRows = 0
+        self._spilled = 0
+        self._segment = None
+        self._pages = _PageCache(PAGE_CACHE_CHUNKS)
+
+    def __len__(self):
+        return self._count
+
+    def _locate(self, row: int):
+        pos = row + self._offset
+        chunk = self._chunks[pos >> CHUNK_SHIFT]
+        if type(chunk) is _SpilledChunk:
+            chunk = self._pages.load(chunk)
+
+        return chunk, pos & CHUNK_MASK
+
+    def memoryMaxRows(self):
+        return self._memoryMaxRows
+
+    def setMemoryMaxRows(self, count: int):
+        #
+        # Rows beyond the limit are spilled to disk.
+        # Zero means everything is kept in memory
+        #
+
+        assert count >= 0, "Row limit must not be negative"
+        self._memoryMaxRows = count
+        self._spillChunks()
+
+    def _spillChunk(self, index: int):
+        chunk = self._chunks[index]
+        data = chunk.toBytes()
+        if self._segment is None or self._segment.size() >= SEGMENT_MAX_BYTES:
+            self._segment = SegmentFile()
+
+        offset = self._segment.append(data)
+        spilled = _SpilledChunk(self._segment, offset, len(data), len(chunk))
+        self._chunks[index] = spilled
+
+    def _spillChunks(self):
+        #
+        # The last chunk is being filled, so it always stays in memory
+        #
+
+        if self._memoryMaxRows == 0:
+            return
+
+        memoryChunks = max(1, self._memoryMaxRows >> CHUNK_SHIFT)
+        while len(self._chunks) - self._spilled > memoryChunks:
+            self._spillChunk(self._spilled)
+            self._spilled += 1
+
+    def _releaseSpilled(self, spilled: _SpilledChunk):
+        self._pages.discard(spilled)
+        if spilled.segment.release():
+            return
+
+        spilled.segment.close()
+        if spilled.segment is self._segment:
+            self._segment = None
+
+    def append(self, logLines: List[LogLine]):
+        #
+        # Tags and levels are encoded for the whole batch at once.
+        # Only new tags take the slow path of the tag dictionary
+        #
+
+        tagCodes = self._tagCodes
+        tags = [tagCodes[line.tag] for line in logLines]
+        levels = "".join([line.level for line in logLines])
+        levels = levels.encode("ascii", "replace").translate(LEVEL_CODE_TABLE)
+        self._tagIndex.add(tags, levels)
+
+        begin = 0
+        while begin < len(logLines):
+            if not self._chunks or len(self._chunks[-1]) == CHUNK_ROWS:
+                self._chunks.append(_Chunk())
+
+            chunk = self._chunks[-1]
+            end = begin + CHUNK_ROWS - len(chunk)
+            chunk.extend(
+                logLines[begin:end],
+                tags[begin:end],
+                levels[begin:end],
+                self._pidCodes,
+            )
+            begin = end
+
+        self._count += len(logLines)
+        self._spillChunks()
+
+    def _unindexFirst(self, count: int):
+        begin = self._offset
+        for chunk in self._chunks:
+            if count == 0:
+                break
+
+            if type(chunk) is _SpilledChunk:
+                chunk = self._pages.peek(chunk)
+
+            end = min(len(chunk), begin + count)
+            self._tagIndex.remove(chunk.tags[begin:end], chunk.levels[begin:end])
+            count -= end - begin
+            begin = 0
+
+    def removeFirst(self, count: int):
+        assert 0 <= count <= self._count, "Invalid row count"
+        if count == self._count:
+            self.clear()
+            return
+
+        self._unindexFirst(count)
+        self._offset += count
+        self._count -= count
+
+        drop = self._offset >> CHUNK_SHIFT
+        if drop > 0:
+            for spilled in self._chunks[: min(drop, self._spilled)]:
+                self._releaseSpilled(spilled)
+
+            self._spilled = max(0, self._spilled - drop)
+            del self._chunks[:drop]
+            self._offset &= CHUNK_MASK
+
+    def clear(self):
+        #
+        # Tag codes are kept, so they stay valid
+        # for the whole lifetime of the store
+        #
+
+        segments: Set[SegmentFile] = set()
+        for spilled in self._chunks[: self._spilled]:
+            segments.add(spilled.segment)
+
+        for segment in segments:
+            segment.close()
+
+        self._chunks.clear()
+        self._pages.clear()
+        self._pidCodes.clear()
+        self._tagIndex.clear()
+        self._segment = None
+        self._spilled = 0
+        self._offset = 0
+        self._count = 0
+
+    def tag(self, row: int):
+        chunk, i = self._locate(row)
+        return self._tagCodes.name(chunk.tags[i])
+
+    def tagCode(self, row: int):
+        chunk, i = self._locate(row)
+        return chunk.tags[i]
+
+    def tagName(self, code: int):
+        return self._tagCodes.name(code)
+
+    def level(self, row: int):
+        chunk, i = self._locate(row)
+        return LEVEL_NAMES[chunk.levels[i]]
+
+    def levelCode(self, row: int):
+        chunk, i = self._locate(row)
+        return chunk.levels[i]
+
+    def msg(self, row: int):
+        chunk, i = self._locate(row)
+        return chunk.msgs[i]
+
+    def logLine(self, row: int):
+        chunk, i = self._locate(row)
+        return LogLine(
+            tag=self._tagCodes.name(chunk.tags[i]),
+            level=LEVEL_NAMES[chunk.levels[i]],
+            msg=chunk.msgs[i],
+            pid=str(chunk.pids[i]),
+            tid=chunk.tids[i],
+            timestamp=chunk.timestamps[i],
+        )
+
+    def annotation(self, row: int):
+        chunk, i = self._locate(row)
+        return chunk.annotations.get(i)
+
+    def setAnnotation(self, row: int, value: Any):
+        chunk, i = self._locate(row)
+        chunk.annotations[i] = value
+
+    def uniqueTags(self):
+        return [self._tagCodes.name(code) for code in self._tagIndex.tagCodes()]
+
+    def tagStats(self):
+        stats: List[TagStats] = []
+        for code, levelCounts in self._tagIndex.levelCounts().items():
+            stats.append(
+                TagStats(
+                    tag=self._tagCodes.name(code),
+                    count=sum(levelCounts.values()),
+                    levelCounts={LEVEL_NAMES[l]: n for l, n in levelCounts.items()},
+                )
+            )
+
+        return stats
+
+    def tagCodePredicate(self, fn: Callable[[str], bool]) -> Callable[[int], bool]:
+        #
+        # Tag codes never change, so the predicate
+        # is evaluated once per tag, not once per row
+        #
+
+        results: Dict[int, bool] = {}
+
+        def predicate(code: int):
+            result = results.get(code)
+            if result is None:
+                result = results[code] = fn(self._tagCodes.name(code))
+
+            return result
+
+        return predicate
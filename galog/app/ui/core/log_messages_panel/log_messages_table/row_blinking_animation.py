@@ -1,5 +1,11 @@
-from PyQt5.QtCore import QObject, QRunnable, QThread, QThreadPool, pyqtSignal
-from PyQt5.QtGui import QStandardItemModel
+from PyQt5.QtCore import (
+    QAbstractItemModel,
+    QObject,
+    QRunnable,
+    QThread,
+    QThreadPool,
+    pyqtSignal,
+)
 
 from .data_model import Column
 
@@ -42,7 +48,7 @@ class BlinkingTimerTask(QRunnable):
 class RowBlinkingAnimation(QObject):
     finished = pyqtSignal()
 
-    def __init__(self, row: int, model: QStandardItemModel) -> None:
+    def __init__(self, row: int, model: QAbstractItemModel) -> None:
         super().__init__()
         self._model = model
         self._inverted = False
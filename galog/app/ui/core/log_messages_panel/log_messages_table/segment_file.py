@@ -0,0 +1,64 @@
+import mmap
+import tempfile
+from typing import Optional
+
+#
+# Append-only file for the log lines, spilled out of memory.
+# Data is written at the end and read back through a memory map,
+# which is remapped when a read goes beyond the mapped size.
+#
+# The file is temporary, so it's removed by the OS once closed,
+# even if the app crashes. Space is never reused: when none of
+# the blocks are needed anymore, the whole file is closed
+#
+
+
+class SegmentFile:
+    _map: Optional[mmap.mmap]
+
+    def __init__(self) -> None:
+        self._file = tempfile.TemporaryFile(prefix="galog-", suffix=".seg")
+        self._map = None
+        self._size = 0
+        self._liveBlocks = 0
+
+    def size(self):
+        return self._size
+
+    def append(self, data: bytes):
+        offset = self._size
+        self._file.seek(offset)
+        self._file.write(data)
+        self._file.flush()
+        self._size += len(data)
+        self._liveBlocks += 1
+        return offset
+
+    def _remap(self):
+        if self._map is not None:
+            self._map.close()
+
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def read(self, offset: int, size: int):
+        assert offset + size <= self._size, "Read beyond the end of segment"
+        if self._map is None or offset + size > len(self._map):
+            self._remap()
+
+        return self._map[offset : offset + size]
+
+    def release(self):
+        #
+        # Returns whether any of the blocks are still needed
+        #
+
+        assert self._liveBlocks > 0, "No blocks to release"
+        self._liveBlocks -= 1
+        return self._liveBlocks > 0
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+        self._file.close()
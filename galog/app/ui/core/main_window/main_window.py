@@ -8,7 +8,7 @@ from PyQt5.QtCore import QEvent, QThread, QThreadPool, QUrl
 from PyQt5.QtGui import QDesktopServices, QFont, QFontDatabase, QIcon
 from PyQt5.QtWidgets import QAction, QApplication, QMainWindow, QMenu
 
-from galog.app.device import adbClient
+from galog.app.device import adbClient, deviceTracker
 from galog.app.hrules import HRulesStorage
 from galog.app.msgbox import msgBoxErr, msgBoxInfo, msgBoxPrompt
 from galog.app.paths import (
@@ -53,6 +53,7 @@ class MainWindow(QMainWindow):
         self.initHighlighting()
         self.subscribeForSettingsChanges()
         self.startAdbServer()
+        self.startDeviceTracking()
 
     def reloadSettings(self):
         self._settings = readSettings()
@@ -121,6 +122,15 @@ class MainWindow(QMainWindow):
 
         QThreadPool.globalInstance().start(execAdbServer)
 
+    def startDeviceTracking(self):
+        #
+        # Devices are tracked from the start, so the device list
+        # is ready by the time it's needed
+        #
+
+        ipAddr = str(self._settings.adbServer.ipAddr)
+        deviceTracker(ipAddr, int(self._settings.adbServer.port))
+
     def loadFontsFromTar(self, fontDB: QFontDatabase, tar: tarfile.TarFile):
         for member in tar.getmembers():
             if member.path.endswith(".ttf"):
@@ -1,4 +1,4 @@
-from typing import Callable, Optional
+from typing import Any, Callable, Optional
 
 from PyQt5.QtCore import QModelIndex, QObject, QSortFilterProxyModel, Qt
 
@@ -21,7 +21,7 @@ class FnFilterModel(QSortFilterProxyModel):
     def filteringFn(self):
         return self._filterFn
 
-    def setFilteringFn(self, fn: Callable[[str], bool]):
+    def setFilteringFn(self, fn: Callable[[Any], bool]):
         self._filterFn = fn
         self._enabled = True
         self.invalidateFilter()
@@ -33,10 +33,17 @@ class FnFilterModel(QSortFilterProxyModel):
         self.setFilterKeyColumn(column)
         self.invalidateFilter()
 
+    def filteringRole(self):
+        return self.filterRole()
+
+    def setFilteringRole(self, role: int):
+        self.setFilterRole(role)
+        self.invalidateFilter()
+
     def filterAcceptsRow(self, sourceRow: int, sourceParent: QModelIndex):
         if not self._enabled:
             return True
 
         sourceModel = self.sourceModel()
         index = sourceModel.index(sourceRow, self.filteringColumn(), sourceParent)
-        return self._filterFn(sourceModel.data(index))
+        return self._filterFn(sourceModel.data(index, self.filterRole()))
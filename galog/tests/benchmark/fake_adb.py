@@ -0,0 +1,695 @@
+#
+# Local stand-in for the adb server. Speaks enough of the host protocol
+# for ppadb's AdbClient and replays synthetic or recorded logcat output
+# at a configurable rate, so the log reader can be exercised without a device.
+#
+# Host requests: host:version, host:devices, host:devices-l,
+# host:track-devices, host:transport:<serial>, host:transport-any
+#
+# Device services: shell:<cmd>, exec:<cmd>, where <cmd> is one of
+# 'getprop [<name>]', 'pm list packages [-U <package>]',
+# 'cat /system/etc/event-log-tags' or 'logcat ...'
+#
+
+import random
+import re
+import shlex
+import socket
+import struct
+import threading
+import time
+from contextlib import suppress
+from dataclasses import dataclass
+from itertools import cycle, islice
+from typing import Dict, FrozenSet, Iterator, List, Optional, Set, Union
+
+DEFAULT_SERIAL = "emulator-5554"
+DEFAULT_PACKAGE = "com.example.app"
+DEFAULT_APP_PID = 4242
+DEFAULT_APP_UID = 10123
+DEFAULT_SDK_VERSION = "30"
+SYSTEM_UID = 1000
+DEVICE_STATE_OK = "device"
+
+ADB_VERSION = 41
+OKAY = b"OKAY"
+FAIL = b"FAIL"
+
+#
+# Logcat output is generated in chunks. Within a chunk all lines
+# get the same timestamp, which is the time the chunk was sent
+#
+
+CHUNK_MAX_LINES = 1024
+TICK_SEC = 0.002
+
+#
+# Same layout, as 'logger_entry' v4 read by 'LogEntryReader'
+#
+
+ENTRY_HEADER = struct.Struct("<HHiIIIII")
+ENTRY_LOG_ID_MAIN = 0
+ENTRY_LOG_ID_EVENTS = 2
+EVENT_INT = struct.Struct("<i")
+
+# fmt: off
+LEVEL_PRIORITIES = {
+    "V": 2,
+    "D": 3,
+    "I": 4,
+    "W": 5,
+    "E": 6,
+    "F": 7,
+}
+# fmt: on
+
+SYNTHETIC_LEVELS = "VDDIIIIWE"
+SYNTHETIC_TAGS = ["ActivityThread", "OkHttp", "chromium", "MainActivity", "GC"]
+SYNTHETIC_SYSTEM_PIDS = [612, 1005, 1391, 2288]
+SYNTHETIC_SYSTEM_SHARE = 0.3
+SYNTHETIC_CRASH_EVERY = 5000
+
+#
+# Buffers read by logcat, when none is given with '-b'
+#
+
+BUFFER_MAIN = "main"
+BUFFER_SYSTEM = "system"
+BUFFER_CRASH = "crash"
+BUFFER_EVENTS = "events"
+DEFAULT_BUFFERS = frozenset([BUFFER_MAIN, BUFFER_SYSTEM, BUFFER_CRASH])
+SYSTEM_BUFFER_TAGS = frozenset(["ActivityManager"])
+
+RECORDED_LINE = re.compile(
+    r"^\d\d-\d\d \d\d:\d\d:\d\d\.\d+ +(\d+) +(\d+) ([A-Z]) (.*?) *: (.*)$"
+)
+
+#
+# ActivityManager logs process starts and deaths to the events buffer
+# as well. Replayed logs get these events for the matching lines
+#
+
+EVENT_LOG_TAGS_PATH = "/system/etc/event-log-tags"
+EVENT_LOG_TAGS = """\
+2718 e
+30011 am_proc_died (User|1|5),(PID|1|5),(Process Name|3),(OomAdj|1|5),(ProcState|1|5)
+30014 am_proc_start (User|1|5),(PID|1|5),(UID|1|5),(Process Name|3),(Type|3),(Component|3)
+30023 am_kill (User|1|5),(PID|1|5),(Process Name|3),(OomAdj|1|5),(Reason|3)
+30040 am_meminfo (Cached|2|2),(Free|2|2),(Zram|2|2),(Kernel|2|2),(Native|2|2)
+"""
+
+EVENT_TAG_NUMBERS = {
+    line.split()[1]: int(line.split()[0]) for line in EVENT_LOG_TAGS.splitlines()
+}
+
+# fmt: off
+AM_PROC_START = re.compile(r"^Start proc (\d+):([\w.:]+)/\w+ for (\S+) (.*)$")
+AM_PROC_DIED = re.compile(r"^Process ([\w.:]+) \(pid (\d+)\) has died")
+AM_KILL = re.compile(r"^Killing (\d+):([\w.:]+)/\w+ \(adj (-?\d+)\): (.*)$")
+# fmt: on
+
+
+@dataclass
+class LogRecord:
+    level: str
+    tag: str
+    msg: str
+    pid: int
+    tid: int
+    uid: int
+    buffer: str = BUFFER_MAIN
+    values: Optional[list] = None  # Values of an events buffer entry
+
+
+@dataclass
+class RatePhase:
+    linesPerSecond: float
+    durationSec: float
+
+
+def parseRatePattern(text: str):
+    #
+    # Comma-separated '<lines per second>:<seconds>' phases.
+    # Rate 0 is a pause, rate 'max' sends as fast as the reader takes
+    #
+
+    phases: List[RatePhase] = []
+    for phase in text.split(","):
+        rate, duration = phase.split(":")
+        linesPerSecond = float("inf") if rate == "max" else float(rate)
+        phases.append(RatePhase(linesPerSecond, float(duration)))
+
+    return phases
+
+
+class SyntheticLogSource:
+    def __init__(
+        self,
+        appPid: int = DEFAULT_APP_PID,
+        appUid: int = DEFAULT_APP_UID,
+        appShare: float = 0.5,
+        messageSize: int = 80,
+        seed: int = 0,
+    ) -> None:
+        self._appPid = appPid
+        self._appUid = appUid
+        self._appShare = appShare
+        self._messageSize = messageSize
+        self._seed = seed
+
+    def appPids(self):
+        return frozenset([self._appPid])
+
+    def records(self) -> Iterator[LogRecord]:
+        rng = random.Random(self._seed)
+        counter = 0
+        while True:
+            buffer = BUFFER_MAIN
+            if rng.random() < self._appShare:
+                pid, uid = self._appPid, self._appUid
+            else:
+                pid, uid = rng.choice(SYNTHETIC_SYSTEM_PIDS), SYSTEM_UID
+                if rng.random() < SYNTHETIC_SYSTEM_SHARE:
+                    buffer = BUFFER_SYSTEM
+
+            payload = "x" * rng.randrange(self._messageSize + 1)
+            record = LogRecord(
+                level=rng.choice(SYNTHETIC_LEVELS),
+                tag=rng.choice(SYNTHETIC_TAGS),
+                msg=f"message {counter} {payload}",
+                pid=pid,
+                tid=pid + rng.randrange(4),
+                uid=uid,
+                buffer=buffer,
+            )
+
+            if counter % SYNTHETIC_CRASH_EVERY == SYNTHETIC_CRASH_EVERY - 1:
+                record.level = "E"
+                record.tag = "AndroidRuntime"
+                record.msg = f"FATAL EXCEPTION: message {counter}"
+                record.pid, record.uid = self._appPid, self._appUid
+                record.buffer = BUFFER_CRASH
+
+            yield record
+            counter += 1
+
+
+class RecordedLogSource:
+    #
+    # Replays a log saved with 'adb logcat -v threadtime' over and over.
+    # The original timestamps are replaced with the time of sending
+    #
+
+    def __init__(self, path: str, appPids: Set[int], appUid: int = DEFAULT_APP_UID):
+        self._appPids = frozenset(appPids)
+        self._records: List[LogRecord] = []
+
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                match = RECORDED_LINE.match(line.rstrip("\r\n"))
+                if match is None:
+                    continue
+
+                pid, tid, level, tag, msg = match.groups()
+                uid = appUid if int(pid) in self._appPids else SYSTEM_UID
+                record = LogRecord(level, tag, msg, int(pid), int(tid), uid)
+                if tag in SYSTEM_BUFFER_TAGS:
+                    record.buffer = BUFFER_SYSTEM
+                    self._addEventRecord(record, appUid)
+
+                self._records.append(record)
+
+        assert self._records, "No threadtime lines found in the log"
+
+    def _eventValues(self, msg: str, appUid: int):
+        match = AM_PROC_START.match(msg)
+        if match is not None:
+            pid, name, kind, component = match.groups()
+            return "am_proc_start", [0, int(pid), appUid, name, kind, component]
+
+        match = AM_PROC_DIED.match(msg)
+        if match is not None:
+            name, pid = match.groups()
+            return "am_proc_died", [0, int(pid), name, 900, 19]
+
+        match = AM_KILL.match(msg)
+        if match is not None:
+            pid, name, adj, reason = match.groups()
+            return "am_kill", [0, int(pid), name, int(adj), reason]
+
+        return None, None
+
+    def _addEventRecord(self, record: LogRecord, appUid: int):
+        tag, values = self._eventValues(record.msg, appUid)
+        if tag is None:
+            return
+
+        self._records.append(
+            LogRecord(
+                level="I",
+                tag=tag,
+                msg="[{}]".format(",".join(str(value) for value in values)),
+                pid=record.pid,
+                tid=record.tid,
+                uid=SYSTEM_UID,
+                buffer=BUFFER_EVENTS,
+                values=values,
+            )
+        )
+
+    def appPids(self):
+        return self._appPids
+
+    def records(self) -> Iterator[LogRecord]:
+        return cycle(self._records)
+
+
+LogSource = Union[SyntheticLogSource, RecordedLogSource]
+
+
+class LogcatCommand:
+    #
+    # The subset of logcat options the log reader uses:
+    # -B, -v <format>, -T <time>, -b <buffers>, -s <tags>, --pid, --uid
+    #
+
+    binary: bool
+    epoch: bool
+    buffers: FrozenSet[str]
+    pids: Optional[FrozenSet[int]]
+    uids: Optional[FrozenSet[int]]
+    tags: Optional[FrozenSet[str]]
+
+    def __init__(self, command: str) -> None:
+        self.binary = False
+        self.epoch = False
+        self.buffers = frozenset()
+        self.pids = None
+        self.uids = None
+        self.tags = None
+
+        args = shlex.split(command)[1:]
+        while args:
+            arg = args.pop(0)
+            if arg == "-B":
+                self.binary = True
+            elif arg == "-v":
+                self.epoch |= args.pop(0) == "epoch"
+            elif arg == "-b":
+                self.buffers |= frozenset(args.pop(0).split(","))
+            elif arg == "-T":
+                args.pop(0)
+            elif arg == "-s":
+                self.tags = frozenset(args)
+                args = []
+            elif arg.startswith("--pid="):
+                self.pids = frozenset([int(arg[6:])])
+            elif arg.startswith("--uid="):
+                self.uids = frozenset(int(uid) for uid in arg[6:].split(","))
+
+        if not self.buffers:
+            self.buffers = DEFAULT_BUFFERS
+
+    def accepts(self, record: LogRecord):
+        if record.buffer not in self.buffers and "all" not in self.buffers:
+            return False
+
+        if self.pids is not None and record.pid not in self.pids:
+            return False
+
+        if self.uids is not None and record.uid not in self.uids:
+            return False
+
+        if self.tags is not None and record.tag not in self.tags:
+            return False
+
+        return True
+
+
+class LogcatFormatter:
+    def __init__(self, command: LogcatCommand) -> None:
+        self._command = command
+        self._localTimeSec = -1
+        self._localTime = ""
+
+    def _textTime(self, timestamp: int):
+        seconds, nanoseconds = divmod(timestamp, 1_000_000_000)
+        milliseconds = nanoseconds // 1_000_000
+        if self._command.epoch:
+            return f"{seconds:>10}.{milliseconds:03d}"
+
+        if seconds != self._localTimeSec:
+            self._localTimeSec = seconds
+            self._localTime = time.strftime("%m-%d %H:%M:%S", time.localtime(seconds))
+
+        return f"{self._localTime}.{milliseconds:03d}"
+
+    def _textLine(self, record: LogRecord, logTime: str):
+        return "{} {:>5} {:>5} {} {:<8}: {}\n".format(
+            logTime,
+            record.pid,
+            record.tid,
+            record.level,
+            record.tag,
+            record.msg,
+        ).encode("utf-8")
+
+    def _eventValue(self, value: Union[int, str, list]):
+        if isinstance(value, list):
+            items = b"".join(self._eventValue(item) for item in value)
+            return b"\3%c%s" % (len(value), items)
+
+        if isinstance(value, str):
+            data = value.encode("utf-8")
+            return b"\2" + EVENT_INT.pack(len(data)) + data
+
+        return b"\0" + EVENT_INT.pack(value)
+
+    def _payload(self, record: LogRecord):
+        if record.values is not None:
+            tag = EVENT_INT.pack(EVENT_TAG_NUMBERS[record.tag])
+            return ENTRY_LOG_ID_EVENTS, tag + self._eventValue(record.values)
+
+        priority = LEVEL_PRIORITIES.get(record.level, 0)
+        payload = b"%c%s\0%s\0" % (
+            priority,
+            record.tag.encode("utf-8"),
+            record.msg.encode("utf-8"),
+        )
+
+        return ENTRY_LOG_ID_MAIN, payload
+
+    def _binaryEntry(self, record: LogRecord, timestamp: int):
+        seconds, nanoseconds = divmod(timestamp, 1_000_000_000)
+        logId, payload = self._payload(record)
+
+        header = ENTRY_HEADER.pack(
+            len(payload),
+            ENTRY_HEADER.size,
+            record.pid,
+            record.tid,
+            seconds,
+            nanoseconds,
+            logId,
+            record.uid,
+        )
+
+        return header + payload
+
+    def format(self, records: List[LogRecord], timestamp: int):
+        if self._command.binary:
+            return b"".join(self._binaryEntry(r, timestamp) for r in records)
+
+        logTime = self._textTime(timestamp)
+        return b"".join(self._textLine(r, logTime) for r in records)
+
+
+class _LogcatStream:
+    def __init__(
+        self,
+        command: LogcatCommand,
+        records: Iterator[LogRecord],
+        pty: bool,
+    ) -> None:
+        self.command = command
+        self.records = records
+        self.formatter = LogcatFormatter(command)
+        self.pty = pty
+
+
+@dataclass
+class FakeAdbStats:
+    linesGenerated: int = 0
+    linesSent: int = 0
+    appLinesSent: int = 0
+    bytesSent: int = 0
+    streamsOpened: int = 0
+    streamsFinished: int = 0
+
+
+class FakeAdbServer:
+    _conns: Set[socket.socket]
+    _stats: FakeAdbStats
+
+    def __init__(
+        self,
+        source: LogSource,
+        pattern: List[RatePhase],
+        serial: str = DEFAULT_SERIAL,
+        props: Optional[Dict[str, str]] = None,
+        packages: Optional[Dict[str, int]] = None,
+        shellPty: bool = True,
+    ) -> None:
+        self._source = source
+        self._pattern = pattern
+        self._serial = serial
+        self._props = props or {"ro.build.version.sdk": DEFAULT_SDK_VERSION}
+        self._packages = packages or {DEFAULT_PACKAGE: DEFAULT_APP_UID}
+        self._shellPty = shellPty
+        self._deviceState: Optional[str] = DEVICE_STATE_OK
+        self._conns = set()
+        self._lock = threading.Lock()
+        self._deviceChanged = threading.Condition(self._lock)
+        self._stopped = threading.Event()
+        self._stats = FakeAdbStats()
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+
+    def start(self, host: str = "127.0.0.1", port: int = 0):
+        self._server.bind((host, port))
+        self._server.listen(16)
+        threading.Thread(target=self._acceptLoop, daemon=True).start()
+
+    def port(self) -> int:
+        return self._server.getsockname()[1]
+
+    def stats(self):
+        with self._lock:
+            return FakeAdbStats(**vars(self._stats))
+
+    def setDeviceState(self, state: Optional[str]):
+        #
+        # None means the device is disconnected
+        #
+
+        with self._lock:
+            self._deviceState = state
+            self._deviceChanged.notify_all()
+
+    def stop(self):
+        self._stopped.set()
+        self._server.close()
+        with self._lock:
+            self._deviceChanged.notify_all()
+            for conn in self._conns:
+                with suppress(OSError):
+                    conn.shutdown(socket.SHUT_RDWR)
+
+    def _acceptLoop(self):
+        while not self._stopped.is_set():
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                break
+
+            with self._lock:
+                self._conns.add(conn)
+
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _recvExact(self, conn: socket.socket, size: int):
+        data = b""
+        while len(data) < size:
+            chunk = conn.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("Connection closed by client")
+
+            data += chunk
+
+        return data
+
+    def _recvRequest(self, conn: socket.socket):
+        length = int(self._recvExact(conn, 4), 16)
+        return self._recvExact(conn, length).decode("utf-8")
+
+    def _sendOkay(self, conn: socket.socket, data: Optional[bytes] = None):
+        if data is None:
+            conn.sendall(OKAY)
+        else:
+            conn.sendall(OKAY + b"%04x" % len(data) + data)
+
+    def _sendFail(self, conn: socket.socket, message: str):
+        data = message.encode("utf-8")
+        conn.sendall(FAIL + b"%04x" % len(data) + data)
+
+    def _formatDeviceList(self, state: Optional[str]):
+        if state is None:
+            return b""
+
+        return f"{self._serial}\t{state}\n".encode()
+
+    def _deviceList(self):
+        with self._lock:
+            return self._formatDeviceList(self._deviceState)
+
+    def _trackDevices(self, conn: socket.socket):
+        #
+        # The list is sent again each time the device state changes
+        #
+
+        with self._lock:
+            state = self._deviceState
+            self._sendOkay(conn, self._formatDeviceList(state))
+            while not self._stopped.is_set():
+                self._deviceChanged.wait()
+                if state != self._deviceState:
+                    state = self._deviceState
+                    data = self._formatDeviceList(state)
+                    conn.sendall(b"%04x" % len(data) + data)
+
+    def _handle(self, conn: socket.socket):
+        try:
+            self._handleRequests(conn)
+        except (OSError, ConnectionError):
+            pass
+        finally:
+            with self._lock:
+                self._conns.discard(conn)
+
+            conn.close()
+
+    def _handleRequests(self, conn: socket.socket):
+        #
+        # The connection serves host requests until it is switched
+        # to a device by 'host:transport'. A device service takes over
+        # the connection, which is closed when the service finishes
+        #
+
+        transport = False
+        while True:
+            request = self._recvRequest(conn)
+            if request == "host:version":
+                self._sendOkay(conn, b"%04x" % ADB_VERSION)
+                return
+
+            if request in ("host:devices", "host:devices-l"):
+                self._sendOkay(conn, self._deviceList())
+                return
+
+            if request == "host:track-devices":
+                self._trackDevices(conn)
+                return
+
+            if request in (f"host:transport:{self._serial}", "host:transport-any"):
+                if self._deviceState is None:
+                    self._sendFail(conn, f"device '{self._serial}' not found")
+                    return
+
+                self._sendOkay(conn)
+                transport = True
+                continue
+
+            if request.startswith("host:transport:"):
+                self._sendFail(conn, f"device '{request[15:]}' not found")
+                return
+
+            service, _, command = request.partition(":")
+            if transport and service in ("shell", "exec"):
+                self._sendOkay(conn)
+                self._runCommand(conn, command, service == "shell")
+                return
+
+            self._sendFail(conn, f"unknown request: {request}")
+            return
+
+    def _send(self, conn: socket.socket, data: bytes, pty: bool):
+        #
+        # On old devices 'shell:' runs the command on a PTY,
+        # which turns every '\n' into '\r\n'
+        #
+
+        if pty and self._shellPty:
+            data = data.replace(b"\n", b"\r\n")
+
+        conn.sendall(data)
+
+    def _runCommand(self, conn: socket.socket, command: str, pty: bool):
+        args = command.split()
+        if args[:1] == ["getprop"] and len(args) == 2:
+            self._send(conn, f"{self._props.get(args[1], '')}\n".encode(), pty)
+        elif args == ["getprop"]:
+            lines = [f"[{name}]: [{value}]\n" for name, value in self._props.items()]
+            self._send(conn, "".join(lines).encode(), pty)
+        elif args[:4] == ["pm", "list", "packages", "-U"]:
+            lines = []
+            for package, uid in self._packages.items():
+                if len(args) == 4 or args[4] in package:
+                    lines.append(f"package:{package} uid:{uid}\n")
+
+            self._send(conn, "".join(lines).encode(), pty)
+        elif args[:3] == ["pm", "list", "packages"]:
+            lines = [f"package:{package}\n" for package in self._packages]
+            self._send(conn, "".join(lines).encode(), pty)
+        elif args == ["cat", EVENT_LOG_TAGS_PATH]:
+            self._send(conn, EVENT_LOG_TAGS.encode(), pty)
+        elif args[:1] == ["logcat"]:
+            self._streamLogcat(conn, LogcatCommand(command), pty)
+        else:
+            self._send(conn, f"/system/bin/sh: {args[0]}: not found\n".encode(), pty)
+
+    def _sendRecords(self, conn: socket.socket, stream: _LogcatStream, count: int):
+        batch = [r for r in islice(stream.records, count) if stream.command.accepts(r)]
+        data = stream.formatter.format(batch, time.time_ns()) if batch else b""
+        if data:
+            self._send(conn, data, stream.pty)
+
+        appPids = self._source.appPids()
+        with self._lock:
+            self._stats.linesGenerated += count
+            self._stats.linesSent += len(batch)
+            self._stats.appLinesSent += sum(1 for r in batch if r.pid in appPids)
+            self._stats.bytesSent += len(data)
+
+    def _streamPhase(
+        self, conn: socket.socket, stream: _LogcatStream, phase: RatePhase
+    ):
+        phaseStart = time.perf_counter()
+        phaseEnd = phaseStart + phase.durationSec
+        generated = 0
+
+        while not self._stopped.is_set():
+            now = time.perf_counter()
+            if now >= phaseEnd:
+                break
+
+            if phase.linesPerSecond == float("inf"):
+                count = CHUNK_MAX_LINES
+            else:
+                due = int((now - phaseStart) * phase.linesPerSecond)
+                count = min(due - generated, CHUNK_MAX_LINES)
+
+            if count <= 0:
+                time.sleep(min(TICK_SEC, phaseEnd - now))
+                continue
+
+            self._sendRecords(conn, stream, count)
+            generated += count
+
+    def _streamLogcat(self, conn: socket.socket, command: LogcatCommand, pty: bool):
+        #
+        # Like 'logcat -T', the stream never ends by itself. After
+        # the rate pattern is over, it stays idle until the client leaves
+        #
+
+        with self._lock:
+            self._stats.streamsOpened += 1
+
+        stream = _LogcatStream(command, self._source.records(), pty)
+        for phase in self._pattern:
+            self._streamPhase(conn, stream, phase)
+
+        with self._lock:
+            self._stats.streamsFinished += 1
+
+        while conn.recv(4096):
+            pass
@@ -0,0 +1,263 @@
+#
+# End-to-end ingestion benchmark. Runs the fake adb server
+# in a separate process and captures its logcat output
+# with AndroidAppLogReader, as the log viewer does.
+#
+# Reports lines/s, CPU time of the capturing process
+# and the delay between sending a line and its delivery to the GUI thread.
+# Timestamps of text formats have millisecond resolution,
+# so text latencies may be up to 1 ms longer than the real ones.
+#
+# Usage: python -m galog.tests.benchmark.ingestion [options]
+#   --rate 50000:5          rate pattern, e.g. 'max:3' or '20000:1,0:1,200000:0.2'
+#   --sdk 30                emulated Android SDK version
+#   --binary                capture with 'logcat -B'
+#   --device-filtering      filter on the device side (--pid/--uid)
+#   --policy Block          queue policy: Block, DropOldest, DropLowestLevel
+#   --app-share 0.5         share of lines logged by the captured app
+#   --log FILE              replay a log saved with 'adb logcat -v threadtime'
+#   --process               read logs in a separate process
+#
+
+import argparse
+import multiprocessing
+import time
+from array import array
+from dataclasses import dataclass
+from multiprocessing.connection import Connection
+from typing import List
+
+from PyQt5.QtCore import QCoreApplication, QTimer
+
+from galog.app.device import AdbClient
+from galog.app.log_reader.log_reader import AndroidAppLogReader
+from galog.app.log_reader.log_reader_thread import QUEUE_MAX_LINES
+from galog.app.log_reader.models import LogLine
+from galog.app.settings.models import QueuePolicy
+
+from .fake_adb import (
+    DEFAULT_APP_PID,
+    DEFAULT_APP_UID,
+    DEFAULT_PACKAGE,
+    DEFAULT_SERIAL,
+    FakeAdbServer,
+    FakeAdbStats,
+    RecordedLogSource,
+    SyntheticLogSource,
+    parseRatePattern,
+)
+
+POLL_INTERVAL_MS = 50
+DRAIN_TIMEOUT_SEC = 10.0
+PERCENTILES = [50, 90, 99, 99.9]
+
+
+@dataclass
+class BenchmarkResult:
+    linesReceived: int
+    linesSent: int
+    linesDropped: int
+    elapsedSec: float
+    cpuSec: float
+    serverCpuSec: float
+    latenciesNs: array
+
+
+def _serverMain(options: argparse.Namespace, pipe: Connection):
+    if options.log:
+        source = RecordedLogSource(options.log, {DEFAULT_APP_PID})
+    else:
+        source = SyntheticLogSource(appShare=options.app_share)
+
+    server = FakeAdbServer(
+        source,
+        parseRatePattern(options.rate),
+        props={"ro.build.version.sdk": str(options.sdk)},
+        packages={DEFAULT_PACKAGE: DEFAULT_APP_UID},
+    )
+
+    server.start()
+    pipe.send(server.port())
+
+    while pipe.recv() != "stop":
+        pipe.send((server.stats(), time.process_time()))
+
+    server.stop()
+    pipe.send((server.stats(), time.process_time()))
+
+
+class IngestionBenchmark:
+    _latencies: array
+
+    def __init__(self, options: argparse.Namespace) -> None:
+        self._options = options
+        self._duration = sum(p.durationSec for p in parseRatePattern(options.rate))
+        self._latencies = array("q")
+        self._linesReceived = 0
+        self._lastLineTime = 0.0
+
+    def _linesRead(self, lines: List[LogLine]):
+        now = time.time_ns()
+        self._latencies.extend(now - line.timestamp for line in lines)
+        self._linesReceived += len(lines)
+        self._lastLineTime = time.perf_counter()
+
+    def _serverStats(self, pipe: Connection) -> FakeAdbStats:
+        pipe.send("stats")
+        stats, _ = pipe.recv()
+        return stats
+
+    def _isDone(self, pipe: Connection, reader: AndroidAppLogReader):
+        #
+        # Done when all streams have played the rate pattern
+        # and every sent line of the app is either received or dropped
+        #
+
+        elapsed = time.perf_counter() - self._startTime
+        if elapsed < self._duration:
+            return False
+
+        if elapsed > self._duration + DRAIN_TIMEOUT_SEC:
+            print("Timed out waiting for the remaining lines")
+            return True
+
+        stats = self._serverStats(pipe)
+        if stats.streamsFinished < stats.streamsOpened:
+            return False
+
+        handled = self._linesReceived + reader.stats().droppedLines
+        return handled >= stats.appLinesSent
+
+    def _poll(self, app: QCoreApplication, pipe, reader: AndroidAppLogReader):
+        if not reader.isRunning() or self._isDone(pipe, reader):
+            app.quit()
+
+    def run(self):
+        pipe, childPipe = multiprocessing.Pipe()
+        server = multiprocessing.Process(
+            target=_serverMain,
+            args=(self._options, childPipe),
+            daemon=True,
+        )
+
+        server.start()
+        port = pipe.recv()
+
+        app = QCoreApplication.instance() or QCoreApplication([])
+        reader = AndroidAppLogReader(
+            AdbClient("127.0.0.1", port),
+            DEFAULT_SERIAL,
+            DEFAULT_PACKAGE,
+            [str(DEFAULT_APP_PID)],
+            binaryFormat=self._options.binary,
+            deviceFiltering=self._options.device_filtering,
+            queueMaxLines=QUEUE_MAX_LINES,
+            queuePolicy=QueuePolicy[self._options.policy],
+            readerProcess=self._options.process,
+        )
+
+        reader.signals.linesRead.connect(self._linesRead)
+        reader.signals.failed.connect(lambda brief, verbose: print(brief, verbose))
+
+        timer = QTimer()
+        timer.timeout.connect(lambda: self._poll(app, pipe, reader))
+        timer.start(POLL_INTERVAL_MS)
+
+        cpuStart = time.process_time()
+        self._startTime = time.perf_counter()
+        self._lastLineTime = self._startTime
+        reader.start()
+        app.exec_()
+
+        reader.stop()
+        timer.stop()
+        cpuSec = time.process_time() - cpuStart
+
+        pipe.send("stop")
+        serverStats, serverCpuSec = pipe.recv()
+        server.join()
+
+        return BenchmarkResult(
+            linesReceived=self._linesReceived,
+            linesSent=serverStats.appLinesSent,
+            linesDropped=reader.stats().droppedLines,
+            elapsedSec=self._lastLineTime - self._startTime,
+            cpuSec=cpuSec,
+            serverCpuSec=serverCpuSec,
+            latenciesNs=self._latencies,
+        )
+
+
+def _percentile(values: List[int], percent: float):
+    index = min(len(values) - 1, int(len(values) * percent / 100))
+    return values[index]
+
+
+def _report(options: argparse.Namespace, result: BenchmarkResult):
+    if options.binary:
+        logFormat = "binary"
+    elif options.sdk >= 24:
+        logFormat = "epoch"
+    else:
+        logFormat = "threadtime"
+
+    print(
+        "sdk={} format={} device-filtering={} policy={} process={} rate={}".format(
+            options.sdk,
+            logFormat,
+            options.device_filtering,
+            options.policy,
+            options.process,
+            options.rate,
+        )
+    )
+
+    elapsed = max(result.elapsedSec, 1e-9)
+    print(
+        "lines       {} received, {} sent, {} dropped".format(
+            result.linesReceived,
+            result.linesSent,
+            result.linesDropped,
+        )
+    )
+    print("throughput  {:.0f} lines/s".format(result.linesReceived / elapsed))
+    print(
+        "cpu         {:.2f}s reader ({:.0f}% of one core), {:.2f}s server".format(
+            result.cpuSec,
+            100 * result.cpuSec / elapsed,
+            result.serverCpuSec,
+        )
+    )
+
+    if not result.latenciesNs:
+        return
+
+    latencies = sorted(result.latenciesNs)
+    percentiles = "  ".join(
+        "p{:g} {:.1f}".format(p, _percentile(latencies, p) / 1e6) for p in PERCENTILES
+    )
+
+    print("latency ms  {}  max {:.1f}".format(percentiles, latencies[-1] / 1e6))
+
+
+def _parseArgs():
+    parser = argparse.ArgumentParser(description="Log ingestion benchmark")
+    parser.add_argument("--rate", default="50000:5")
+    parser.add_argument("--sdk", type=int, default=30)
+    parser.add_argument("--binary", action="store_true")
+    parser.add_argument("--device-filtering", action="store_true")
+    parser.add_argument("--policy", choices=QueuePolicy.__members__, default="Block")
+    parser.add_argument("--app-share", type=float, default=0.5)
+    parser.add_argument("--log")
+    parser.add_argument("--process", action="store_true")
+    return parser.parse_args()
+
+
+def main():
+    options = _parseArgs()
+    result = IngestionBenchmark(options).run()
+    _report(options, result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#
+# Micro-benchmark for LogLineReader.
+# Compares the current implementation against the old one,
+# which kept the pending data in an immutable 'bytes' object.
+#
+# Usage: python -m galog.tests.benchmark.line_reader
+#
+
+import re
+import time
+from typing import Callable, List, Optional, Tuple
+
+from galog.app.log_reader.log_line_reader import LogLineReader
+from galog.app.log_reader.models import LogLine
+
+LINE_COUNT = 200_000
+CHUNK_SIZES = [4096, 65536, 512 * 1024]
+LONG_LINE_SIZE = 4 * 1024 * 1024
+LEGACY_LOG_LINE = re.compile(r"^([A-Z])/(.+)\( *(\d+)\): (.*)$")
+FILTER_PID = "1003"
+
+
+class LegacyLogLineReader:
+    _buf: bytes
+
+    def __init__(self, pid: Optional[str] = None) -> None:
+        self._buf = bytes()
+        self._pid = pid
+
+    def addDataChunk(self, chunk: bytes):
+        self._buf += chunk
+
+    def readParsedLines(self):
+        lines = self._buf.split(b"\n")
+        self._buf = lines.pop()
+
+        for line in lines:
+            decodedLine = line.decode("utf-8", errors="replace")
+            match: re.Match = LEGACY_LOG_LINE.match(decodedLine)
+            if not match:
+                continue
+
+            groups: Tuple[str] = match.groups()
+            logLine = LogLine(
+                level=groups[0],
+                tag=groups[1].strip(),
+                pid=groups[2].strip(),
+                msg=groups[3],
+                tid=-1,
+                timestamp=0,
+            )
+
+            # Used to be done by the consumer of the 'lineRead' signal
+            if self._pid is None or logLine.pid == self._pid:
+                yield logLine
+
+
+def _sampleData():
+    lines = []
+    for i in range(LINE_COUNT):
+        msg = "Some log message with a counter {} and a payload {}".format(
+            i, "x" * (i % 80)
+        )
+        lines.append("I/SampleTag( {}): {}\n".format(1000 + i % 7, msg))
+
+    return "".join(lines).encode("utf-8")
+
+
+def _longLineData():
+    return b"I/SampleTag( 1000): " + b"y" * LONG_LINE_SIZE + b"\n"
+
+
+def _chunks(data: bytes, chunkSize: int):
+    return [data[i : i + chunkSize] for i in range(0, len(data), chunkSize)]
+
+
+def _currentReader(pid: Optional[str]):
+    reader = LogLineReader()
+    if pid is not None:
+        reader.setLineFilter({pid.encode()}, frozenset())
+
+    return reader
+
+
+def _run(factory: Callable[[], object], chunks: List[bytes]):
+    reader = factory()
+    count = 0
+    start = time.perf_counter()
+    for chunk in chunks:
+        reader.addDataChunk(chunk)
+        for _ in reader.readParsedLines():
+            count += 1
+
+    return time.perf_counter() - start, count
+
+
+def _compare(name: str, data: bytes, chunkSize: int, pid: Optional[str] = None):
+    chunks = _chunks(data, chunkSize)
+    legacyTime, legacyCount = _run(lambda: LegacyLogLineReader(pid), chunks)
+    currentTime, currentCount = _run(lambda: _currentReader(pid), chunks)
+    assert legacyCount == currentCount, "Implementations disagree"
+
+    print(
+        "{:<12} chunk={:>7}  lines={:>7}  legacy={:8.3f}s  current={:8.3f}s  x{:.2f}".format(
+            name,
+            chunkSize,
+            currentCount,
+            legacyTime,
+            currentTime,
+            legacyTime / currentTime,
+        )
+    )
+
+
+def main():
+    sampleData = _sampleData()
+    for chunkSize in CHUNK_SIZES:
+        _compare("many lines", sampleData, chunkSize)
+
+    for chunkSize in CHUNK_SIZES:
+        _compare("one pid", sampleData, chunkSize, FILTER_PID)
+
+    longLineData = _longLineData()
+    for chunkSize in CHUNK_SIZES:
+        _compare("long line", longLineData, chunkSize)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import asyncio
+import errno
+import socket
+
+import pytest
+
+from galog.app.device.async_client import AsyncAdbClient
+
+
+class FailingReader:
+    def __init__(self, error):
+        self._error = error
+
+    async def readexactly(self, size):
+        raise self._error
+
+    async def read(self, size):
+        raise self._error
+
+
+class FakeWriter:
+    def __init__(self, error=None):
+        self._error = error
+
+    def write(self, data):
+        if self._error is not None:
+            raise self._error
+
+    async def drain(self):
+        pass
+
+    def close(self):
+        pass
+
+    async def wait_closed(self):
+        pass
+
+
+def fakeOpenConnection(reader, writer):
+    async def openConnection(host, port):
+        return reader, writer
+
+    return openConnection
+
+
+def failingOpenConnection(error):
+    async def openConnection(host, port):
+        raise error
+
+    return openConnection
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        socket.gaierror(socket.EAI_NONAME, "Name or service not known"),
+        OSError(errno.EHOSTUNREACH, "No route to host"),
+        OSError(errno.ENETUNREACH, "Network is unreachable"),
+    ],
+)
+def test_connect_errors_are_connection_errors(monkeypatch, error):
+    monkeypatch.setattr(asyncio, "open_connection", failingOpenConnection(error))
+    client = AsyncAdbClient("adb.invalid", 5037)
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(client.version())
+
+
+def test_read_errors_are_connection_errors(monkeypatch):
+    error = OSError(errno.ENETUNREACH, "Network is unreachable")
+    reader, writer = FailingReader(error), FakeWriter()
+    monkeypatch.setattr(asyncio, "open_connection", fakeOpenConnection(reader, writer))
+    client = AsyncAdbClient("127.0.0.1", 5037)
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(client.devicesWithStates())
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(client.shell("emulator-5554", "true"))
+
+
+def test_write_errors_are_connection_errors(monkeypatch):
+    error = OSError(errno.EHOSTUNREACH, "No route to host")
+    reader, writer = FailingReader(EOFError()), FakeWriter(error)
+    monkeypatch.setattr(asyncio, "open_connection", fakeOpenConnection(reader, writer))
+    client = AsyncAdbClient("127.0.0.1", 5037)
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(client.version())
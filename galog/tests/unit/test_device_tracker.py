@@ -0,0 +1,60 @@
+import errno
+import time
+
+from galog.app.device.device_tracker import DeviceTracker
+
+WAIT_TIMEOUT_SEC = 5.0
+
+
+class FakeStateCache:
+    def addListener(self, listener):
+        self.listener = listener
+
+
+class FailingPropsClient:
+    #
+    # Fails the property requests with the given error
+    #
+
+    def __init__(self, error):
+        self._error = error
+
+    async def properties(self, serial):
+        raise self._error
+
+
+def waitUntil(predicate):
+    deadline = time.monotonic() + WAIT_TIMEOUT_SEC
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+
+        time.sleep(0.01)
+
+    return False
+
+
+def test_device_announced_if_properties_fail():
+    cache = FakeStateCache()
+    error = OSError(errno.EHOSTUNREACH, "No route to host")
+    tracker = DeviceTracker(FailingPropsClient(error), cache)
+    cache.listener({"emulator-5554": "device"}, True)
+
+    assert waitUntil(tracker.isReady)
+    assert [d.serial for d in tracker.devices()] == ["emulator-5554"]
+
+
+def test_tracker_ready_after_unexpected_fetch_error():
+    cache = FakeStateCache()
+    tracker = DeviceTracker(FailingPropsClient(KeyError("unexpected")), cache)
+    cache.listener({"emulator-5554": "device"}, True)
+
+    assert waitUntil(tracker.isReady)
+    assert not tracker._fetching
+
+    #
+    # Later state changes of the device are still announced
+    #
+
+    cache.listener({"emulator-5554": "offline"}, True)
+    assert [d.state for d in tracker.devices()] == ["offline"]
@@ -0,0 +1,118 @@
+import struct
+
+from galog.app.log_reader.event_log_reader import EventLogReader, processEventLogTags
+from galog.app.log_reader.log_entry_reader import ENTRY_HEADER, LOG_ID_EVENTS
+from galog.app.log_reader.models import ProcessEndedEvent, ProcessStartedEvent
+
+ENTRY_LOG_ID = struct.Struct("<I")
+ENTRY_HEADER_SIZE_V3 = 24
+
+
+LOG_ID_MAIN = 0
+
+
+def eventEntry(payload: bytes, pid: int = 1000, logId: int = LOG_ID_EVENTS):
+    header = ENTRY_HEADER.pack(len(payload), ENTRY_HEADER_SIZE_V3, pid, pid, 100, 0)
+    return header + ENTRY_LOG_ID.pack(logId) + payload
+
+
+def eventString(value: str):
+    data = value.encode()
+    return b"\x02" + struct.pack("<i", len(data)) + data
+
+
+def eventInt(value: int):
+    return b"\x00" + struct.pack("<i", value)
+
+
+def procStartPayload(tags, pid: int, package: str):
+    number = tagNumber(tags, "am_proc_start")
+    values = [
+        eventInt(0),
+        eventInt(pid),
+        eventInt(10001),
+        eventString(package),
+        eventString("activity"),
+        eventString(f"{package}/.Main"),
+    ]
+
+    return struct.pack("<i", number) + b"\x03\x06" + b"".join(values)
+
+
+def tagNumber(tags, name: str):
+    return next(n for n, tag in tags.items() if tag.name == name)
+
+
+def procDiedPayload(tags, pid: int, package: str):
+    number = tagNumber(tags, "am_proc_died")
+    values = [eventInt(0), eventInt(pid), eventString(package)]
+    return struct.pack("<i", number) + b"\x03\x03" + b"".join(values)
+
+
+def test_events_split_across_chunks():
+    tags = processEventLogTags("")
+    data = eventEntry(procStartPayload(tags, 1234, "com.example")) + eventEntry(
+        procDiedPayload(tags, 1234, "com.example")
+    )
+
+    for chunkSize in range(1, len(data) + 1):
+        reader = EventLogReader(tags)
+        events = []
+        for begin in range(0, len(data), chunkSize):
+            reader.addDataChunk(data[begin : begin + chunkSize])
+            events.extend(reader.readParsedLines())
+
+        assert [event.event for event in events] == [
+            ProcessStartedEvent("1234", "com.example", "activity com.example/.Main"),
+            ProcessEndedEvent("1234", "com.example"),
+        ]
+
+
+def test_device_tag_numbers_override_defaults():
+    tags = processEventLogTags(
+        "40000 am_proc_died (User|1|5),(PID|1|5),(Process Name|3)\n"
+    )
+    assert tagNumber(tags, "am_proc_died") == 40000
+
+    reader = EventLogReader(tags)
+    reader.addDataChunk(eventEntry(procDiedPayload(tags, 1234, "com.example")))
+
+    (event,) = reader.readParsedLines()
+    assert event.tag == "am_proc_died"
+    assert event.msg == "[0,1234,com.example]"
+
+
+def test_other_entries_skipped():
+    tags = processEventLogTags("")
+    malformed = struct.pack("<i", tagNumber(tags, "am_proc_start")) + eventInt(1)
+    unknown = struct.pack("<i", 1) + eventInt(1)
+
+    reader = EventLogReader(tags)
+    reader.addDataChunk(
+        eventEntry(procStartPayload(tags, 1, "com.main"), logId=LOG_ID_MAIN)
+        + eventEntry(malformed)
+        + eventEntry(unknown)
+        + eventEntry(procStartPayload(tags, 2, "com.example"))
+    )
+
+    events = list(reader.readParsedLines())
+    assert [event.event.processId for event in events] == ["2"]
+
+
+def test_short_payload_skipped():
+    #
+    # The short entry goes last, so its tag number
+    # can't be read from the bytes of the next entry
+    #
+
+    tags = processEventLogTags("")
+    reader = EventLogReader(tags)
+    reader.addDataChunk(
+        eventEntry(procStartPayload(tags, 1234, "com.example"))
+        + eventEntry(b"\x01\x02\x03")
+    )
+
+    events = list(reader.readParsedLines())
+    assert len(events) == 1
+    assert events[0].event.processId == "1234"
+    assert events[0].event.packageName == "com.example"
@@ -0,0 +1,103 @@
+import threading
+
+from galog.app.log_reader.ingestion_queue import IngestionQueue
+from galog.app.log_reader.models import LogLine, ProcessStartedEvent
+from galog.app.settings.models import QueuePolicy
+
+
+def logLine(msg: str, level: str = "I"):
+    return LogLine(tag="App", level=level, msg=msg, pid="100", tid=100, timestamp=0)
+
+
+def takeAll(queue: IngestionQueue):
+    items, hasMore = queue.take(1000)
+    assert not hasMore
+    return items
+
+
+def messages(items):
+    return [item.msg for item in items if isinstance(item, LogLine)]
+
+
+def test_drop_oldest_keeps_newest_lines_and_events():
+    queue = IngestionQueue(3, QueuePolicy.DropOldest)
+    event = ProcessStartedEvent("100", "com.example", None)
+
+    assert queue.putLines([logLine("a"), logLine("b")])
+    queue.putEvent(event)
+    assert not queue.putLines([logLine("c"), logLine("d"), logLine("e")])
+
+    items = takeAll(queue)
+    assert event in items
+    assert messages(items) == ["c", "d", "e"]
+    assert queue.droppedLines() == 2
+    assert queue.size() == 0
+
+
+def test_drop_lowest_level_drops_verbose_lines_first():
+    queue = IngestionQueue(8, QueuePolicy.DropLowestLevel)
+    lines = [logLine(f"v{i}", "V") for i in range(4)]
+    lines += [logLine(f"e{i}", "E") for i in range(4)]
+    queue.putLines(lines)
+    queue.putLines([logLine("w", "W"), logLine("d", "D")])
+
+    #
+    # Two lines over the limit plus the slack of one line:
+    # the three oldest verbose lines go
+    #
+
+    assert messages(takeAll(queue)) == ["v3", "e0", "e1", "e2", "e3", "w", "d"]
+    assert queue.droppedLines() == 3
+
+
+def test_drop_lowest_level_drops_unknown_level_before_verbose():
+    queue = IngestionQueue(2, QueuePolicy.DropLowestLevel)
+    queue.putLines([logLine("v", "V"), logLine("x", "?"), logLine("i", "I")])
+
+    assert messages(takeAll(queue)) == ["v", "i"]
+
+
+def test_oversized_batch_accepted_by_empty_queue():
+    queue = IngestionQueue(2, QueuePolicy.Block)
+    queue.putLines([logLine(str(i)) for i in range(5)])
+
+    assert queue.size() == 5
+    assert queue.droppedLines() == 0
+
+
+def test_block_waits_for_consumer():
+    queue = IngestionQueue(2, QueuePolicy.Block)
+    queue.putLines([logLine("a"), logLine("b")])
+
+    result = []
+    producer = threading.Thread(
+        target=lambda: result.append(queue.putLines([logLine("c")]))
+    )
+    producer.start()
+    producer.join(0.1)
+    assert producer.is_alive()
+
+    assert messages(queue.take(1)[0]) == ["a"]
+    producer.join(5.0)
+    assert not producer.is_alive()
+    assert result == [False]
+    assert queue.delayedLines() == 1
+    assert messages(takeAll(queue)) == ["b", "c"]
+
+
+def test_close_releases_blocked_producer():
+    queue = IngestionQueue(1, QueuePolicy.Block)
+    queue.putLines([logLine("a")])
+
+    result = []
+    producer = threading.Thread(
+        target=lambda: result.append(queue.putLines([logLine("b")]))
+    )
+    producer.start()
+    producer.join(0.1)
+    queue.close()
+    producer.join(5.0)
+
+    assert not producer.is_alive()
+    assert result == [False]
+    assert messages(takeAll(queue)) == ["a"]
@@ -0,0 +1,90 @@
+import struct
+
+import pytest
+
+from galog.app.log_reader.log_entry_reader import (
+    ENTRY_HEADER,
+    LOG_ID_EVENTS,
+    LogEntryFormatError,
+    LogEntryReader,
+)
+
+ENTRY_LOG_ID = struct.Struct("<I")
+ENTRY_HEADER_SIZE_V1 = 20
+ENTRY_HEADER_SIZE_V3 = 24
+LOG_ID_MAIN = 0
+PRIORITY_INFO = 4
+
+
+def textEntry(
+    tag: str,
+    msg: str,
+    pid: int = 1234,
+    logId: int = LOG_ID_MAIN,
+    hdrSize: int = ENTRY_HEADER_SIZE_V3,
+):
+    payload = bytes([PRIORITY_INFO]) + tag.encode() + b"\0" + msg.encode() + b"\0"
+    header = ENTRY_HEADER.pack(len(payload), hdrSize, pid, pid + 1, 100, 5)
+    if hdrSize not in (0, ENTRY_HEADER_SIZE_V1):
+        header += ENTRY_LOG_ID.pack(logId)
+
+    return header + payload
+
+
+def readAll(reader: LogEntryReader, data: bytes, chunkSize: int):
+    lines = []
+    for begin in range(0, len(data), chunkSize):
+        reader.addDataChunk(data[begin : begin + chunkSize])
+        lines.extend(reader.readParsedLines())
+
+    return lines
+
+
+def test_entries_split_across_chunks():
+    data = textEntry("App", "first") + textEntry("App", "юникод", pid=42)
+    for chunkSize in range(1, len(data) + 1):
+        lines = readAll(LogEntryReader(), data, chunkSize)
+        assert [(line.tag, line.msg, line.pid) for line in lines] == [
+            ("App", "first", "1234"),
+            ("App", "юникод", "42"),
+        ]
+
+
+def test_entry_fields():
+    reader = LogEntryReader()
+    reader.addDataChunk(textEntry("App", "hello\n", hdrSize=0))
+
+    (line,) = reader.readParsedLines()
+    assert (line.level, line.tag, line.msg) == ("I", "App", "hello")
+    assert (line.pid, line.tid) == ("1234", 1235)
+    assert line.timestamp == 100 * 1_000_000_000 + 5
+
+
+def test_multiline_message_split():
+    reader = LogEntryReader()
+    reader.addDataChunk(textEntry("App", "Exception\n\tat Main\n\tat Thread"))
+
+    lines = list(reader.readParsedLines())
+    assert [line.msg for line in lines] == ["Exception", "\tat Main", "\tat Thread"]
+
+
+def test_binary_buffers_and_filtered_entries_skipped():
+    reader = LogEntryReader()
+    reader.setLineFilter({b"42"}, frozenset([b"ActivityManager"]))
+    reader.addDataChunk(
+        textEntry("App", "kept", pid=42)
+        + textEntry("App", "other process")
+        + textEntry("ActivityManager", "kept by tag")
+        + textEntry("App", "events", pid=42, logId=LOG_ID_EVENTS)
+    )
+
+    lines = list(reader.readParsedLines())
+    assert [line.msg for line in lines] == ["kept", "kept by tag"]
+
+
+def test_garbage_detected():
+    reader = LogEntryReader()
+    reader.addDataChunk(b"01-02 03:04:05.678  1234  1240 I App: text\r\n")
+
+    with pytest.raises(LogEntryFormatError):
+        list(reader.readParsedLines())
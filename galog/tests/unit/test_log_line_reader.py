@@ -0,0 +1,81 @@
+from galog.app.log_reader.log_line_reader import LogFormat, LogLineReader
+
+BRIEF_LINES = b"".join(
+    [
+        b"I/ActivityManager(  512): Start proc com.example\n",
+        b"D/App     ( 1234): first\n",
+        "W/App     ( 1234): юникод\n".encode(),
+    ]
+)
+
+
+def readAll(reader: LogLineReader, data: bytes, chunkSize: int):
+    lines = []
+    for begin in range(0, len(data), chunkSize):
+        reader.addDataChunk(data[begin : begin + chunkSize])
+        lines.extend(reader.readParsedLines())
+
+    return lines
+
+
+def test_lines_split_across_chunks():
+    #
+    # Every chunk size splits the lines (and the multibyte
+    # characters) at different points, result is the same
+    #
+
+    expected = [
+        ("I", "ActivityManager", "512", "Start proc com.example"),
+        ("D", "App", "1234", "first"),
+        ("W", "App", "1234", "юникод"),
+    ]
+
+    for chunkSize in range(1, len(BRIEF_LINES) + 1):
+        lines = readAll(LogLineReader(), BRIEF_LINES, chunkSize)
+        result = [(line.level, line.tag, line.pid, line.msg) for line in lines]
+        assert result == expected
+
+
+def test_partial_line_waits_for_newline():
+    reader = LogLineReader()
+    reader.addDataChunk(b"D/App     ( 1234): no newline yet")
+    assert list(reader.readParsedLines()) == []
+
+    reader.addDataChunk(b", now it's here\n")
+    lines = list(reader.readParsedLines())
+    assert [line.msg for line in lines] == ["no newline yet, now it's here"]
+
+
+def test_line_filter_by_pid_and_tag():
+    reader = LogLineReader()
+    reader.setLineFilter({b"1234"}, frozenset([b"ActivityManager"]))
+    reader.addDataChunk(BRIEF_LINES + b"I/Other   (  999): dropped\n")
+
+    lines = list(reader.readParsedLines())
+    assert [line.pid for line in lines] == ["512", "1234", "1234"]
+
+
+def test_epoch_lines_with_carriage_returns():
+    reader = LogLineReader(LogFormat.Epoch, stripCarriageReturns=True)
+    reader.addDataChunk(
+        b"  1700000000.123456789  1234  1240 E App     : failed\r\n"
+        b"  1700000001.5  1234  1240 I App     : done\r\n"
+    )
+
+    lines = list(reader.readParsedLines())
+    assert [line.msg for line in lines] == ["failed", "done"]
+    assert [line.tid for line in lines] == [1240, 1240]
+    assert [line.timestamp for line in lines] == [
+        1_700_000_000_123_456_789,
+        1_700_000_001_500_000_000,
+    ]
+
+
+def test_threadtime_lines():
+    reader = LogLineReader(LogFormat.ThreadTime)
+    reader.addDataChunk(b"01-02 03:04:05.678  1234  1240 I App     : hello\n")
+
+    (line,) = reader.readParsedLines()
+    assert (line.level, line.tag, line.pid, line.tid) == ("I", "App", "1234", 1240)
+    assert line.msg == "hello"
+    assert line.timestamp % 1_000_000_000 == 678_000_000
@@ -0,0 +1,119 @@
+from galog.app.log_reader.log_reader_process import (
+    MSG_DATA,
+    MSG_STOP,
+    ReaderProcessConfig,
+    _decodeItems,
+    _ReaderProcess,
+)
+from galog.app.log_reader.models import LogLine
+from galog.app.settings.models import QueuePolicy
+
+
+def logLine(msg: str):
+    return LogLine(
+        tag="App",
+        level="I",
+        msg=msg,
+        pid="100",
+        tid=100,
+        timestamp=0,
+    )
+
+
+class FakeReaderThread:
+    #
+    # Hands out the queued lines in the given batches
+    #
+
+    def __init__(self, batches):
+        self._batches = batches
+
+    def takeQueued(self, maxCount):
+        items = self._batches.pop(0)
+        return items, bool(self._batches)
+
+    def stats(self):
+        return None
+
+    def pids(self):
+        return ["100"]
+
+    def stop(self):
+        pass
+
+
+class FakeRing:
+    #
+    # Accepts the given number of frames, then stays full
+    #
+
+    def __init__(self, capacity):
+        self._capacity = capacity
+        self.frames = []
+
+    def put(self, frame):
+        if len(self.frames) == self._capacity:
+            return False
+
+        self.frames.append(frame)
+        return True
+
+
+class FakeControl:
+    def poll(self):
+        return True
+
+    def recv(self):
+        return MSG_STOP
+
+
+class FakeSender:
+    def __init__(self):
+        self.messages = []
+
+    def send(self, message):
+        self.messages.append(message)
+
+
+def newReaderProcess(ring, batches):
+    config = ReaderProcessConfig(
+        host="127.0.0.1",
+        port=5037,
+        device="emulator-5554",
+        pids=None,
+        binaryFormat=False,
+        package=None,
+        deviceFiltering=False,
+        queueMaxLines=100,
+        queuePolicy=QueuePolicy.Block,
+        buffers=None,
+    )
+
+    sender = FakeSender()
+    process = _ReaderProcess(config, ring, sender, FakeControl())
+    process._readerThread = FakeReaderThread(batches)
+    return process, sender
+
+
+def test_transferred_lines_announced_when_ring_fills_up():
+    #
+    # Ring gets full and the process is stopped while waiting.
+    # The frame put before that must still be announced
+    #
+
+    ring = FakeRing(capacity=1)
+    batches = [[logLine("first")], [logLine("second")]]
+    process, sender = newReaderProcess(ring, batches)
+
+    process._transferQueued()
+    assert [[i.msg for i in _decodeItems(f)] for f in ring.frames] == [["first"]]
+    assert [m[0] for m in sender.messages] == [MSG_DATA]
+
+
+def test_nothing_announced_without_lines():
+    ring = FakeRing(capacity=1)
+    process, sender = newReaderProcess(ring, [[]])
+
+    process._transferQueued()
+    assert ring.frames == []
+    assert sender.messages == []
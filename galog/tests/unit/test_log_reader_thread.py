@@ -0,0 +1,197 @@
+import errno
+import socket
+
+import pytest
+
+from galog.app.device import AdbClient
+from galog.app.device.errors import DeviceError
+from galog.app.log_reader.log_line_reader import LogFormat
+from galog.app.log_reader.log_reader_thread import LogcatReaderThread
+from galog.app.log_reader.logcat_stream import LogcatStreamClosed
+from galog.app.log_reader.models import LogLine, ProcessEndedEvent, ProcessStartedEvent
+from galog.app.settings.models import LogBuffer
+
+NSEC_PER_SEC = 1_000_000_000
+
+
+class FakeConnection:
+    #
+    # The test writes logcat output to the peer socket
+    #
+
+    def __init__(self, commands):
+        self._commands = commands
+        self.socket, self.peer = socket.socketpair()
+
+    def send(self, command):
+        self._commands.append(command)
+
+    def close(self):
+        self.socket.close()
+        self.peer.close()
+
+
+class FakeDevice:
+    #
+    # Records the commands of the opened streams
+    #
+
+    def __init__(self, sdkVersion):
+        self._sdkVersion = sdkVersion
+        self.commands = []
+        self.connections = []
+
+    def shell(self, command):
+        if command.startswith("getprop"):
+            return str(self._sdkVersion)
+
+        return ""
+
+    def create_connection(self):
+        conn = FakeConnection(self.commands)
+        self.connections.append(conn)
+        return conn
+
+
+def openStreams(device, **kwargs):
+    thread = LogcatReaderThread(AdbClient("127.0.0.1", 5037), "emulator-5554", **kwargs)
+    thread._detectSdkVersion(device)
+    thread._detectService()
+    thread._detectLogFormat()
+    thread._detectDeviceFilter(device)
+    thread._openStreams(device)
+    return thread
+
+
+def test_process_events_use_threadtime_before_epoch_support():
+    device = FakeDevice(sdkVersion=21)
+    thread = openStreams(device, buffers=[LogBuffer.Main])
+
+    assert thread._logFormat == LogFormat.ThreadTime
+    assert len(device.commands) == 2
+    assert all("epoch" not in command for command in device.commands)
+
+    eventCommand = device.commands[0]
+    assert "-b system" in eventCommand and "-s ActivityManager" in eventCommand
+
+    stream = thread._eventStream
+    stream.addDataChunk(
+        b"01-02 03:04:05.678  1000  1020 I ActivityManager: "
+        b"Start proc 1234:com.example/u0a100 for activity com.example/.Main\n"
+    )
+
+    lines = list(stream.readParsedLines())
+    assert len(lines) == 1
+    assert lines[0].tag == "ActivityManager"
+    assert lines[0].pid == "1000"
+    assert lines[0].timestamp != 0
+
+
+def test_process_events_use_epoch_when_supported():
+    device = FakeDevice(sdkVersion=30)
+    openStreams(device, buffers=[LogBuffer.Main])
+
+    assert all("-v epoch" in command for command in device.commands)
+
+
+def epochLine(seconds: int, pid: int, msg: str):
+    return f"{seconds}.000000000 {pid:5d} {pid:5d} I App: {msg}\n".encode()
+
+
+def openPidStreams(device: FakeDevice):
+    thread = openStreams(
+        device,
+        buffers=[LogBuffer.Main],
+        pids=["100"],
+        package="com.example",
+        deviceFiltering=True,
+    )
+
+    assert device.commands[-1].endswith("--pid=100")
+    return thread
+
+
+def queuedMessages(thread: LogcatReaderThread):
+    thread._releaseAllMergedLines()
+    thread._flushPendingLines()
+    items, _ = thread.takeQueued(100)
+    return [item.msg for item in items if isinstance(item, LogLine)]
+
+
+def test_pid_streams_kept_when_last_process_ends():
+    device = FakeDevice(sdkVersion=30)
+    thread = openPidStreams(device)
+    stream = thread._mainStreams[LogBuffer.Main]
+    commandCount = len(device.commands)
+
+    event = ProcessEndedEvent(processId="100", packageName="com.example")
+    thread._processEnded(event, 300 * NSEC_PER_SEC)
+    thread._restartMainStreamsIfScheduled(device)
+
+    assert len(device.commands) == commandCount
+    assert thread._mainStreams[LogBuffer.Main] is stream
+
+    device.connections[-1].peer.sendall(epochLine(299, 100, "crash trace"))
+    assert thread._drainStream(stream)
+    assert queuedMessages(thread) == ["crash trace"]
+
+
+def test_pid_streams_restarted_without_losing_lines():
+    device = FakeDevice(sdkVersion=30)
+    thread = openPidStreams(device)
+    stream = thread._mainStreams[LogBuffer.Main]
+    peer = device.connections[-1].peer
+
+    peer.sendall(epochLine(100, 100, "a") + epochLine(200, 100, "b"))
+    assert thread._drainStream(stream)
+    assert queuedMessages(thread) == ["a", "b"]
+
+    #
+    # Line 'c' is not read until the restart. The new stream
+    # starts before the event, since the old one lags behind
+    #
+
+    peer.sendall(epochLine(250, 100, "c"))
+    event = ProcessStartedEvent("200", "com.example", "activity")
+    thread._processStarted(event, 300 * NSEC_PER_SEC)
+    thread._restartMainStreamsIfScheduled(device)
+
+    command = device.commands[-1]
+    assert "-T 250.000" in command
+    assert "--pid" not in command
+    assert queuedMessages(thread) == ["c"]
+
+    #
+    # The new stream repeats the lines already read
+    #
+
+    newStream = thread._mainStreams[LogBuffer.Main]
+    newPeer = device.connections[-1].peer
+    newPeer.sendall(epochLine(250, 100, "c") + epochLine(310, 200, "d"))
+    assert thread._drainStream(newStream)
+    assert queuedMessages(thread) == ["d"]
+
+
+class FailingSocket:
+    def __init__(self, error):
+        self._error = error
+
+    def recv_into(self, buffer, size):
+        raise self._error
+
+    def close(self):
+        pass
+
+
+def test_socket_errors_are_device_errors():
+    device = FakeDevice(sdkVersion=30)
+    thread = openStreams(device, buffers=[LogBuffer.Main])
+    stream = thread._mainStreams[LogBuffer.Main]
+    device.connections[-1].socket = FailingSocket(
+        OSError(errno.ETIMEDOUT, "Connection timed out")
+    )
+
+    with pytest.raises(LogcatStreamClosed) as e:
+        thread._drainStream(stream)
+
+    assert isinstance(e.value, DeviceError)
@@ -0,0 +1,156 @@
+from galog.app.log_reader import LogLine
+from galog.app.ui.core.log_messages_panel.log_messages_table.log_store import (
+    CHUNK_ROWS,
+    LogStore,
+)
+
+
+def logLine(i: int, tag: str = "App", level: str = "I"):
+    return LogLine(
+        tag=tag,
+        level=level,
+        msg=f"message {i}",
+        pid=str(1000 + i % 3),
+        tid=i,
+        timestamp=i * 1_000_000,
+    )
+
+
+def logLines(begin: int, end: int):
+    return [logLine(i, tag=f"Tag{i % 5}") for i in range(begin, end)]
+
+
+def test_rows_read_back():
+    store = LogStore()
+    store.append([logLine(0, level="E"), logLine(1, tag="Other", level="X")])
+
+    assert len(store) == 2
+    assert store.logLine(0) == logLine(0, level="E")
+    assert (store.tag(1), store.level(1), store.msg(1)) == ("Other", "?", "message 1")
+
+
+def test_append_across_chunks():
+    store = LogStore()
+    count = 2 * CHUNK_ROWS + 10
+    store.append(logLines(0, 100))
+    store.append(logLines(100, count))
+
+    assert len(store) == count
+    for row in [0, CHUNK_ROWS - 1, CHUNK_ROWS, count - 1]:
+        assert store.logLine(row) == logLines(row, row + 1)[0]
+
+
+def test_remove_first_evicts_oldest_rows():
+    store = LogStore()
+    count = 3 * CHUNK_ROWS
+    store.append(logLines(0, count))
+
+    store.removeFirst(10)
+    assert len(store) == count - 10
+    assert store.msg(0) == "message 10"
+
+    #
+    # Whole chunks are dropped, the offset of the first one is kept
+    #
+
+    store.removeFirst(CHUNK_ROWS)
+    assert len(store) == count - 10 - CHUNK_ROWS
+    assert store.msg(0) == f"message {CHUNK_ROWS + 10}"
+    assert store.msg(len(store) - 1) == f"message {count - 1}"
+
+
+def test_annotations_follow_rows():
+    store = LogStore()
+    store.append(logLines(0, 20))
+    store.setAnnotation(15, "annotation")
+
+    store.removeFirst(5)
+    assert store.annotation(10) == "annotation"
+    assert store.annotation(9) is None
+
+
+def test_remove_all_and_reuse():
+    store = LogStore()
+    store.append(logLines(0, 10))
+    tagCode = store.tagCode(0)
+
+    store.removeFirst(10)
+    assert len(store) == 0
+    assert store.uniqueTags() == []
+
+    store.append(logLines(0, 1))
+    assert store.tagCode(0) == tagCode
+    assert store.logLine(0) == logLines(0, 1)[0]
+
+
+def test_spilled_rows_stay_readable():
+    store = LogStore()
+    store.setMemoryMaxRows(CHUNK_ROWS)
+    lines = logLines(0, 3 * CHUNK_ROWS)
+    lines[5] = logLine(5, tag="Юникод", level="W")
+    store.append(lines)
+
+    assert store._spilled == 2
+    assert len(store) == len(lines)
+    assert [store.logLine(row) for row in range(len(store))] == lines
+    assert sorted(store.uniqueTags()) == sorted({line.tag for line in lines})
+
+
+def test_spilled_chunks_released_on_eviction():
+    store = LogStore()
+    store.setMemoryMaxRows(CHUNK_ROWS)
+    store.append(logLines(0, 3 * CHUNK_ROWS))
+    segment = store._segment
+
+    #
+    # Segment is closed, once none of its chunks are left
+    #
+
+    store.removeFirst(CHUNK_ROWS + 10)
+    assert store._spilled == 1
+    assert store.msg(0) == f"message {CHUNK_ROWS + 10}"
+    assert not segment._file.closed
+
+    store.removeFirst(CHUNK_ROWS)
+    assert store._spilled == 0
+    assert store._segment is None
+    assert segment._file.closed
+    assert store.msg(0) == f"message {2 * CHUNK_ROWS + 10}"
+
+
+def test_clear_closes_segments():
+    store = LogStore()
+    store.setMemoryMaxRows(CHUNK_ROWS)
+    store.append(logLines(0, 2 * CHUNK_ROWS + 1))
+    segment = store._segment
+
+    store.clear()
+    assert segment._file.closed
+    assert len(store) == 0
+
+    store.append(logLines(0, 10))
+    assert store.msg(9) == "message 9"
+
+
+def test_tag_stats_follow_eviction():
+    store = LogStore()
+    store.append(
+        [
+            logLine(0, tag="App", level="D"),
+            logLine(1, tag="App", level="E"),
+            logLine(2, tag="Net", level="W"),
+            logLine(3, tag="App", level="E"),
+        ]
+    )
+
+    stats = {s.tag: (s.count, s.levelCounts) for s in store.tagStats()}
+    assert stats == {"App": (3, {"D": 1, "E": 2}), "Net": (1, {"W": 1})}
+
+    #
+    # Tags with no lines left are dropped
+    #
+
+    store.removeFirst(3)
+    stats = {s.tag: (s.count, s.levelCounts) for s in store.tagStats()}
+    assert stats == {"App": (1, {"E": 1})}
+    assert store.uniqueTags() == ["App"]
@@ -0,0 +1,21 @@
+from pathlib import Path
+
+import yaml
+
+from galog.app.settings.models import AppSettings, CaptureSettings, QueuePolicy
+
+DEFAULT_CONFIG = Path(__file__).parents[3] / "config" / "galog.yaml"
+
+
+def test_queue_policy_serialized_by_name():
+    settings = CaptureSettings(queuePolicy="dropLowestLevel")
+
+    assert settings.queuePolicy == QueuePolicy.DropLowestLevel
+    assert settings.model_dump(mode="json")["queuePolicy"] == "dropLowestLevel"
+
+
+def test_default_config_is_valid():
+    with open(DEFAULT_CONFIG, "r") as f:
+        settings = AppSettings(**yaml.safe_load(f.read()))
+
+    assert settings.capture.queuePolicy == QueuePolicy.Block
@@ -0,0 +1,56 @@
+import asyncio
+import socket
+import time
+
+from galog.app.device import state_cache
+from galog.app.device.state_cache import DeviceStateCache
+
+WAIT_TIMEOUT_SEC = 5.0
+
+
+class FailingTrackClient:
+    #
+    # Fails the first attempts with the given errors,
+    # then reports a device and stays connected
+    #
+
+    def __init__(self, errors):
+        self._errors = list(errors)
+        self.attempts = 0
+
+    async def trackDevices(self, callback):
+        self.attempts += 1
+        if self._errors:
+            raise self._errors.pop(0)
+
+        callback([("emulator-5554", "device")])
+        await asyncio.Event().wait()
+
+
+def waitUntil(predicate):
+    deadline = time.monotonic() + WAIT_TIMEOUT_SEC
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+
+        time.sleep(0.01)
+
+    return False
+
+
+def test_tracking_retried_after_unexpected_errors(monkeypatch):
+    monkeypatch.setattr(state_cache, "TRACK_RETRY_SEC", 0.01)
+    errors = [
+        socket.gaierror("Name or service not known"),
+        ValueError("invalid literal for int() with base 16"),
+        IndexError("list index out of range"),
+        KeyError("unexpected"),
+    ]
+
+    client = FailingTrackClient(errors)
+    cache = DeviceStateCache(client)
+    cache.start()
+
+    assert waitUntil(cache.isLive)
+    assert client.attempts == len(errors) + 1
+    assert cache.lookup("emulator-5554") == (True, "device")
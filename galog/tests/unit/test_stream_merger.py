@@ -0,0 +1,80 @@
+from galog.app.log_reader.models import LogLine
+from galog.app.log_reader.stream_merger import StreamMerger
+
+DELAY_SEC = 0.05
+SETTLE_SEC = 0.01
+
+
+def logLine(msg: str, timestamp: int):
+    return LogLine(
+        tag="App",
+        level="I",
+        msg=msg,
+        pid="100",
+        tid=100,
+        timestamp=timestamp,
+    )
+
+
+def messages(lines):
+    return [line.msg for line in lines]
+
+
+def newMerger(*keys):
+    merger = StreamMerger(DELAY_SEC, SETTLE_SEC)
+    for key in keys:
+        merger.addStream(key)
+
+    return merger
+
+
+def test_lines_released_once_all_streams_got_past_them():
+    merger = newMerger("main", "system")
+    merger.push("main", [logLine("m1", 10), logLine("m2", 30)], 0.0)
+    assert merger.release(0.0) == []
+
+    merger.push("system", [logLine("s1", 20)], 0.0)
+    assert messages(merger.release(0.0)) == ["m1", "s1"]
+
+    merger.push("system", [logLine("s2", 40)], 0.0)
+    assert messages(merger.release(0.0)) == ["m2"]
+    assert merger.size() == 1
+
+
+def test_caught_up_stream_stops_holding_back_after_settling():
+    merger = newMerger("main", "system")
+    merger.push("main", [logLine("m1", 10)], 0.0)
+    merger.setCaughtUp("system", 0.0)
+
+    assert merger.release(0.0) == []
+    assert merger.nextDeadline(0.0) == SETTLE_SEC
+    assert messages(merger.release(SETTLE_SEC)) == ["m1"]
+
+
+def test_lines_released_after_delay():
+    merger = newMerger("main", "system")
+    merger.push("main", [logLine("m1", 10), logLine("m2", 20)], 0.0)
+
+    assert merger.nextDeadline(0.0) == DELAY_SEC
+    assert messages(merger.release(DELAY_SEC)) == ["m1", "m2"]
+    assert merger.nextDeadline(DELAY_SEC) is None
+
+
+def test_late_line_of_slow_stream_keeps_order_of_pending_lines():
+    merger = newMerger("main", "system")
+    merger.push("main", [logLine("m1", 10), logLine("m2", 50)], 0.0)
+    merger.push("system", [logLine("s1", 5), logLine("s2", 40)], 0.0)
+
+    assert messages(merger.release(0.0)) == ["s1", "m1", "s2"]
+    assert messages(merger.releaseAll()) == ["m2"]
+
+
+def test_removed_stream_lines_still_released():
+    merger = newMerger("main", "system")
+    merger.push("main", [logLine("m1", 10)], 0.0)
+    merger.push("system", [logLine("s1", 30)], 0.0)
+    merger.removeStream("system")
+
+    assert messages(merger.release(0.0)) == ["m1"]
+    assert messages(merger.releaseAll()) == ["s1"]
+    assert merger.size() == 0
@@ -0,0 +1,82 @@
+import time
+
+from galog.app.log_reader.log_line_reader import LogFormat
+from galog.app.log_reader.models import LogLine
+from galog.app.log_reader.stream_resume import StreamResumeState
+
+NSEC_PER_SEC = 1_000_000_000
+
+
+def logLine(msg: str, timestamp: int):
+    return LogLine(
+        tag="App",
+        level="I",
+        msg=msg,
+        pid="100",
+        tid=100,
+        timestamp=timestamp,
+    )
+
+
+def accepted(state: StreamResumeState, lines):
+    return [line.msg for line in lines if state.accept(line)]
+
+
+def test_replay_skips_lines_seen_at_boundary():
+    state = StreamResumeState()
+    accepted(state, [logLine("a", 100), logLine("b", 200), logLine("c", 200)])
+
+    state.startOverlap()
+    replay = [
+        logLine("x", 150),
+        logLine("b", 200),
+        logLine("c", 200),
+        logLine("d", 200),
+        logLine("e", 300),
+    ]
+
+    assert accepted(state, replay) == ["d", "e"]
+    assert state.duplicateLines() == 3
+
+
+def test_repeated_boundary_lines_counted():
+    #
+    # Identical lines logged at the same time are told apart
+    # by their count, so a new one is not taken for a repeat
+    #
+
+    state = StreamResumeState()
+    accepted(state, [logLine("a", 100), logLine("a", 100)])
+
+    state.startOverlap()
+    replay = [logLine("a", 100), logLine("a", 100), logLine("a", 100)]
+    assert accepted(state, replay) == ["a"]
+
+
+def test_overlap_ends_after_newer_line():
+    state = StreamResumeState()
+    accepted(state, [logLine("a", 100)])
+
+    state.startOverlap()
+    replay = [logLine("a", 100), logLine("b", 200), logLine("late", 150)]
+    assert accepted(state, replay) == ["b", "late"]
+
+
+def test_nothing_skipped_without_overlap():
+    state = StreamResumeState()
+    accepted(state, [logLine("a", 100)])
+
+    assert accepted(state, [logLine("a", 100), logLine("old", 50)]) == ["a", "old"]
+
+
+def test_since_rounds_down_to_milliseconds():
+    state = StreamResumeState()
+    assert state.since(LogFormat.Epoch) == "1"
+
+    timestamp = 1_700_000_000_123_456_789
+    accepted(state, [logLine("a", timestamp)])
+    assert state.since(LogFormat.Epoch) == "1700000000.123"
+
+    seconds = timestamp // NSEC_PER_SEC
+    localTime = time.strftime("%m-%d %H:%M:%S", time.localtime(seconds))
+    assert state.since(LogFormat.ThreadTime) == f"'{localTime}.123'"